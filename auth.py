@@ -0,0 +1,227 @@
+"""Password hashing off the script thread, with login concurrency limits.
+
+All bcrypt work runs on a bounded thread pool. bcrypt releases the GIL, so
+the pool hashes several logins in parallel, but never more than its worker
+count at once, which leaves CPU for every other session's reruns.
+The work factor comes from ``BCRYPT_ROUNDS``; stored hashes made with a
+different factor are re-hashed transparently on the next successful login.
+Per-IP and per-account limits cap how many hashes one client can have in
+flight, so a brute-force flood cannot occupy every worker. Signups count
+against the same per-IP limit and may only hold part of the pool between
+them, so a signup flood cannot starve logins either.
+"""
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from db import get_pool
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(min(8, os.cpu_count() or 2))))
+HASH_TIMEOUT = 30
+MAX_PER_IP = int(os.getenv("LOGIN_MAX_PER_IP", "4"))
+MAX_PER_ACCOUNT = int(os.getenv("LOGIN_MAX_PER_ACCOUNT", "1"))
+# Signup hashes in flight across all clients; the rest of the pool stays free for logins
+MAX_SIGNUPS = int(os.getenv("SIGNUP_MAX_CONCURRENT", str(max(1, HASH_WORKERS // 2))))
+# Hash jobs allowed to wait behind the running ones before callers are turned away
+MAX_QUEUED = int(os.getenv("BCRYPT_MAX_QUEUED", "64"))
+
+_COST = re.compile(rb"^\$2[abxy]?\$(\d\d)\$")
+
+
+class LoginThrottled(Exception):
+    """Raised when a client or account already has too many hashes in flight."""
+
+
+def hash_cost(hashed):
+    match = _COST.match(hashed if isinstance(hashed, bytes) else hashed.encode())
+    return int(match.group(1)) if match else None
+
+
+# --- Hashing Pool ---
+class PasswordHasher:
+    def __init__(self, rounds=BCRYPT_ROUNDS, workers=HASH_WORKERS, max_queued=MAX_QUEUED):
+        self.rounds = rounds
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + max_queued)
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise LoginThrottled("Too many logins in progress, please retry shortly.")
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=HASH_TIMEOUT)
+        except FutureTimeout:
+            # Still queued behind a backlog: drop it rather than hash for nobody
+            future.cancel()
+            raise LoginThrottled("The server is busy, please try again in a moment.") from None
+
+    def hash(self, password):
+        # Imported on first use, which keeps it off the server's cold start
+        import bcrypt
+
+        return self._submit(lambda: bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(self.rounds)))
+
+    def verify(self, password, hashed):
+        import bcrypt
+
+        if isinstance(hashed, str):
+            hashed = hashed.encode("utf-8")
+        return self._submit(bcrypt.checkpw, password.encode("utf-8"), hashed)
+
+    def needs_rehash(self, hashed):
+        return hash_cost(hashed) != self.rounds
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+# --- Concurrency Limits ---
+class ConcurrencyLimiter:
+    """Caps in-flight work per key; over the cap, callers are rejected."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._active = {}
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def acquire(self, key):
+        with self._lock:
+            if self._active.get(key, 0) >= self.limit:
+                self.rejected += 1
+                return False
+            self._active[key] = self._active.get(key, 0) + 1
+            return True
+
+    def release(self, key):
+        with self._lock:
+            count = self._active.get(key, 0) - 1
+            if count > 0:
+                self._active[key] = count
+            else:
+                self._active.pop(key, None)
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+_ip_limiter = ConcurrencyLimiter(MAX_PER_IP)
+_account_limiter = ConcurrencyLimiter(MAX_PER_ACCOUNT)
+_signup_limiter = ConcurrencyLimiter(MAX_SIGNUPS)
+
+
+def get_hasher():
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher()
+    return _hasher
+
+
+def configure(rounds=None, workers=None, max_queued=MAX_QUEUED):
+    """Replace the process-wide hasher, e.g. from a benchmark."""
+    global _hasher
+    with _hasher_lock:
+        old, _hasher = _hasher, PasswordHasher(
+            rounds if rounds is not None else BCRYPT_ROUNDS,
+            workers if workers is not None else HASH_WORKERS,
+            max_queued,
+        )
+    if old is not None:
+        old.shutdown()
+    return _hasher
+
+
+# --- Users ---
+def register(username, email, password, client_ip=None, pool=None):
+    """Insert a new user; returns False if the username or email is taken.
+
+    Raises LoginThrottled when this IP already has as many hashes running as
+    it is allowed, or when signups hold their whole share of the pool.
+    """
+    pool = pool or get_pool()
+    if client_ip is not None and not _ip_limiter.acquire(client_ip):
+        raise LoginThrottled("Too many requests from this address, please wait.")
+    try:
+        if not _signup_limiter.acquire(None):
+            raise LoginThrottled("Too many signups in progress, please retry shortly.")
+        try:
+            hashed = get_hasher().hash(password)
+        finally:
+            _signup_limiter.release(None)
+    finally:
+        if client_ip is not None:
+            _ip_limiter.release(client_ip)
+    try:
+        pool.execute(
+            "INSERT INTO users (username, email, password, created_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+            (username, email, hashed),
+        )
+    except sqlite3.IntegrityError:
+        return False
+    return True
+
+
+def authenticate(email, password, client_ip=None, pool=None):
+    """Return the user row for valid credentials, else None.
+
+    Raises LoginThrottled when this IP or account already has as many
+    verifications running as it is allowed.
+    """
+    pool = pool or get_pool()
+    # Without a client address (tests, bare mode) only the account cap applies
+    ip_key = client_ip
+    account_key = email.strip().lower()
+    if ip_key is not None and not _ip_limiter.acquire(ip_key):
+        raise LoginThrottled("Too many login attempts from this address, please wait.")
+    try:
+        if not _account_limiter.acquire(account_key):
+            raise LoginThrottled("A login for this account is already in progress.")
+        try:
+            return _check_credentials(pool, email, password)
+        finally:
+            _account_limiter.release(account_key)
+    finally:
+        if ip_key is not None:
+            _ip_limiter.release(ip_key)
+
+
+def _check_credentials(pool, email, password):
+    hasher = get_hasher()
+    user = pool.fetchone("SELECT * FROM users WHERE email = ?", (email,))
+    if not user or not hasher.verify(password, user[3]):
+        return None
+    if hasher.needs_rehash(user[3]):
+        # The password is known to be right here, so move it to the current cost
+        rehashed = hasher.hash(password)
+        pool.execute(
+            "UPDATE users SET password = ?, last_login = CURRENT_TIMESTAMP WHERE id = ?",
+            (rehashed, user[0]),
+        )
+        return user[:3] + (rehashed,) + user[4:]
+    pool.execute("UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?", (user[0],))
+    return user
+
+
+def limiter_stats():
+    return {"ip_rejected": _ip_limiter.rejected, "account_rejected": _account_limiter.rejected,
+            "signup_rejected": _signup_limiter.rejected}
+
+
+# --- Operators ---
+ADMIN_EMAILS = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()}
+
+
+def is_admin(user):
+    """Operators are listed by email in ADMIN_EMAILS (comma-separated)."""
+    return user is not None and user.email.lower() in ADMIN_EMAILS
@@ -0,0 +1,61 @@
+"""Prompt size over a long chat: token-budgeted context vs. joining history.
+
+Plays a synthetic conversation of N turns against a throwaway database and
+prints the estimated prompt tokens for both strategies at checkpoints:
+
+    python benchmarks/bench_context.py --turns 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation import Conversation, estimate_tokens  # noqa: E402
+from db import ConnectionPool  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+WORDS = "gdp growth mumbai delhi bengaluru sector services technology patents share year trend city".split()
+
+
+def sentence(rng, words):
+    return " ".join(rng.choices(WORDS, k=words)).capitalize() + "."
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = ConnectionPool(os.path.join(tmp, "bench.db"))
+        migrate(pool)
+        pool.execute("INSERT INTO users (id, username, email, password) VALUES (1, 'bench', 'bench@example.com', '')")
+        conversation = Conversation(1, pool=pool)
+        naive = []
+        checkpoints = {1, 10, 25, 50, 100, 150, args.turns}
+
+        print(f"{'turn':>5} {'naive tokens':>13} {'budgeted tokens':>16} {'build ms':>9}")
+        for turn in range(1, args.turns + 1):
+            query = sentence(rng, rng.randint(6, 20))
+            started = time.perf_counter()
+            prompt = conversation.prompt_for(query)
+            build_ms = (time.perf_counter() - started) * 1000
+            naive_prompt = "\n".join(naive + [query])
+            if turn in checkpoints:
+                print(f"{turn:>5} {estimate_tokens(naive_prompt):>13} {estimate_tokens(prompt):>16} {build_ms:>9.3f}")
+
+            answer = " ".join(sentence(rng, rng.randint(8, 30)) for _ in range(rng.randint(1, 4)))
+            conversation.append("You", query)
+            conversation.append("Bot", answer)
+            naive += [f"You: {query}", f"Bot: {answer}"]
+        print(f"verbatim turns kept in memory: {len(conversation.recent)} of {2 * args.turns}")
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
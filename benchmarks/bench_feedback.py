@@ -0,0 +1,72 @@
+"""Timing of the operator feedback queries on a large feedback table.
+
+Fills a throwaway database with synthetic feedback, then times full-text
+search pages (first and deep), the rating histogram and per-day counts:
+
+    python benchmarks/bench_feedback.py --rows 300000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import feedback  # noqa: E402
+from db import ConnectionPool  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+WORDS = (
+    "dashboard chart slow fast mumbai delhi bengaluru gdp sector login export pdf "
+    "filter slider great love confusing broken helpful data patents chatbot profile"
+).split()
+
+
+def timed(label, fn, repeat=20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    print(f"{label:<34} {(time.perf_counter() - started) / repeat * 1000:8.2f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=300000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = ConnectionPool(os.path.join(tmp, "bench.db"))
+        migrate(pool)
+        now = time.time()
+        rows = [
+            (
+                f"user{rng.randrange(5000)}",
+                " ".join(rng.choices(WORDS, k=12)),
+                rng.randint(1, 5),
+                None,
+                time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now - rng.randrange(90 * 86400))),
+            )
+            for _ in range(args.rows)
+        ]
+        started = time.perf_counter()
+        for i in range(0, len(rows), 10000):
+            pool.executemany(feedback.INSERT_SQL, rows[i:i + 10000])
+        print(f"inserted {args.rows} rows in {time.perf_counter() - started:.1f} s")
+
+        timed("latest page", lambda: feedback.search(pool=pool))
+        _, cursor = timed("search 'slow export' page 1", lambda: feedback.search("slow export", pool=pool))
+        for _ in range(50):
+            _, cursor = feedback.search("slow export", before_id=cursor, pool=pool)
+        timed("search 'slow export' page 52", lambda: feedback.search("slow export", before_id=cursor, pool=pool))
+        timed("search 'mumbai' rating=1", lambda: feedback.search("mumbai", rating=1, pool=pool))
+        timed("rating histogram", lambda: feedback.rating_histogram(pool=pool))
+        timed("daily counts, 30 days", lambda: feedback.daily_counts(30, pool=pool))
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Trend fitting: one vectorized batch vs. a polyfit loop per series.
+
+Fits the bundled dataset's (metric, city) series both ways, then synthetic
+panels of growing size with a share of missing points, and prints the
+time per full refit and the largest disagreement between the two:
+
+    python benchmarks/bench_forecast.py --series 100 1000 10000 --years 6
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forecast import MIN_POINTS, Forecaster, fit_lines  # noqa: E402
+from metrics import get_metrics  # noqa: E402
+
+
+def fit_loop(x, y):
+    """The per-series baseline: polyfit each row on its observed points."""
+    out = np.full((len(y), 3), np.nan)
+    for i, row in enumerate(y):
+        observed = ~np.isnan(row)
+        n = int(observed.sum())
+        if n < MIN_POINTS:
+            continue
+        slope, intercept = np.polyfit(x[observed], row[observed], 1)
+        residual = row[observed] - (intercept + slope * x[observed])
+        out[i] = slope, intercept, np.sqrt(residual @ residual / (n - 2))
+    return out
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def compare(label, x, y, repeat):
+    flat = y.reshape(-1, len(x))
+    batch_s, fit = timed(lambda: fit_lines(x, flat), repeat)
+    loop_s, baseline = timed(lambda: fit_loop(x, flat), max(1, repeat // 5))
+    ours = np.column_stack([fit.slope, fit.intercept, fit.scale])
+    both = ~np.isnan(baseline) & ~np.isnan(ours)
+    error = float(np.max(np.abs(ours[both] - baseline[both]) / np.maximum(np.abs(baseline[both]), 1e-9), initial=0))
+    print(f"{label:>24} {len(flat):>8} {batch_s * 1000:>10.3f} {loop_s * 1000:>10.3f} "
+          f"{loop_s / batch_s:>8.1f}x {error:>10.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--series", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--years", type=int, default=6)
+    parser.add_argument("--missing", type=float, default=0.1, help="share of points dropped at random")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    metrics = get_metrics()
+    forecaster = Forecaster(metrics)
+    refit_s, _ = timed(lambda: Forecaster(metrics), args.repeat)
+    print(f"dataset refit: {forecaster.fit.slope.size} series over {forecaster.window[0]}-{forecaster.window[1]} "
+          f"in {refit_s * 1000:.3f} ms (best of {args.repeat})\n")
+
+    print(f"{'panel':>24} {'series':>8} {'batch ms':>10} {'loop ms':>10} {'speedup':>9} {'max rel err':>10}")
+    start = np.flatnonzero(metrics.years == forecaster.window[0])[0]
+    x = metrics.years[start:].astype(float)
+    y = np.stack([metrics.grid[c][:, start:] for c in forecaster.columns])
+    y = np.where(forecaster.log[:, None, None], np.log(np.where(y > 0, y, np.nan)), y)
+    compare("bundled dataset", x, y, args.repeat)
+
+    rng = np.random.default_rng(7)
+    x = np.arange(2024 - args.years + 1, 2025, dtype=float)
+    for n in args.series:
+        y = 50 + rng.normal(0, 5, (n, 1)) * (x - x.mean()) + rng.normal(0, 3, (n, len(x)))
+        y[rng.random(y.shape) < args.missing] = np.nan
+        compare(f"synthetic x{args.years} years", x, y, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Routing rate and answer latency of the local intent engine.
+
+Runs every question in ``chatbot_questions.txt`` through ``intents.route``
+and reports how many were answered from the dataset, how many went where
+the corpus expects, and per-question latency:
+
+    python benchmarks/bench_intents.py --repeat 200
+"""
+import argparse
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import intents  # noqa: E402
+from dataset import get_dataset  # noqa: E402
+
+CORPUS = os.path.join(BENCH_DIR, "chatbot_questions.txt")
+
+
+def load_corpus(path=CORPUS):
+    with open(path, encoding="utf-8") as f:
+        rows = [line.rstrip("\n").split("\t", 1) for line in f if line.strip() and not line.startswith("#")]
+    return [(expected, question) for expected, question in rows]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=100, help="timed passes over the corpus")
+    parser.add_argument("--verbose", action="store_true", help="print every answer")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    dataset = get_dataset()
+    intents.route(corpus[0][1], dataset)  # build the router outside the timings
+
+    mismatches = []
+    routed_local = 0
+    for expected, question in corpus:
+        answer = intents.route(question, dataset)
+        routed = "remote" if answer is None else "local"
+        routed_local += answer is not None
+        if routed != expected:
+            mismatches.append((expected, question))
+        if args.verbose:
+            print(f"[{routed:>6}] {question}\n         {answer.text if answer else ''}")
+
+    latencies = []
+    for _ in range(args.repeat):
+        for _, question in corpus:
+            started = time.perf_counter()
+            intents.route(question, dataset)
+            latencies.append(time.perf_counter() - started)
+
+    local = sum(expected == "local" for expected, _ in corpus)
+    print(f"questions: {len(corpus)} ({local} expected local)")
+    print(f"routed as expected: {len(corpus) - len(mismatches)}/{len(corpus)}")
+    for expected, question in mismatches:
+        print(f"  expected {expected}: {question}")
+    print(f"routing rate: {routed_local / len(corpus):.0%} answered from the dataset")
+    print(f"latency p50 {percentile(latencies, 50) * 1e6:.0f} us, p99 {percentile(latencies, 99) * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Login throughput and tail latency across bcrypt costs and pool sizes.
+
+Registers a set of users in a throwaway database, then has N client threads
+log in concurrently and reports logins/second and p50/p99 latency for each
+(cost, workers) combination:
+
+    python benchmarks/bench_login.py --costs 8 10 12 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import auth  # noqa: E402
+from db import ConnectionPool  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_case(pool, users, cost, workers, clients, logins_per_client):
+    auth.configure(rounds=cost, workers=workers, max_queued=clients * 2)
+    # Store every password at this cost so no login pays for a rehash
+    hashed = auth.get_hasher().hash("secret")
+    pool.executemany("UPDATE users SET password = ? WHERE email = ?", [(hashed, u) for u in users])
+
+    latencies = []
+    lock = threading.Lock()
+
+    def client(index):
+        mine = []
+        for i in range(logins_per_client):
+            email = users[(index + i * clients) % len(users)]
+            started = time.perf_counter()
+            assert auth.authenticate(email, "secret", client_ip=f"10.0.0.{index}", pool=pool)
+            mine.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "cost": cost,
+        "workers": workers,
+        "logins_per_s": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--costs", type=int, nargs="+", default=[8, 10, 12])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=4, help="logins per client per case")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = ConnectionPool(os.path.join(tmp, "bench.db"), size=args.clients)
+        migrate(pool)
+        users = [f"user{i}@example.com" for i in range(args.clients * 2)]
+        pool.executemany(
+            "INSERT INTO users (username, email, password) VALUES (?, ?, '')",
+            [(u.split("@")[0], u) for u in users],
+        )
+
+        print(f"{'cost':>4} {'workers':>7} {'logins/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for cost in args.costs:
+            for workers in args.workers:
+                r = run_case(pool, users, cost, workers, args.clients, args.logins)
+                print(f"{r['cost']:>4} {r['workers']:>7} {r['logins_per_s']:>9.1f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
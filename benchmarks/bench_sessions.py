@@ -0,0 +1,331 @@
+"""Headless load test of streamlit_app.py: N concurrent AppTest sessions.
+
+Every session signs up and logs in through the sidebar, then all sessions
+run each scenario together: moving the Insights filters, switching the
+Power BI dashboard views, asking the chatbot (open-ended questions, unique
+per session and turn, so every one reaches the local stub server) and
+submitting feedback. Each scenario reports rerun latency percentiles,
+reruns per second across all sessions, peak RSS and contention on the
+SQLite write lock (retries and time blocked on it, summed over sessions).
+AppTest is not safe to run concurrently in one process, so each session is
+its own worker process sharing the database file; peak RSS is that of the
+largest session process, and each process has its own connection pool, so
+its acquire-queue waits say nothing about the others and are not reported.
+
+Results can be saved as a JSON baseline and later runs compared against
+it; a p95 or throughput regression past the tolerance exits non-zero:
+
+    python benchmarks/bench_sessions.py --sessions 8 --save
+    python benchmarks/bench_sessions.py --sessions 8 --compare
+
+Reruns that raise or show an ``st.error`` count as errors; a run with any
+exits non-zero and is never saved as a baseline. Numbers depend on the
+machine, so baselines stay local (``benchmarks/baselines/`` is git-ignored).
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+APP = os.path.join(ROOT, "streamlit_app.py")
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "sessions.json")
+SCENARIOS = ["login", "insights", "dashboard", "chatbot", "feedback"]
+QUESTIONS = [
+    "Why is Bengaluru's technology sector growing so fast?",
+    "What policies could help Chennai attract more startups?",
+    "How will remote work affect Hyderabad's economy?",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class Session:
+    """One simulated user: an AppTest plus the timings of its reruns."""
+
+    def __init__(self, index, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.index = index
+        self.at = AppTest.from_file(APP, default_timeout=timeout)
+        self.email = f"bench{index}@example.com"
+        self.password = f"bench-password-{index}"
+        self.timings = []
+        self.errors = 0
+
+    def _run(self, widget=None):
+        started = time.perf_counter()
+        (widget or self.at).run()
+        self.timings.append(time.perf_counter() - started)
+        # st.error is how the app reports a failed step (e.g. a bad embed config)
+        self.errors += len(self.at.exception) + len(self.at.error)
+
+    def _labelled(self, elements, label):
+        return next(e for e in elements if e.label == label)
+
+    def _open(self, tab):
+        self.at.session_state["active_tab"] = tab
+        self._run()
+
+    # --- Scenarios ---
+    def login(self, iterations):
+        # The element tree is rebuilt by every run, so look widgets up afresh
+        self._run()
+        self._run(self.at.sidebar.radio[0].set_value("Signup"))
+        self._labelled(self.at.sidebar.text_input, "Username").set_value(f"bench{self.index}")
+        self._labelled(self.at.sidebar.text_input, "Email").set_value(self.email)
+        self._labelled(self.at.sidebar.text_input, "Password").set_value(self.password)
+        self._run(self._labelled(self.at.sidebar.button, "Signup").click())
+        self._run(self.at.sidebar.radio[0].set_value("Login"))
+        self._labelled(self.at.sidebar.text_input, "Email").set_value(self.email)
+        self._labelled(self.at.sidebar.text_input, "Password").set_value(self.password)
+        self._run(self._labelled(self.at.sidebar.button, "Login").click())
+        if self.at.session_state["user"] is None:
+            raise RuntimeError(f"session {self.index} could not log in")
+
+    def insights(self, iterations):
+        self._open("Insights")
+        cities = ["Mumbai", "Delhi", "Bengaluru", "Chennai", "Hyderabad"]
+        for i in range(iterations):
+            self._run(self._labelled(self.at.multiselect, "Select Cities:").set_value(cities[: 2 + i % 4]))
+            self._run(self._labelled(self.at.slider, "Select Year Range:").set_value((2010 + i % 10, 2024)))
+            sectors = ["Services", "Technology", "Industry"][: 1 + i % 3]
+            self._run(self._labelled(self.at.multiselect, "Select Sectors:").set_value(sectors))
+
+    def dashboard(self, iterations):
+        import dashboards
+
+        self._open("Dashboard")
+        toggle = self._labelled(self.at.toggle, "Open in Power BI")
+        if not toggle.value:
+            self._run(toggle.set_value(True))
+        for i in range(iterations * len(dashboards.VIEWS)):
+            view = dashboards.VIEWS[i % len(dashboards.VIEWS)]
+            self._run(self._labelled(self.at.selectbox, "Choose a Dashboard View:").set_value(view))
+
+    def chatbot(self, iterations):
+        self._open("Chatbot")
+        for i in range(iterations):
+            question = f"{QUESTIONS[i % len(QUESTIONS)]} (session {self.index}, turn {i})"
+            self._labelled(self.at.text_input, "Ask a question").set_value(question)
+            self._run(self._labelled(self.at.button, "Submit Query").click())
+
+    def feedback(self, iterations):
+        self._open("Feedback")
+        for i in range(iterations):
+            self._labelled(self.at.slider, "Rate your experience:").set_value(1 + i % 5)
+            self.at.text_area[0].set_value(f"Load test feedback {i} from session {self.index}")
+            self._labelled(self.at.text_input, "Enter your email").set_value(self.email)
+            self._run(self._labelled(self.at.button, "Submit Feedback").click())
+
+
+# --- Workers ---
+# AppTest swaps a process-wide Runtime singleton in and out around every run,
+# so sessions cannot share a process; each one gets its own worker.
+def worker(index, timeout, commands, results):
+    logging.disable(logging.WARNING)
+    from db import get_pool
+    from sessions import SessionUser
+    from streamlit.testing.v1 import AppTest
+
+    # Import the app and build the dataset's metrics before anything is timed
+    warm_up = AppTest.from_file(APP, default_timeout=timeout)
+    warm_up.session_state["user"] = SessionUser(0, "warm-up", "warm-up@example.com")
+    warm_up.session_state["active_tab"] = "Insights"
+    warm_up.run()
+    session = Session(index, timeout)
+    for name, iterations in iter(commands.get, None):
+        session.timings, session.errors = [], 0
+        pool_before = get_pool().stats()
+        failure = None
+        started = time.time()
+        try:
+            getattr(session, name)(iterations)
+        except Exception as e:
+            failure = f"session {index}: {e!r}"
+        finished = time.time()
+        pool_after = get_pool().stats()
+        results.put({
+            "timings": session.timings,
+            "errors": session.errors,
+            "failure": failure,
+            "started": started,
+            "finished": finished,
+            "peak_rss_mb": peak_rss_mb(),
+            **{k: pool_after[k] - pool_before[k] for k in ("lock_retries", "lock_failures", "lock_wait_seconds")},
+        })
+
+
+def run_scenario(workers, results, name, iterations):
+    """Start ``name`` in every session at once and aggregate when all finish."""
+    for commands, _ in workers:
+        commands.put((name, iterations))
+    reports = [results.get() for _ in workers]
+
+    timings = [t for r in reports for t in r["timings"]]
+    failures = [r["failure"] for r in reports if r["failure"]]
+    if not timings:
+        raise RuntimeError(f"{name}: no reruns completed ({'; '.join(failures)})")
+    for failure in failures:
+        print(f"  {name} failed in {failure}")
+    elapsed = max(r["finished"] for r in reports) - min(r["started"] for r in reports)
+    return {
+        "reruns": len(timings),
+        "mean_ms": round(sum(timings) / len(timings) * 1000, 1),
+        "p50_ms": round(percentile(timings, 50) * 1000, 1),
+        "p95_ms": round(percentile(timings, 95) * 1000, 1),
+        "p99_ms": round(percentile(timings, 99) * 1000, 1),
+        "throughput_rps": round(len(timings) / elapsed, 2),
+        # Largest single session process; the app serves them all from one
+        "peak_rss_mb": max(r["peak_rss_mb"] for r in reports),
+        "db_lock_retries": sum(r["lock_retries"] for r in reports),
+        "db_lock_failures": sum(r["lock_failures"] for r in reports),
+        "db_lock_wait_ms": round(sum(r["lock_wait_seconds"] for r in reports) * 1000, 1),
+        "errors": sum(r["errors"] for r in reports) + len(failures),
+    }
+
+
+# --- Baselines ---
+def compare(results, baseline, tolerance):
+    """Print each scenario against the baseline; returns the regressions."""
+    regressions = []
+    print(f"\n{'scenario':<10} {'p95 ms':>18} {'reruns/s':>18}")
+    for name, now in results.items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        p95 = now["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        rps = now["throughput_rps"] / before["throughput_rps"] - 1 if before["throughput_rps"] else 0.0
+        flag = ""
+        if p95 > tolerance or rps < -tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<10} {before['p95_ms']:>7} -> {now['p95_ms']:<7}{p95:+.0%} "
+              f"{before['throughput_rps']:>6} -> {now['throughput_rps']:<6}{rps:+.0%}{flag}")
+    return regressions
+
+
+def configure_environment(tmp, args):
+    import dashboards
+    import mock_powerbi_token_server
+    import stub_llm_server
+
+    llm = stub_llm_server.serve(0, first_token_delay=args.llm_delay, token_delay=0.002)
+    tokens = mock_powerbi_token_server.serve(0, ttl=3600)
+    # Read at import time by the app's modules, so set before the first run
+    os.environ.update({
+        "USER_DB_PATH": os.path.join(tmp, "bench.db"),
+        "CHATBOT_BACKEND": f"stub:http://127.0.0.1:{llm.server_address[1]}",
+        "POWERBI_TOKEN_URL": f"http://127.0.0.1:{tokens.server_address[1]}/token",
+        "DASHBOARD_MODE": "powerbi",
+        # Token mode navigates with setPage, which needs a page per view
+        "POWERBI_PAGES": json.dumps({view: f"ReportSectionBench{i}" for i, view in enumerate(dashboards.VIEWS)}),
+        "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+        "SESSION_SECRET": os.getenv("SESSION_SECRET", "bench-secret"),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=3, help="interactions per scenario and session")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--llm-delay", type=float, default=0.05, help="stub server's time to first token")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds allowed per rerun")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, help="write results as a baseline")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="compare with a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    # AppTest logs a bare-mode warning per element; keep the report readable
+    logging.disable(logging.WARNING)
+    import powerbi
+
+    if "dashboard" in args.scenarios and not powerbi.client_available():
+        print(f"note: {powerbi.CLIENT_JS} is not vendored, so the dashboard scenario times the autoAuth "
+              "fallback rather than token embedding (see powerbi.py)")
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_environment(tmp, args)
+        scenarios = ["login"] + [s for s in args.scenarios if s != "login"]
+        context = multiprocessing.get_context("spawn")
+        reports = context.Queue()
+        workers = []
+        for i in range(args.sessions):
+            commands = context.Queue()
+            process = context.Process(target=worker, args=(i, args.timeout, commands, reports), daemon=True)
+            process.start()
+            workers.append((commands, process))
+        results = {}
+        print(f"{args.sessions} sessions, {args.iterations} iterations per scenario")
+        print(f"{'scenario':<10} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'reruns/s':>9} "
+              f"{'peak MB':>8} {'lock ms':>8} {'retries':>8} {'errors':>7}")
+        for name in scenarios:
+            r = results[name] = run_scenario(workers, reports, name, args.iterations)
+            print(f"{name:<10} {r['reruns']:>7} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} "
+                  f"{r['throughput_rps']:>9} {r['peak_rss_mb']:>8} {r['db_lock_wait_ms']:>8} "
+                  f"{r['db_lock_retries']:>8} {r['errors']:>7}")
+        for commands, process in workers:
+            commands.put(None)
+        for _, process in workers:
+            process.join(timeout=30)
+
+    report = {
+        "meta": {
+            "sessions": args.sessions,
+            "iterations": args.iterations,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "powerbi_mode": "token" if powerbi.client_available() else "autoAuth",
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "recorded": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "scenarios": results,
+    }
+    status = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        settings = ("sessions", "iterations", "bcrypt_rounds", "powerbi_mode")
+        if {k: baseline["meta"].get(k) for k in settings} != {k: report["meta"][k] for k in settings}:
+            print("warning: baseline was recorded with different --sessions/--iterations/--bcrypt-rounds "
+                  "or Power BI embed mode")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nregressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            status = 1
+    broken = any(r["errors"] for r in results.values())
+    if broken:
+        print("\nsome reruns raised exceptions or showed errors; see the errors column")
+        status = 1
+    if args.save and broken:
+        print("not writing a baseline from a run with errors")
+    elif args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nbaseline written to {args.save}")
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Local stand-in for a Power BI embed-token endpoint, for tests.
+
+Answers every POST with a fresh fake token shaped like GenerateToken's
+response ({"token", "tokenId", "expiration"}) plus the report's embed URL.
+Point the app at it with:
+
+    python benchmarks/mock_powerbi_token_server.py --port 8766 --ttl 3600 &
+    POWERBI_TOKEN_URL=http://127.0.0.1:8766/token DASHBOARD_MODE=powerbi streamlit run streamlit_app.py
+"""
+import argparse
+import json
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(ttl, state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.0"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            report_id = body.get("reportId", "")
+            with state["lock"]:
+                state["requests"] += 1
+            expiration = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+            payload = json.dumps({
+                "token": f"mock-token-{uuid.uuid4().hex}",
+                "tokenId": str(uuid.uuid4()),
+                "expiration": expiration.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "embedUrl": f"https://app.powerbi.com/reportEmbed?reportId={report_id}",
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=0, ttl=3600):
+    """Start the mock on a background thread; ``server.state["requests"]`` counts tokens issued."""
+    state = {"requests": 0, "lock": threading.Lock()}
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(ttl, state))
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, name="mock-powerbi-token", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--ttl", type=int, default=3600, help="token lifetime in seconds")
+    args = parser.parse_args()
+    server = serve(args.port, args.ttl)
+    print(f"mock embed-token endpoint on http://127.0.0.1:{server.server_address[1]}/token")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
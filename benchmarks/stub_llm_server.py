@@ -0,0 +1,68 @@
+"""Local stand-in for the completion API, for tests and benchmarks.
+
+Streams a canned answer word by word as ``data: {"text": ...}`` lines, the
+format ``chatbot.StubBackend`` reads. Point the app at it with:
+
+    python benchmarks/stub_llm_server.py --port 8765 &
+    CHATBOT_BACKEND=stub:http://127.0.0.1:8765 streamlit run streamlit_app.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(first_token_delay, token_delay, words):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.0"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            question = body.get("prompt", "").strip().splitlines()[-1:] or [""]
+            answer = f"Stub answer to: {question[0]}. " + " ".join(["lorem"] * words)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            try:
+                time.sleep(first_token_delay)
+                for i, word in enumerate(answer.split(" ")[: body.get("max_tokens", 150)]):
+                    if i:
+                        time.sleep(token_delay)
+                    self.wfile.write(b"data: " + json.dumps({"text": (" " if i else "") + word}).encode() + b"\n\n")
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client cancelled or timed out
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=0, first_token_delay=0.05, token_delay=0.005, words=20):
+    """Start the stub server on a background thread and return it."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(first_token_delay, token_delay, words))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-llm", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token-delay", type=float, default=0.05)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--words", type=int, default=20)
+    args = parser.parse_args()
+    server = serve(args.port, args.first_token_delay, args.token_delay, args.words)
+    print(f"stub completion server on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
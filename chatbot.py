@@ -0,0 +1,240 @@
+"""Streaming chatbot client with timeouts, retries and cancellation.
+
+Completions run on one background asyncio loop shared by the process, and
+tokens are handed to the session's script thread through a queue as they
+arrive, so ``st.write_stream`` can paint them immediately. Each request has
+a hard deadline, retries with backoff until the first token arrives, and is
+cancelled when the script run that started it stops.
+
+The backend is chosen by ``CHATBOT_BACKEND``: ``openai`` (default) or
+``stub:http://host:port`` for the local stub server used in tests and
+benchmarks (``benchmarks/stub_llm_server.py``).
+"""
+import asyncio
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+CHATBOT_BACKEND = os.getenv("CHATBOT_BACKEND", "openai")
+CHATBOT_MODEL = os.getenv("CHATBOT_MODEL", "text-davinci-003")
+MAX_TOKENS = 150
+REQUEST_TIMEOUT = float(os.getenv("CHATBOT_TIMEOUT_SECONDS", "30"))
+FIRST_TOKEN_TIMEOUT = float(os.getenv("CHATBOT_FIRST_TOKEN_SECONDS", "10"))
+RETRIES = 2
+RETRY_BACKOFF = 0.5
+# openai.error classes worth retrying, matched by name so openai stays a lazy import
+RETRYABLE_API_ERRORS = {"APIConnectionError", "RateLimitError", "ServiceUnavailableError", "Timeout", "TryAgain"}
+
+TIMEOUT_MESSAGE = "The assistant took too long to respond. Please try again."
+ERROR_MESSAGE = "Sorry, the assistant is unavailable right now. Please try again later."
+
+logger = logging.getLogger(__name__)
+
+
+# --- Backends ---
+class OpenAIBackend:
+    async def stream(self, prompt, max_tokens=MAX_TOKENS):
+        import openai
+
+        response = await openai.Completion.acreate(
+            engine=CHATBOT_MODEL,
+            prompt=prompt,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        async for chunk in response:
+            text = chunk.choices[0].text
+            if text:
+                yield text
+
+
+class StubBackend:
+    """Reads ``data: {"text": ...}`` lines from the local stub server."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.path = parts.path or "/v1/completions"
+
+    async def stream(self, prompt, max_tokens=MAX_TOKENS):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            body = json.dumps({"prompt": prompt, "max_tokens": max_tokens}).encode("utf-8")
+            writer.write(
+                f"POST {self.path} HTTP/1.0\r\nHost: {self.host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("ascii") + body
+            )
+            await writer.drain()
+            status = await reader.readline()
+            if b" 200 " not in status:
+                raise ConnectionError(f"stub server answered {status.decode(errors='replace').strip()}")
+            while (await reader.readline()).strip():
+                pass  # headers
+            async for line in reader:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    return
+                yield json.loads(data)["text"]
+        finally:
+            writer.close()
+
+
+def make_backend(spec=CHATBOT_BACKEND):
+    if spec.startswith("stub:"):
+        return StubBackend(spec[len("stub:"):])
+    if spec == "openai":
+        return OpenAIBackend()
+    raise ValueError(f"unknown CHATBOT_BACKEND {spec!r}")
+
+
+def _is_retryable(error):
+    return isinstance(error, (asyncio.TimeoutError, OSError)) or type(error).__name__ in RETRYABLE_API_ERRORS
+
+
+# --- Event Loop ---
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _event_loop():
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="chatbot-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+# --- Metrics ---
+class ChatStats:
+    """Counters and recent time-to-first-token samples for the perf panel."""
+
+    def __init__(self, window=500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._ttft = []
+        self.counters = {"requests": 0, "completed": 0, "timeouts": 0, "errors": 0, "cancelled": 0, "retries": 0}
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def first_token(self, seconds):
+        with self._lock:
+            self._ttft.append(seconds)
+            del self._ttft[:-self.window]
+
+    def snapshot(self):
+        with self._lock:
+            samples = sorted(self._ttft)
+            stats = dict(self.counters)
+        for pct in (50, 95, 99):
+            stats[f"ttft_p{pct}_ms"] = (
+                samples[min(len(samples) - 1, int(pct / 100 * len(samples)))] * 1000 if samples else None
+            )
+        return stats
+
+
+stats = ChatStats()
+
+
+# --- Requests ---
+_DONE = object()
+
+
+class ChatRequest:
+    """One in-flight completion; iterate ``tokens()`` to consume it."""
+
+    def __init__(self, prompt, backend=None, timeout=REQUEST_TIMEOUT, first_token_timeout=FIRST_TOKEN_TIMEOUT):
+        self.prompt = prompt
+        self.backend = backend or make_backend()
+        self.timeout = timeout
+        self.first_token_timeout = first_token_timeout
+        self.ttft = None
+        self.error = None
+        self._queue = queue.Queue()
+        self._started = time.perf_counter()
+        stats.count("requests")
+        self._future = asyncio.run_coroutine_threadsafe(self._run(), _event_loop())
+
+    async def _run(self):
+        try:
+            await asyncio.wait_for(self._stream_with_retries(), self.timeout)
+            stats.count("completed")
+        except asyncio.TimeoutError:
+            self.error = TIMEOUT_MESSAGE
+            stats.count("timeouts")
+        except asyncio.CancelledError:
+            stats.count("cancelled")
+            raise
+        except Exception:
+            logger.exception("Chatbot request failed")
+            self.error = ERROR_MESSAGE
+            stats.count("errors")
+        finally:
+            self._queue.put(_DONE)
+
+    async def _stream_with_retries(self):
+        for attempt in range(RETRIES + 1):
+            try:
+                await self._stream_once()
+                return
+            except Exception as e:
+                # Once tokens have been shown a retry would repeat them
+                if not _is_retryable(e) or self.ttft is not None or attempt == RETRIES:
+                    raise
+                if not isinstance(e, asyncio.TimeoutError):
+                    logger.warning("Chatbot backend error, retrying: %s", e)
+                stats.count("retries")
+                await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt) * (0.5 + random.random()))
+
+    async def _stream_once(self):
+        stream = self.backend.stream(self.prompt).__aiter__()
+        try:
+            while True:
+                wait = self.first_token_timeout if self.ttft is None else None
+                try:
+                    token = await asyncio.wait_for(stream.__anext__(), wait)
+                except StopAsyncIteration:
+                    return
+                if self.ttft is None:
+                    self.ttft = time.perf_counter() - self._started
+                    stats.first_token(self.ttft)
+                self._queue.put(token)
+        finally:
+            await stream.aclose()
+
+    def tokens(self):
+        """Yield tokens as they arrive; closing the generator cancels the request.
+
+        Streamlit closes it when the script run is interrupted (a new query,
+        another widget change or the user leaving), so abandoned requests
+        stop using the backend right away.
+        """
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _DONE:
+                    break
+                yield item
+            if self.error:
+                yield self.error
+        finally:
+            self.cancel()
+
+    def cancel(self):
+        self._future.cancel()
+
+    def result(self):
+        return "".join(self.tokens()).strip()
@@ -0,0 +1,133 @@
+"""Token-budgeted chatbot context with a rolling summary, stored in SQLite.
+
+Every turn is written to ``chat_turns``. Only the most recent turns that fit
+the token budget are kept verbatim, in memory and in the prompt; older ones
+are folded into a short rolling summary saved in ``chat_summaries``. Prompt
+size and per-session memory therefore stay flat however long the chat gets,
+and the full transcript can still be read back from the database.
+"""
+import os
+import re
+import threading
+import time
+
+from db import get_pool
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CHATBOT_CONTEXT_TOKENS", "1024"))
+SUMMARY_TOKEN_BUDGET = CONTEXT_TOKEN_BUDGET // 4
+SUMMARY_FRAGMENT_CHARS = 120
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English with GPT-style tokenizers
+    return max(1, (len(text) + 3) // 4)
+
+
+def _fragment(role, content):
+    """First sentence of a turn, clipped, as its line in the summary."""
+    first = _SENTENCE_END.split(content.strip(), maxsplit=1)[0]
+    if len(first) > SUMMARY_FRAGMENT_CHARS:
+        first = first[:SUMMARY_FRAGMENT_CHARS - 1].rstrip() + "…"
+    return f"{role}: {first}"
+
+
+class Conversation:
+    """One user's chat context: a verbatim recent window plus a summary."""
+
+    def __init__(self, user_id, pool=None, budget=CONTEXT_TOKEN_BUDGET, summary_budget=SUMMARY_TOKEN_BUDGET):
+        self.user_id = user_id
+        self.pool = pool or get_pool()
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        row = self.pool.fetchone(
+            "SELECT summary, through_turn_id FROM chat_summaries WHERE user_id = ?", (self.user_id,)
+        )
+        self.summary, self.through_turn_id = row if row else ("", 0)
+        rows = self.pool.fetchall(
+            "SELECT id, role, content FROM chat_turns WHERE user_id = ? AND id > ? ORDER BY id",
+            (self.user_id, self.through_turn_id),
+        )
+        self.recent = [(turn_id, role, content, estimate_tokens(content)) for turn_id, role, content in rows]
+        self._save(self._fold())
+
+    @property
+    def recent_budget(self):
+        return self.budget - self.summary_budget
+
+    # --- Turns ---
+    def append(self, role, content):
+        turn_id = self.pool.execute(
+            "INSERT INTO chat_turns (user_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+            (self.user_id, role, content, time.time()),
+        )
+        with self._lock:
+            self.recent.append((turn_id, role, content, estimate_tokens(content)))
+            folded = self._fold()
+        # Written outside the lock, so other turns never queue behind SQLite
+        self._save(folded)
+
+    def _fold(self):
+        """Move the oldest verbatim turns into the summary until the rest fit.
+
+        Call with the lock held; returns (summary, through_turn_id) to save,
+        or None when nothing was folded.
+        """
+        folded = []
+        total = sum(t[3] for t in self.recent)
+        # The latest exchange always stays verbatim, even if it alone is large
+        while total > self.recent_budget and len(self.recent) > 2:
+            turn = self.recent.pop(0)
+            total -= turn[3]
+            folded.append(turn)
+        if not folded:
+            return None
+
+        lines = (self.summary.splitlines() if self.summary else []) + [_fragment(t[1], t[2]) for t in folded]
+        # Rolling: the oldest summary lines go first when it outgrows its budget
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_budget:
+            lines.pop(0)
+        self.summary = "\n".join(lines)
+        self.through_turn_id = folded[-1][0]
+        return self.summary, self.through_turn_id
+
+    def _save(self, folded):
+        if folded is None:
+            return
+        # Two appends can save out of order; the summary reaching further wins
+        self.pool.execute(
+            """
+            INSERT INTO chat_summaries (user_id, summary, through_turn_id) VALUES (?, ?, ?)
+            ON CONFLICT (user_id) DO UPDATE SET summary = excluded.summary, through_turn_id = excluded.through_turn_id
+            WHERE excluded.through_turn_id > chat_summaries.through_turn_id
+            """,
+            (self.user_id, *folded),
+        )
+
+    # --- Prompt ---
+    def lines(self):
+        """The verbatim recent turns as "Role: text" lines."""
+        with self._lock:
+            return [f"{role}: {content}" for _, role, content, _ in self.recent]
+
+    def prompt_for(self, query):
+        with self._lock:
+            parts = []
+            if self.summary:
+                parts.append(f"Summary of the earlier conversation:\n{self.summary}")
+            parts.extend(f"{role}: {content}" for _, role, content, _ in self.recent)
+        parts.append(query)
+        return "\n".join(parts)
+
+    def transcript(self, limit=200):
+        """The latest ``limit`` turns from the database, oldest first."""
+        rows = self.pool.fetchall(
+            "SELECT role, content FROM chat_turns WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+            (self.user_id, limit),
+        )
+        return [f"{role}: {content}" for role, content in reversed(rows)]
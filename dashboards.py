@@ -0,0 +1,236 @@
+"""Native renderer for the six Dashboard views, drawn from the local dataset.
+
+Each view is a list of figures: Key Takeaways metric rows and Vega-Lite
+specs with their data inlined. Specs are plain dicts built from the
+``Metrics`` grids, memoized per (view, cities) with LRU eviction inside a
+renderer that lives as long as its dataset version, so switching views or
+filters is a dictionary lookup and needs no network. The all-cities
+variant of every view is built up front. Series longer than ``MAX_POINTS``
+are downsampled on the server (largest-triangle-three-buckets) before they
+are inlined.
+"""
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from dataset import LRUCache, VersionedCache, canonical_city
+from metrics import get_metrics
+
+CACHE_SIZE = 128
+MAX_POINTS = int(os.getenv("DASHBOARD_MAX_POINTS", "400"))
+
+VIEWS = [
+    "Homepage",
+    "GDP",
+    "Sectoral Contributions",
+    "City-wise Patents",
+    "City-wise Expenditure",
+    "City-wise Employment Rates",
+]
+
+DESCRIPTIONS = {
+    "Homepage": (
+        "Welcome to the interactive Power BI Dashboard! This dynamic platform offers an in-depth view of city-wise economic data in India. "
+        "Navigate through various sections to explore key insights, visualize trends, and gain a comprehensive understanding of India's evolving economy. "
+        "Discover how cities are performing across economic, innovation, and employment metrics through intuitive visualizations."
+    ),
+    "GDP": (
+        "This section presents a detailed comparative analysis of GDP trends across major Indian cities from 2020 to 2024. "
+        "Uncover how top-performing cities are driving India's economic growth, identify patterns in GDP fluctuations, and assess regional economic disparities. "
+        "Interactive graphs and year-on-year comparisons help you grasp each city's economic trajectory."
+    ),
+    "Sectoral Contributions": (
+        "Delve into the economic structure of Indian cities by analyzing the contributions of key sectors—Agriculture, Industry, Services, and Technology—to their GDP. "
+        "Understand the diversity in economic drivers for each city and see how sectoral strengths have evolved over time. "
+        "This view helps pinpoint emerging sectors and areas of growth potential."
+    ),
+    "City-wise Patents": (
+        "Explore the innovation landscape of India through city-wise patent metrics. "
+        "This section showcases the number of patents filed per 100,000 inhabitants, reflecting each city's focus on research, creativity, and technological advancements. "
+        "Gain insights into regional hubs of innovation and track their progress over time."
+    ),
+    "City-wise Expenditure": (
+        "Analyze the financial commitment of Indian cities towards Research and Development (R&D). "
+        "This section highlights the percentage of GDP allocated to R&D activities, showcasing the priority given to fostering innovation and technological breakthroughs. "
+        "Identify cities leading the way in building a knowledge-driven economy."
+    ),
+    "City-wise Employment Rates": (
+        "Understand the employment landscape across key sectors such as Information and Communication Technology (ICT), Small and Medium Enterprises (SMEs), and Tourism. "
+        "This section provides insights into employment trends, including overall unemployment rates and youth unemployment statistics, offering a clear picture of workforce dynamics in each city. "
+        "Interactive visualizations allow for sector-specific and city-wise analysis."
+    ),
+}
+
+# kind is "metrics" (spec = [(label, value, delta), ...]) or "chart" (spec = Vega-Lite dict)
+Figure = namedtuple("Figure", ["kind", "title", "spec"])
+
+
+# --- Downsampling ---
+def downsample(x, y, max_points=MAX_POINTS):
+    """Largest-triangle-three-buckets: keep the points that shape the line."""
+    n = len(x)
+    if n <= max_points or max_points < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    keep = [0]
+    for i in range(max_points - 2):
+        start, stop = edges[i], edges[i + 1]
+        nxt = slice(edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else slice(n - 1, n)
+        ax, ay = x[keep[-1]], y[keep[-1]]
+        cx, cy = x[nxt].mean(), y[nxt].mean()
+        area = np.abs((ax - cx) * (y[start:stop] - ay) - (ax - x[start:stop]) * (cy - ay))
+        keep.append(start + int(np.argmax(area)))
+    keep.append(n - 1)
+    return x[keep], y[keep]
+
+
+# --- Vega-Lite Specs ---
+def _line(title, rows, y_title):
+    return Figure("chart", title, {
+        "data": {"values": rows},
+        "mark": {"type": "line", "point": True},
+        "encoding": {
+            "x": {"field": "Year", "type": "quantitative", "axis": {"format": "d"}},
+            "y": {"field": "Value", "type": "quantitative", "title": y_title},
+            "color": {"field": "City", "type": "nominal"},
+        },
+    })
+
+
+def _bar(title, rows, y_title, color=None, stacked=False):
+    encoding = {
+        "x": {"field": "City", "type": "nominal", "sort": "-y" if color is None else None},
+        "y": {"field": "Value", "type": "quantitative", "title": y_title},
+    }
+    if color:
+        encoding["color"] = {"field": color, "type": "nominal"}
+        if not stacked:
+            encoding["xOffset"] = {"field": color}
+            encoding["y"]["stack"] = None
+    return Figure("chart", title, {"data": {"values": rows}, "mark": "bar", "encoding": encoding})
+
+
+class DashboardRenderer:
+    """Figures for every view over one Metrics snapshot, memoized per filter."""
+
+    def __init__(self, metrics, cache_size=CACHE_SIZE, prebuild=True):
+        self.metrics = metrics
+        self.version = metrics.dataset.version
+        self.cities = metrics.cities
+        self._cache = LRUCache(cache_size)
+        if prebuild:
+            for view in VIEWS:
+                self.figures(view, self.cities)
+
+    def normalize(self, view, cities):
+        cities = tuple(sorted({canonical_city(c) for c in cities} & set(self.cities)))
+        return view, cities, self.version
+
+    def figures(self, view, cities):
+        if view not in VIEWS:
+            raise KeyError(view)
+        key = self.normalize(view, cities)
+        figures = self._cache.get(key)
+        if figures is None:
+            codes = np.array([self.metrics.city_code[c] for c in key[1]], dtype=int)
+            figures = tuple(getattr(self, "_" + view.lower().replace("-", "_").replace(" ", "_"))(codes)) if len(codes) else ()
+            figures = self._cache.put(key, figures)
+        return figures
+
+    def stats(self):
+        return self._cache.stats()
+
+    # --- Data ---
+    def _latest(self, column):
+        """Index and label of the latest year with any data for ``column``."""
+        has_data = np.flatnonzero(~np.isnan(self.metrics.grid[column]).all(axis=0))
+        i = int(has_data[-1])
+        return i, int(self.metrics.years[i])
+
+    def _series_rows(self, column, codes):
+        """Long-form rows for a line chart, one series per city, NaNs dropped."""
+        grid, years = self.metrics.grid[column], self.metrics.years.astype(float)
+        rows = []
+        for code in codes:
+            values = grid[code]
+            keep = ~np.isnan(values)
+            x, y = downsample(years[keep], values[keep])
+            city = self.cities[code]
+            rows.extend({"Year": int(a), "Value": round(float(b), 3), "City": city} for a, b in zip(x, y))
+        return rows
+
+    def _snapshot_rows(self, values, codes, series=None):
+        rows = []
+        for code in codes:
+            if not np.isnan(values[code]):
+                row = {"City": self.cities[code], "Value": round(float(values[code]), 3)}
+                if series:
+                    row["Series"] = series
+                rows.append(row)
+        return rows
+
+    def _latest_rows(self, column, codes, series=None):
+        i, year = self._latest(column)
+        return self._snapshot_rows(self.metrics.grid[column][:, i], codes, series), year
+
+    # --- Views ---
+    def _homepage(self, codes):
+        t = self.metrics.takeaways
+        yield Figure("metrics", "Key Takeaways", [
+            ("Highest GDP Growth City", *t["growth"]),
+            ("Most Innovative City", *t["innovation"]),
+            ("Top Contributing Sector", *t["sector"]),
+            ("Average GDP Growth ({}-{})".format(*self.metrics.cagr_window), *t["average_growth"]),
+        ])
+        rows, year = self._latest_rows("gdp", codes)
+        yield _bar(f"GDP by City, {year}", rows, "GDP (in billion $)")
+
+    def _gdp(self, codes):
+        yield _line("GDP Over Time", self._series_rows("gdp", codes), "GDP (in billion $)")
+        rows, year = self._latest_rows("gdp_yoy_pct", codes)
+        yield _bar(f"GDP Growth, {year}", rows, "Growth (%)")
+        yield _bar(
+            "GDP CAGR, {}-{}".format(*self.metrics.cagr_window), self._snapshot_rows(self.metrics.cagr_pct, codes), "CAGR (%)",
+        )
+
+    def _sectoral_contributions(self, codes):
+        rows = []
+        for sector in ("Agriculture", "Industry", "Services"):
+            column = f"{sector.lower()}_pct"
+            sector_rows, year = self._latest_rows(column, codes, series=sector)
+            rows.extend(sector_rows)
+        yield _bar(f"Sector Share of GDP, {year}", rows, "Share (%)", color="Series", stacked=True)
+        yield _line("Technology Sector Share Over Time", self._series_rows("technology_pct", codes), "Share (%)")
+
+    def _city_wise_patents(self, codes):
+        rows, year = self._latest_rows("patents_per_100k", codes)
+        yield _bar(f"Patents per 100,000 Inhabitants, {year}", rows, "Patents per 100k")
+        yield _line("Patents Over Time", self._series_rows("patents_per_100k", codes), "Patents per 100k")
+
+    def _city_wise_expenditure(self, codes):
+        rows, year = self._latest_rows("rnd_pct_gdp", codes)
+        yield _bar(f"R&D Expenditure, {year}", rows, "R&D (% of GDP)")
+        yield _line("R&D Expenditure Over Time", self._series_rows("rnd_pct_gdp", codes), "R&D (% of GDP)")
+
+    def _city_wise_employment_rates(self, codes):
+        rows = []
+        for column, label in (("ict_employment_pct", "ICT"), ("sme_employment_pct", "SME"),
+                              ("tourism_employment_pct", "Tourism")):
+            sector_rows, year = self._latest_rows(column, codes, series=label)
+            rows.extend(sector_rows)
+        yield _bar(f"Sector Employment, {year}", rows, "Employment (%)", color="Series")
+        rows = []
+        for column, label in (("unemployment_pct", "Unemployment"), ("youth_unemployment_pct", "Youth Unemployment")):
+            rate_rows, year = self._latest_rows(column, codes, series=label)
+            rows.extend(rate_rows)
+        yield _bar(f"Unemployment Rates, {year}", rows, "Rate (%)", color="Series")
+
+
+# --- Process-wide Instance ---
+_renderers = VersionedCache(lambda dataset: DashboardRenderer(get_metrics(dataset)))
+
+
+def get_dashboard(dataset=None):
+    """Return the renderer for a dataset snapshot, prebuilding every view once."""
+    return _renderers.get(dataset)
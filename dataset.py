@@ -0,0 +1,466 @@
+"""Columnar loader for the bundled India metro-cities GDP workbook.
+
+The workbook is parsed with openpyxl only when it changes. Every column is
+then written to a sidecar cache as a plain ``.npy`` file, so a warm start is a
+handful of memory-mapped ``np.load`` calls instead of a spreadsheet parse.
+
+A background watcher re-ingests the workbook when it is replaced and swaps
+in a new immutable ``Dataset``. Callers take one snapshot per rerun with
+``get_dataset()`` and key their caches on ``dataset.version``.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_PATH = os.path.join(BASE_DIR, "India_Metro_cities_GDP_dataset (1).xlsx")
+CACHE_DIR = os.path.join(BASE_DIR, ".cache", "dataset")
+CACHE_FORMAT = 1
+WATCH_INTERVAL = float(os.getenv("DATASET_WATCH_INTERVAL", "2"))
+
+logger = logging.getLogger(__name__)
+
+# --- Sheet Layouts ---
+# Each table maps a workbook header to (column name, dtype). Headers are
+# matched after stripping whitespace; the typos are the workbook's own.
+SHEETS = {
+    "metro": ("Sheet1", {
+        "City": ("city", "U"),
+        "Year": ("year", "int32"),
+        "GDP (in billion $)": ("gdp", "float64"),
+        "GDP per capita (in $)": ("gdp_per_capita", "float64"),
+        "Agricultre Sector (%)": ("agriculture_pct", "float64"),
+        "Industry Sector (%)": ("industry_pct", "float64"),
+        "Services Sector (%)": ("services_pct", "float64"),
+        "Technology Sector (%)": ("technology_pct", "float64"),
+        "Tourism Sector Employment (%)": ("tourism_employment_pct", "float64"),
+        "ICT Sector Employment (%)": ("ict_employment_pct", "float64"),
+        "Unemployment Rate (%)": ("unemployment_pct", "float64"),
+        "Youth Unemployment Rate (%)": ("youth_unemployment_pct", "float64"),
+        "SME Employment (%)": ("sme_employment_pct", "float64"),
+        "R&D Expenditure (% of GDP)": ("rnd_pct_gdp", "float64"),
+        "Patents per 100,000 Inhabitants": ("patents_per_100k", "float64"),
+    }),
+    "history": ("Sheet2", {
+        "Year": ("year", "int32"),
+        "City Name": ("city", "U"),
+        "GDP (in Billion $)": ("gdp", "float64"),
+        "GDP per Capita (in $)": ("gdp_per_capita", "float64"),
+        "Agriculture Sector (%)": ("agriculture_pct", "float64"),
+        "Industry Sector (%)": ("industry_pct", "float64"),
+        "Services Sector (%)": ("services_pct", "float64"),
+    }),
+    "profile": ("Sheet3", {
+        "City Name": ("city", "U"),
+        "Literacy Rate": ("literacy_rate", "float64"),
+        "Avg. Land price (INR per sq.ft)": ("land_price_inr_sqft", "float64"),
+        "Number of Unicorns": ("unicorns", "int32"),
+        "Startup funding in 2024 (in million USD)": ("startup_funding_musd", "float64"),
+    }),
+}
+
+# Sheet2 spells Bengaluru the old way; everything is keyed on Sheet1's names.
+CITY_ALIASES = {"Bangalore": "Bengaluru"}
+
+
+def canonical_city(name):
+    name = str(name).strip()
+    return CITY_ALIASES.get(name, name)
+
+
+# --- Dataset ---
+class Dataset:
+    """Immutable set of column-oriented tables parsed from the workbook.
+
+    ``version`` is derived from the workbook content, so every replica that
+    loads the same file agrees on it and shared caches can be keyed on it.
+    """
+
+    def __init__(self, tables, sha256, source_stat=None, changed=()):
+        for columns in tables.values():
+            for values in columns.values():
+                values.setflags(write=False)
+        self.tables = tables
+        self.sha256 = sha256
+        self.version = sha256[:12]
+        self.source_stat = source_stat
+        self.changed = tuple(changed)
+        self.cities = tuple(np.unique(tables["metro"]["city"]).tolist())
+        years = np.concatenate([tables["history"]["year"], tables["metro"]["year"]])
+        self.years = (int(years.min()), int(years.max()))
+
+    def table(self, name):
+        return self.tables[name]
+
+
+# --- Workbook Parsing ---
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _sheet_columns(rows, layout, sheet_name):
+    header = [str(h).strip() if h is not None else None for h in next(rows)]
+    positions = {}
+    for header_text, (column, dtype) in layout.items():
+        if header_text not in header:
+            raise ValueError(f"{sheet_name}: missing column {header_text!r}")
+        positions[column] = (header.index(header_text), dtype)
+
+    values = {column: [] for column in positions}
+    for row in rows:
+        # Trailing formatted-but-empty rows come back as all None
+        if row is None or all(v is None for v in row):
+            continue
+        for column, (index, _) in positions.items():
+            values[column].append(row[index] if index < len(row) else None)
+
+    columns = {}
+    for column, (_, dtype) in positions.items():
+        raw = values[column]
+        if dtype == "U":
+            columns[column] = np.array([canonical_city(v) for v in raw], dtype=str)
+        elif dtype.startswith("int"):
+            columns[column] = np.array([0 if v is None else int(v) for v in raw], dtype=dtype)
+        else:
+            columns[column] = np.array([np.nan if v is None else float(v) for v in raw], dtype=dtype)
+    return columns
+
+
+def _sort_by_city_year(columns):
+    if "year" not in columns:
+        order = np.argsort(columns["city"], kind="stable")
+    else:
+        order = np.lexsort((columns["year"], columns["city"]))
+    return {name: np.ascontiguousarray(col[order]) for name, col in columns.items()}
+
+
+def parse_workbook(path):
+    """Parse every sheet of the workbook into {table: {column: ndarray}}."""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        tables = {}
+        for table, (sheet_name, layout) in SHEETS.items():
+            rows = workbook[sheet_name].iter_rows(values_only=True)
+            tables[table] = _sort_by_city_year(_sheet_columns(rows, layout, sheet_name))
+        return tables
+    finally:
+        workbook.close()
+
+
+# --- Sidecar Cache ---
+def _manifest_path(cache_dir):
+    return os.path.join(cache_dir, "manifest.json")
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(_manifest_path(cache_dir)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != CACHE_FORMAT:
+        return None
+    return manifest
+
+
+def _write_manifest(cache_dir, manifest):
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, _manifest_path(cache_dir))
+
+
+def _load_cached_tables(cache_dir, manifest):
+    data_dir = os.path.join(cache_dir, manifest["sha256"])
+    tables = {}
+    for table, columns in manifest["tables"].items():
+        tables[table] = {
+            column: np.load(os.path.join(data_dir, f"{table}.{column}.npy"), mmap_mode="r")
+            for column in columns
+        }
+    return tables
+
+
+def _store_tables(cache_dir, sha256, tables):
+    os.makedirs(cache_dir, exist_ok=True)
+    data_dir = os.path.join(cache_dir, sha256)
+    staging = tempfile.mkdtemp(dir=cache_dir)
+    for table, columns in tables.items():
+        for column, values in columns.items():
+            np.save(os.path.join(staging, f"{table}.{column}.npy"), values, allow_pickle=False)
+    if os.path.isdir(data_dir):
+        shutil.rmtree(staging)
+    else:
+        os.replace(staging, data_dir)
+    # Drop column sets left behind by previous workbook versions. Only
+    # sha256-named directories are touched, never another process's staging.
+    for entry in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, entry)
+        if entry != sha256 and len(entry) == 64 and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_dataset(path=DATASET_PATH, cache_dir=CACHE_DIR):
+    """Load the workbook, going through the sidecar cache when it is current.
+
+    The cache is keyed on the workbook's mtime and size first, so a warm
+    start does not even read the xlsx. If the mtime moved (e.g. the file was
+    copied) the content hash decides whether the columns can be reused.
+    """
+    stat = os.stat(path)
+    manifest = _read_manifest(cache_dir)
+    if manifest and manifest["mtime_ns"] == stat.st_mtime_ns and manifest["size"] == stat.st_size:
+        try:
+            return Dataset(_load_cached_tables(cache_dir, manifest), manifest["sha256"], _stat_key(stat))
+        except OSError:
+            pass
+
+    sha256 = file_sha256(path)
+    if manifest and manifest["sha256"] == sha256:
+        try:
+            tables = _load_cached_tables(cache_dir, manifest)
+        except OSError:
+            tables = None
+        if tables is not None:
+            manifest.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            _write_manifest(cache_dir, manifest)
+            return Dataset(tables, sha256, _stat_key(stat))
+
+    tables = parse_workbook(path)
+    try:
+        _store_tables(cache_dir, sha256, tables)
+        _write_manifest(cache_dir, {
+            "format": CACHE_FORMAT,
+            "sha256": sha256,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "tables": {table: list(columns) for table, columns in tables.items()},
+        })
+    except OSError:
+        # A read-only checkout still works, it just parses on every start
+        pass
+    return Dataset(tables, sha256, _stat_key(stat))
+
+
+def _stat_key(stat):
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# --- Process-wide Instance ---
+_dataset = None
+_dataset_lock = threading.Lock()
+_listeners = []
+
+
+def get_dataset():
+    """Return the current dataset snapshot, loading it once per process.
+
+    The returned object never changes. Take it once per rerun and pass it
+    down, so a reload mid-run cannot mix two versions on one page.
+    """
+    global _dataset
+    if _dataset is None:
+        with _dataset_lock:
+            if _dataset is None:
+                _dataset = load_dataset()
+    return _dataset
+
+
+def on_reload(callback):
+    """Call ``callback(old, new)`` after every dataset swap."""
+    _listeners.append(callback)
+
+
+def diff_tables(old, new):
+    """Names of the tables whose columns differ between two datasets."""
+    changed = []
+    for name, columns in new.tables.items():
+        previous = old.tables.get(name) if old is not None else None
+        if previous is None or previous.keys() != columns.keys() or not all(
+            previous[c].shape == columns[c].shape and np.array_equal(previous[c], columns[c], equal_nan=columns[c].dtype.kind == "f")
+            for c in columns
+        ):
+            changed.append(name)
+    return changed
+
+
+def reload_dataset(path=DATASET_PATH, cache_dir=CACHE_DIR):
+    """Re-ingest the workbook and atomically swap it in if its data changed.
+
+    Tables whose columns are unchanged keep the arrays of the loaded
+    snapshot, so caches built on them stay warm. Returns the new dataset, or
+    None when nothing changed.
+    """
+    global _dataset
+    current = get_dataset()
+    loaded = load_dataset(path, cache_dir)
+    changed = diff_tables(current, loaded)
+    if not changed:
+        return None
+
+    tables = {
+        name: loaded.tables[name] if name in changed else current.tables[name]
+        for name in loaded.tables
+    }
+    fresh = Dataset(tables, loaded.sha256, loaded.source_stat, changed)
+    with _dataset_lock:
+        old, _dataset = _dataset, fresh
+    logger.info("Dataset reloaded: version %s -> %s, changed %s", old.version, fresh.version, ", ".join(changed))
+    for callback in list(_listeners):
+        try:
+            callback(old, fresh)
+        except Exception:
+            logger.exception("Dataset reload listener failed")
+    return fresh
+
+
+# --- Workbook Watcher ---
+class DatasetWatcher(threading.Thread):
+    """Polls the workbook and reloads it once a new copy has settled.
+
+    A change is only picked up when two polls in a row see the same mtime
+    and size, so a file that is still being copied in is never parsed.
+    """
+
+    def __init__(self, path=DATASET_PATH, interval=WATCH_INTERVAL):
+        super().__init__(name="dataset-watcher", daemon=True)
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+        # (mtime_ns, size) of the copy last ingested, whether or not its data
+        # changed; the snapshots themselves are never modified
+        self.ingested = None
+
+    def run(self):
+        pending = None
+        self.ingested = get_dataset().source_stat
+        while not self._stop_event.wait(self.interval):
+            try:
+                seen = _stat_key(os.stat(self.path))
+            except OSError:
+                pending = None
+                continue
+            if seen == self.ingested:
+                pending = None
+            elif seen != pending:
+                pending = seen
+            else:
+                pending = None
+                try:
+                    reload_dataset(self.path)
+                except Exception:
+                    # Keep serving the loaded snapshot; the next change retries
+                    logger.exception("Dataset reload failed")
+                else:
+                    self.ingested = seen
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_watcher = None
+
+
+def start_watcher(interval=WATCH_INTERVAL):
+    """Start the workbook watcher once per process; safe to call every rerun."""
+    global _watcher
+    if _watcher is None:
+        with _dataset_lock:
+            if _watcher is None and interval > 0:
+                _watcher = DatasetWatcher(interval=interval)
+                _watcher.start()
+    return _watcher
+
+
+# --- Version-keyed Caches ---
+class VersionedCache:
+    """One derived object per dataset version, keeping only the newest few.
+
+    Sessions still rendering against the previous snapshot keep hitting its
+    entry instead of rebuilding it while the new version warms up.
+    """
+
+    def __init__(self, factory, keep=2):
+        self.factory = factory
+        self.keep = keep
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dataset=None):
+        dataset = dataset or get_dataset()
+        item = self._items.get(dataset.version)
+        if item is None:
+            with self._lock:
+                item = self._items.get(dataset.version)
+                if item is None:
+                    item = self.factory(dataset)
+                    self._items[dataset.version] = item
+                    while len(self._items) > self.keep:
+                        self._items.popitem(last=False)
+        return item
+
+
+# --- LRU Memos ---
+_MISSING = object()
+
+
+class LRUCache:
+    """A bounded, thread-safe memo that evicts the least recently used key."""
+
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, fresh=None):
+        """The value for ``key``, or None on a miss; ``fresh(value)`` False is a miss too."""
+        with self._lock:
+            value = self._items.get(key, _MISSING)
+            if value is _MISSING or (fresh is not None and not fresh(value)):
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, replace=None):
+        """Store ``value`` and return what is stored under ``key``.
+
+        With ``replace``, an existing entry is only overwritten when
+        ``replace(existing)`` is true, checked under the same lock.
+        """
+        with self._lock:
+            existing = self._items.get(key, _MISSING)
+            if existing is not _MISSING and replace is not None and not replace(existing):
+                return existing
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+            return value
+
+    def pop(self, key):
+        with self._lock:
+            return self._items.pop(key, None)
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._items)}
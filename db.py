@@ -0,0 +1,326 @@
+"""Process-wide SQLite connection pool for the users and feedback tables.
+
+Streamlit runs every session's script on its own thread, so connections are
+opened with ``check_same_thread=False`` and handed out one thread at a time.
+Connections stay open, which keeps sqlite3's per-connection prepared
+statement cache warm. The database runs in WAL mode so readers never block
+the writer, and writes that still hit a lock are retried with backoff.
+"""
+import atexit
+import logging
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DB_PATH = os.getenv("USER_DB_PATH", "user_data.db")
+POOL_SIZE = int(os.getenv("USER_DB_POOL_SIZE", "8"))
+BUSY_TIMEOUT_MS = 5000
+LOCK_RETRIES = 5
+RETRY_BACKOFF = 0.05
+STATEMENT_CACHE_SIZE = 256
+
+logger = logging.getLogger(__name__)
+
+
+def is_lock_error(error):
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, path=DB_PATH, size=POOL_SIZE, busy_timeout_ms=BUSY_TIMEOUT_MS,
+                 retries=LOCK_RETRIES, acquire_timeout=30):
+        self.path = path
+        self.size = size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.retries = retries
+        self.acquire_timeout = acquire_timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "acquires": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "lock_retries": 0,
+            "lock_failures": 0,
+            # Blocked on SQLite's write lock: BEGIN IMMEDIATE plus retry backoff
+            "lock_wait_seconds": 0.0,
+        }
+
+    # --- Connections ---
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable across application crashes in WAL mode and skips
+        # an fsync per commit; only a power loss can drop the last commits.
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+        if conn is None:
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                started = time.perf_counter()
+                try:
+                    conn = self._idle.get(timeout=self.acquire_timeout)
+                except queue.Empty:
+                    raise PoolTimeout(f"no SQLite connection free after {self.acquire_timeout}s")
+                waited = time.perf_counter() - started
+                with self._lock:
+                    self._counters["waits"] += 1
+                    self._counters["wait_seconds"] += waited
+                    self._counters["max_wait_seconds"] = max(self._counters["max_wait_seconds"], waited)
+        with self._lock:
+            self._counters["acquires"] += 1
+        return conn
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def warm(self, count=None):
+        """Open connections ahead of demand, up to ``count`` (default: all)."""
+        count = min(count or self.size, self.size)
+        while True:
+            with self._lock:
+                if self._created >= count:
+                    return
+                self._created += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    # --- Queries ---
+    def run(self, work, write=False):
+        """Call ``work(conn)`` and return its result, retrying lock errors.
+
+        Writes run inside ``BEGIN IMMEDIATE`` so the write lock is taken up
+        front instead of failing halfway through a read-then-write.
+        """
+        for attempt in range(self.retries + 1):
+            with self.connection() as conn:
+                try:
+                    if write:
+                        begun = time.perf_counter()
+                        try:
+                            conn.execute("BEGIN IMMEDIATE")
+                        finally:
+                            self._count("lock_wait_seconds", time.perf_counter() - begun)
+                        result = work(conn)
+                        conn.commit()
+                    else:
+                        result = work(conn)
+                    return result
+                except sqlite3.OperationalError as e:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    if not is_lock_error(e) or attempt == self.retries:
+                        if is_lock_error(e):
+                            self._count("lock_failures")
+                        raise
+                    self._count("lock_retries")
+                except BaseException:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    raise
+            backoff = RETRY_BACKOFF * (2 ** attempt) * (0.5 + random.random())
+            time.sleep(backoff)
+            self._count("lock_wait_seconds", backoff)
+
+    def fetchone(self, sql, params=()):
+        return self.run(lambda conn: conn.execute(sql, params).fetchone())
+
+    def fetchall(self, sql, params=()):
+        return self.run(lambda conn: conn.execute(sql, params).fetchall())
+
+    def execute(self, sql, params=()):
+        """Run one write statement and return the cursor's lastrowid."""
+        return self.run(lambda conn: conn.execute(sql, params).lastrowid, write=True)
+
+    def executemany(self, sql, rows):
+        return self.run(lambda conn: conn.executemany(sql, rows).rowcount, write=True)
+
+    # --- Stats ---
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["connections"] = self._created
+        stats["idle"] = self._idle.qsize()
+        return stats
+
+    def close(self):
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+                self._created -= 1
+
+
+# --- Process-wide Pools ---
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=DB_PATH):
+    """Return the shared pool for ``path``, creating it on first use."""
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(path)
+            if pool is None:
+                pool = _pools[path] = ConnectionPool(path)
+    return pool
+
+
+# --- Write-behind Batching ---
+_STOP = object()
+
+
+class BatchWriter:
+    """Queue rows in memory and write them with ``executemany`` off-thread.
+
+    ``put`` never touches the database, so callers do not wait on a lock
+    or an fsync. A background thread flushes when ``batch_size`` rows have
+    queued up or ``interval`` seconds have passed since the first of them,
+    whichever comes first. ``close`` drains the queue and is registered with
+    atexit, so a clean server shutdown loses nothing.
+    """
+
+    def __init__(self, sql, pool=None, batch_size=100, interval=1.0, name="batch-writer"):
+        self.sql = sql
+        self.pool = pool
+        self.batch_size = batch_size
+        self.interval = interval
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counters = {"queued": 0, "written": 0, "batches": 0, "failed_batches": 0}
+
+    def put(self, row):
+        self._ensure_started()
+        with self._lock:
+            self._counters["queued"] += 1
+        self._queue.put(row)
+
+    def flush(self, timeout=10):
+        """Block until every row queued before this call has been written."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=10):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats["pending"] = self._queue.qsize()
+        return stats
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                # The oldest queued row has waited ``interval`` seconds
+                self._write(batch)
+                batch, deadline = [], None
+                continue
+
+            if item is _STOP or isinstance(item, threading.Event):
+                self._write(batch)
+                batch, deadline = [], None
+                if item is _STOP:
+                    return
+                item.set()
+                continue
+
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.interval
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch, deadline = [], None
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            (self.pool or get_pool()).executemany(self.sql, batch)
+        except Exception:
+            logger.exception("%s: dropping a batch of %d rows", self.name, len(batch))
+            with self._lock:
+                self._counters["failed_batches"] += 1
+            return
+        with self._lock:
+            self._counters["written"] += len(batch)
+            self._counters["batches"] += 1
@@ -0,0 +1,386 @@
+"""Background exports of the Insights filters: PDF report, CSV and Parquet.
+
+Exports render in a process pool, so a report never holds up a script
+run; the tab submits a job and polls for it. Each output is written once
+to ``.cache/exports`` under a hash of (format, normalized filter, dataset
+version), so any session asking for the same export again gets the file
+straight away, and identical requests made while one is still rendering
+share that one job. The oldest files are removed past ``MAX_FILES``,
+except those a live ``ExportJob`` (e.g. one a session still offers for
+download) points at. A worker that dies takes the pool down with it; the
+next export starts a fresh pool.
+
+The PDF report is laid out with fpdf2 and Parquet is written with pyarrow;
+each format is only offered when its library is installed.
+"""
+import csv
+import hashlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from dataset import BASE_DIR, SHEETS
+
+EXPORT_DIR = os.path.join(BASE_DIR, ".cache", "exports")
+WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+MAX_FILES = int(os.getenv("EXPORT_CACHE_FILES", "200"))
+
+PDF_AVAILABLE = importlib.util.find_spec("fpdf") is not None
+DATA_FORMATS = ["CSV"] + (["Parquet"] if importlib.util.find_spec("pyarrow") else [])
+EXTENSIONS = {"pdf": "pdf", "csv": "csv", "parquet": "parquet"}
+MIME_TYPES = {"pdf": "application/pdf", "csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+# Panel column -> export header, taken from the workbook's own headers
+HEADERS = {}
+for sheet in ("profile", "history", "metro"):
+    HEADERS.update((column, header) for header, (column, _) in SHEETS[sheet][1].items())
+HEADERS.update({"city": "City", "year": "Year", "gdp_yoy_pct": "GDP Growth (%)"})
+HEADERS["agriculture_pct"] = "Agriculture Sector (%)"  # misspelt in Sheet1
+
+
+# --- Payloads ---
+# Built on the script thread from the memoized query results, then pickled
+# to a worker; they hold plain arrays and strings only.
+def export_digest(fmt, key):
+    return hashlib.sha256(json.dumps([fmt, key]).encode("utf-8")).hexdigest()
+
+
+def describe(key):
+    version, cities, years, sectors = key
+    period = f"{years[0]}-{years[1]}" if years else "no years"
+    return f"{', '.join(cities) or 'No cities'}; {period}; sectors: {', '.join(sectors) or 'none'}"
+
+
+def build_payload(fmt, engine, key):
+    if fmt != "pdf":
+        return {"columns": engine.extract(key)}
+    result = engine.query(key[1], key[2] or (0, 0), key[3])
+    return {
+        "title": "India Metro Cities - Insights Report",
+        "filters": describe(key),
+        "version": key[0],
+        "takeaways": [(label, *engine.metrics.takeaways[name]) for label, name in (
+            ("Highest GDP Growth City", "growth"),
+            ("Most Innovative City", "innovation"),
+            ("Top Contributing Sector", "sector"),
+            ("Average GDP Growth ({}-{})".format(*engine.metrics.cagr_window), "average_growth"),
+        )],
+        "gdp": {name: np.asarray(values) for name, values in result.gdp.items()},
+        "sectors": {name: np.asarray(values) for name, values in result.sectors.items()},
+    }
+
+
+# --- Renderers (run in the worker processes) ---
+def render(fmt, payload, path):
+    """Write one export to ``path`` atomically; returns its size in bytes."""
+    data = RENDERERS[fmt](payload)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+def _header_columns(columns):
+    return [(HEADERS.get(name, name), values) for name, values in columns.items()]
+
+
+def render_csv(payload):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    columns = _header_columns(payload["columns"])
+    writer.writerow([header for header, _ in columns])
+    for row in zip(*(values.tolist() for _, values in columns)):
+        writer.writerow(["" if isinstance(v, float) and v != v else v for v in row])
+    return out.getvalue().encode("utf-8")
+
+
+def render_parquet(payload):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.table({header: values for header, values in _header_columns(payload["columns"])})
+    out = io.BytesIO()
+    pq.write_table(table, out, compression="zstd")
+    return out.getvalue()
+
+
+def _pivot(years, labels, values):
+    """(row labels, sorted years, label x year grid) from long-form columns."""
+    names = list(dict.fromkeys(labels.tolist()))
+    columns = sorted(set(years.tolist()))
+    grid = np.full((len(names), len(columns)), np.nan)
+    row = {name: i for i, name in enumerate(names)}
+    col = {year: i for i, year in enumerate(columns)}
+    for y, label, v in zip(years.tolist(), labels.tolist(), values.tolist()):
+        grid[row[label], col[y]] = v
+    return names, columns, grid
+
+
+def render_pdf(payload):
+    from fpdf import FPDF
+
+    pdf = FPDF(orientation="landscape", format="A4", unit="pt")
+    pdf.set_margins(MARGIN, MARGIN)
+    pdf.set_auto_page_break(True, MARGIN)
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 18)
+    pdf.set_text_color(*TEAL)
+    pdf.cell(text=_latin1(payload["title"]), new_x="LMARGIN", new_y="NEXT")
+    pdf.set_text_color(0)
+    pdf.ln(6)
+    _paragraph(pdf, f"Filters: {payload['filters']}")
+    _paragraph(pdf, f"Dataset version {payload['version']}, generated {time.strftime('%Y-%m-%d %H:%M UTC', time.gmtime())}")
+
+    _subheading(pdf, "Key Takeaways")
+    for label, value, delta in payload["takeaways"]:
+        _paragraph(pdf, f"{label}: {value} ({delta})")
+
+    gdp = payload["gdp"]
+    if len(gdp["Year"]):
+        cities, years, grid = _pivot(gdp["Year"], gdp["City"], gdp["GDP (in billion $)"])
+        _subheading(pdf, "GDP Trends Over Time (billion $)")
+        _line_chart(pdf, years, cities, grid)
+        _table(pdf, ["City"] + [str(y) for y in years], cities, grid, "{:,.1f}")
+    else:
+        _paragraph(pdf, "No data for the selected cities and years.")
+
+    sectors = payload["sectors"]
+    if len(sectors["Year"]):
+        series, years, grid = _pivot(sectors["Year"], sectors["Series"], sectors["Share (%)"])
+        _subheading(pdf, "Sector Share Over Time (%)")
+        _table(pdf, ["City - Sector"] + [str(y) for y in years], series, grid, "{:.1f}")
+    return bytes(pdf.output())
+
+
+RENDERERS = {"pdf": render_pdf, "csv": render_csv, "parquet": render_parquet}
+
+
+# --- PDF Layout (fpdf2) ---
+MARGIN = 40
+TEAL = (0, 161, 161)
+PALETTE = [TEAL, (214, 94, 0), (51, 102, 204), (153, 51, 153), (77, 153, 26),
+           (204, 26, 77), (128, 128, 128), (230, 179, 0), (26, 26, 26)]
+
+
+def _latin1(text):
+    # The core Helvetica font only covers Latin-1
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+def _subheading(pdf, text):
+    pdf.ln(8)
+    pdf.set_font("Helvetica", "B", 13)
+    pdf.cell(text=_latin1(text), new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(4)
+
+
+def _paragraph(pdf, text, size=10):
+    pdf.set_font("Helvetica", "", size)
+    pdf.multi_cell(0, size + 4, _latin1(text), new_x="LMARGIN", new_y="NEXT")
+
+
+def _table(pdf, header, labels, grid, fmt, size=8):
+    pdf.set_font("Helvetica", "", size)
+    label_width = 150
+    widths = [label_width] + [(pdf.epw - label_width) / max(len(header) - 1, 1)] * (len(header) - 1)
+    with pdf.table(col_widths=widths, line_height=size + 5, text_align="LEFT", borders_layout="HORIZONTAL_LINES",
+                   first_row_as_headings=True) as table:
+        table.row([_latin1(cell) for cell in header])
+        for label, values in zip(labels, grid):
+            table.row([_latin1(label)] + ["-" if np.isnan(v) else fmt.format(v) for v in values])
+    pdf.ln(6)
+
+
+def _line_chart(pdf, years, labels, grid, height=170):
+    if pdf.will_page_break(height + 20):
+        pdf.add_page()
+    left, top = MARGIN + 40, pdf.get_y() + 6
+    right, bottom = pdf.w - MARGIN - 120, pdf.get_y() + height
+    lo, hi = np.nanmin(grid), np.nanmax(grid)
+    hi = hi if hi > lo else lo + 1
+    x0, x1 = years[0], years[-1] if years[-1] > years[0] else years[0] + 1
+
+    def at(year, value):
+        # fpdf2 measures y down from the top of the page
+        return (left + (year - x0) / (x1 - x0) * (right - left),
+                bottom - (value - lo) / (hi - lo) * (bottom - top))
+
+    pdf.set_draw_color(0)
+    pdf.set_line_width(0.5)
+    pdf.polyline([(left, top), (left, bottom), (right, bottom)])
+    pdf.set_font("Helvetica", "", 7)
+    for value in (lo, (lo + hi) / 2, hi):
+        pdf.text(MARGIN, at(x0, value)[1] + 3, f"{value:,.0f}")
+    for year in years:
+        pdf.text(at(year, lo)[0] - 8, bottom + 10, str(year))
+    pdf.set_font("Helvetica", "", 8)
+    pdf.set_line_width(1.2)
+    for i, (label, values) in enumerate(zip(labels, grid)):
+        color = PALETTE[i % len(PALETTE)]
+        points = [at(y, v) for y, v in zip(years, values) if not np.isnan(v)]
+        pdf.set_draw_color(*color)
+        if len(points) > 1:
+            pdf.polyline(points)
+        pdf.set_text_color(*color)
+        pdf.text(right + 15, top + 10 + i * 11, _latin1(label))
+    pdf.set_text_color(0)
+    pdf.set_draw_color(0)
+    pdf.set_y(bottom + 22)
+
+
+# --- Job Queue ---
+class ExportJob:
+    def __init__(self, fmt, digest, path, future, label):
+        self.fmt = fmt
+        self.digest = digest
+        self.path = path
+        self.future = future
+        self.label = label
+
+    @property
+    def done(self):
+        return self.future.done()
+
+    @property
+    def error(self):
+        return self.future.exception() if self.future.done() else None
+
+    @property
+    def file_name(self):
+        return f"insights_{self.digest[:8]}.{EXTENSIONS[self.fmt]}"
+
+    @property
+    def mime(self):
+        return MIME_TYPES[self.fmt]
+
+    def open(self):
+        """The finished file, opened for reading."""
+        return open(self.path, "rb")
+
+
+def _done(result=None):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+class ExportQueue:
+    """Renders exports in worker processes, coalescing and caching by hash."""
+
+    def __init__(self, export_dir=EXPORT_DIR, workers=WORKERS, max_files=MAX_FILES):
+        self.export_dir = export_dir
+        self.workers = workers
+        self.max_files = max_files
+        self._executor = None
+        self._in_flight = {}
+        # Every job handed out; while one is alive its file is kept
+        self._jobs = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._counters = {"submitted": 0, "coalesced": 0, "cached": 0, "completed": 0, "failed": 0,
+                          "pool_restarts": 0}
+
+    def _pool(self):
+        if self._executor is None:
+            os.makedirs(self.export_dir, exist_ok=True)
+            # spawn: forking the server would copy its threads' locks mid-use
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _discard_pool(self, executor):
+        """Drop a broken pool so the next submit starts a new one."""
+        if executor is not None and self._executor is executor:
+            self._executor = None
+            self._counters["pool_restarts"] += 1
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit_render(self, fmt, payload, path):
+        """(executor, future) for one render, replacing a pool found broken."""
+        executor = self._pool()
+        try:
+            return executor, executor.submit(render, fmt, payload, path)
+        except BrokenProcessPool:
+            self._discard_pool(executor)
+            executor = self._pool()
+            return executor, executor.submit(render, fmt, payload, path)
+
+    def submit(self, fmt, engine, key):
+        """The job for this export, reusing a finished file or a running job."""
+        digest = export_digest(fmt, key)
+        path = os.path.join(self.export_dir, f"{digest}.{EXTENSIONS[fmt]}")
+        label = describe(key)
+        with self._lock:
+            job = self._existing(fmt, digest, path, label)
+        if job is not None:
+            return job
+        # Extracted outside the lock, so other exports are not held up by it
+        payload = build_payload(fmt, engine, key)
+        with self._lock:
+            # Someone may have started or finished the same export meanwhile
+            job = self._existing(fmt, digest, path, label)
+            if job is not None:
+                return job
+            executor, future = self._submit_render(fmt, payload, path)
+            job = self._in_flight[digest] = ExportJob(fmt, digest, path, future, label)
+            self._jobs.add(job)
+            self._counters["submitted"] += 1
+        future.add_done_callback(lambda f: self._finished(job, executor))
+        return job
+
+    def _existing(self, fmt, digest, path, label):
+        """A running or finished job for ``digest``, or None; call with the lock held."""
+        job = self._in_flight.get(digest)
+        if job is not None:
+            self._counters["coalesced"] += 1
+            return job
+        if os.path.exists(path):
+            os.utime(path)  # keeps it off the eviction end
+            self._counters["cached"] += 1
+            job = ExportJob(fmt, digest, path, _done(os.path.getsize(path)), label)
+            self._jobs.add(job)
+            return job
+        return None
+
+    def _finished(self, job, executor):
+        error = job.future.exception()
+        with self._lock:
+            self._in_flight.pop(job.digest, None)
+            self._counters["failed" if error else "completed"] += 1
+            if isinstance(error, BrokenProcessPool):
+                self._discard_pool(executor)
+        self._prune()
+
+    def _prune(self):
+        with self._lock:
+            pinned = {job.path for job in list(self._jobs)}
+            try:
+                files = [os.path.join(self.export_dir, name) for name in os.listdir(self.export_dir)
+                         if not name.endswith(".tmp")]
+                files.sort(key=os.path.getmtime, reverse=True)
+            except OSError:
+                return
+            for path in files[self.max_files:]:
+                if path in pinned:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # another process pruned the same file first
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["in_flight"] = len(self._in_flight)
+        return stats
+
+
+queue = ExportQueue()
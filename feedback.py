@@ -0,0 +1,105 @@
+"""Write-behind ingestion of Feedback tab submissions.
+
+``submit`` only appends to an in-process queue, so the user's click returns
+immediately and concurrent sessions never interleave writes. A background
+``BatchWriter`` inserts the queued rows into the ``feedback`` table with
+``executemany``.
+
+Operators read it back through an FTS5 index kept in sync by triggers,
+with keyset pagination and aggregates computed in SQL.
+"""
+import os
+import time
+
+from db import BatchWriter, get_pool
+
+BATCH_SIZE = int(os.getenv("FEEDBACK_BATCH_SIZE", "100"))
+FLUSH_INTERVAL = float(os.getenv("FEEDBACK_FLUSH_SECONDS", "1.0"))
+
+INSERT_SQL = "INSERT INTO feedback (username, feedback, rating, email, timestamp) VALUES (?, ?, ?, ?, ?)"
+
+writer = BatchWriter(INSERT_SQL, batch_size=BATCH_SIZE, interval=FLUSH_INTERVAL, name="feedback-writer")
+
+
+def submit(username, feedback, rating=None, email=None):
+    # Stamp the row now, in CURRENT_TIMESTAMP's format, not when it is flushed
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+    writer.put((username, feedback, rating, email or None, timestamp))
+
+
+# --- Operator Queries ---
+PAGE_SIZE = 50
+
+
+def match_expression(text):
+    """Turn free text into a safe FTS5 query: every word must appear.
+
+    Words are quoted so FTS5 operators typed by the user are taken
+    literally; the last word is a prefix match so results follow typing.
+    """
+    words = [w.replace('"', '""') for w in text.split()]
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search(text="", rating=None, before_id=None, limit=PAGE_SIZE, pool=None):
+    """One page of feedback, newest first, plus the cursor for the next page.
+
+    Pagination is keyset-based (``id < before_id``), so every page costs
+    the same no matter how deep the operator scrolls.
+    """
+    pool = pool or get_pool()
+    match = match_expression(text)
+    clauses, params = [], []
+    if match:
+        # Drive the query from the FTS index in rowid order so LIMIT stops early
+        source = "feedback_fts JOIN feedback AS f ON f.id = feedback_fts.rowid"
+        key = "feedback_fts.rowid"
+        clauses.append("feedback_fts MATCH ?")
+        params.append(match)
+    else:
+        source = "feedback AS f"
+        key = "f.id"
+    if before_id is not None:
+        clauses.append(f"{key} < ?")
+        params.append(before_id)
+    if rating is not None:
+        clauses.append("f.rating = ?")
+        params.append(rating)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = pool.fetchall(
+        f"""
+        SELECT f.id, f.timestamp, f.username, f.rating, f.email, f.feedback
+        FROM {source}
+        {where}
+        ORDER BY {key} DESC
+        LIMIT ?
+        """,
+        params + [limit + 1],
+    )
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def rating_histogram(pool=None):
+    """{rating: count}, counted in SQL over the rating index."""
+    pool = pool or get_pool()
+    return dict(pool.fetchall("SELECT rating, COUNT(*) FROM feedback GROUP BY rating ORDER BY rating"))
+
+
+def daily_counts(days=30, pool=None):
+    """[(day, count)] for the last ``days`` days, read off the timestamp index."""
+    pool = pool or get_pool()
+    return pool.fetchall(
+        """
+        SELECT date(timestamp) AS day, COUNT(*)
+        FROM feedback
+        WHERE timestamp >= datetime('now', ?)
+        GROUP BY day
+        ORDER BY day
+        """,
+        (f"-{int(days)} days",),
+    )
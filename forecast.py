@@ -0,0 +1,200 @@
+"""Trend projections for every city and metric, fitted in one batch.
+
+Each (metric, city) series is fitted with an ordinary least-squares line
+over the trailing run of consecutive years (2019-2024 in the bundled
+workbook; the 2007-2013 history sheet is on a different basis, so the
+trend is not drawn across the gap). GDP is fitted on a log scale so its
+trend compounds. All series are stacked into one (metric, city, year)
+array and solved with closed-form sums, so refitting after a dataset
+reload is a handful of array operations rather than a loop per series.
+
+Fits live as long as their dataset version. Projections come with a 95%
+prediction band and are served to the Insights GDP and sector charts as
+Vega-Lite specs, memoized per (query, last year) with LRU eviction.
+"""
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from dataset import LRUCache, VersionedCache
+from metrics import SECTOR_COLUMNS, get_metrics
+
+HORIZON = int(os.getenv("FORECAST_HORIZON_YEARS", "3"))
+MIN_POINTS = 3
+CACHE_SIZE = 128
+# Modelled as constant growth rather than a constant yearly increase
+LOG_COLUMNS = {"gdp"}
+# Derived from other columns, so not a series of its own
+SKIP_COLUMNS = {"gdp_yoy_pct"}
+
+# Two-sided 95% Student t quantiles by degrees of freedom (index 0 unused)
+_T95 = np.array([np.nan, 12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+                 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+                 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042])
+
+Fit = namedtuple("Fit", ["slope", "intercept", "x_mean", "sxx", "scale", "n"])
+
+
+# --- Batch Fitting ---
+def fit_lines(x, y):
+    """Least-squares lines through every series of ``y`` at once.
+
+    ``y`` has shape (..., len(x)) with NaN for missing points. Each field of
+    the returned ``Fit`` has the leading shape of ``y``; series with fewer
+    than ``MIN_POINTS`` points get NaN parameters.
+    """
+    observed = ~np.isnan(y)
+    n = observed.sum(axis=-1)
+    y0 = np.where(observed, y, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = np.where(observed, x, 0.0).sum(axis=-1) / n
+        y_mean = y0.sum(axis=-1) / n
+        dx = np.where(observed, x - x_mean[..., None], 0.0)
+        sxx = (dx * dx).sum(axis=-1)
+        slope = (dx * (y0 - y_mean[..., None])).sum(axis=-1) / sxx
+        intercept = y_mean - slope * x_mean
+        residual = np.where(observed, y0 - intercept[..., None] - slope[..., None] * x, 0.0)
+        scale = np.sqrt((residual * residual).sum(axis=-1) / (n - 2))
+    fitted = n >= MIN_POINTS
+    return Fit(*(np.where(fitted, v, np.nan) for v in (slope, intercept, x_mean, sxx, scale)), n)
+
+
+def predict(fit, x, log=False):
+    """Trend value and 95% prediction band at ``x`` for every series."""
+    x = np.asarray(x, dtype=float)
+    slope, intercept, x_mean, sxx, scale = (v[..., None] for v in fit[:5])
+    n = fit.n[..., None]
+    t = np.where(n - 2 < len(_T95), _T95[np.clip(n - 2, 0, len(_T95) - 1)], 1.96)
+    value = intercept + slope * x
+    with np.errstate(invalid="ignore", divide="ignore"):
+        half = t * scale * np.sqrt(1 + 1 / n + (x - x_mean) ** 2 / sxx)
+    lower, upper = value - half, value + half
+    if log:
+        return np.exp(value), np.exp(lower), np.exp(upper)
+    return value, lower, upper
+
+
+# --- Forecaster ---
+class Forecaster:
+    """Fitted trends for one ``Metrics`` snapshot, plus memoized chart specs."""
+
+    def __init__(self, metrics, horizon=HORIZON, cache_size=CACHE_SIZE):
+        self.metrics = metrics
+        self.horizon = horizon
+        self._cache = LRUCache(cache_size)
+        self.last_year = int(metrics.years[-1])
+        self.until = self.last_year + horizon
+        started = time.perf_counter()
+        self._fit()
+        self.fit_seconds = time.perf_counter() - started
+
+    def _fit(self):
+        years = self.metrics.years
+        # The trailing block of consecutive years
+        breaks = np.flatnonzero(np.diff(years) != 1)
+        start = int(breaks[-1]) + 1 if len(breaks) else 0
+        self.window = (int(years[start]), self.last_year)
+
+        self.columns = [c for c in self.metrics.grid if c not in SKIP_COLUMNS]
+        self.row = {c: i for i, c in enumerate(self.columns)}
+        y = np.stack([self.metrics.grid[c][:, start:] for c in self.columns])
+        self.log = np.array([c in LOG_COLUMNS for c in self.columns])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            y = np.where(self.log[:, None, None], np.log(np.where(y > 0, y, np.nan)), y)
+        self.fit = fit_lines(years[start:].astype(float), y)
+
+    def project(self, column, codes, years):
+        """(value, lower, upper), each shaped (len(codes), len(years))."""
+        i = self.row[column]
+        fit = Fit(*(v[i, codes] for v in self.fit))
+        return predict(fit, years, log=bool(self.log[i]))
+
+    # --- Charts ---
+    def charts(self, result, until):
+        """Vega-Lite specs for an Insights query extended to ``until``.
+
+        Returns ``(gdp_spec, sector_spec)``; ``sector_spec`` is None when no
+        sector is selected. Actuals are drawn solid, the trend dashed from
+        the last actual year with its band shaded.
+        """
+        until = min(int(until), self.until)
+        key = (result.key, until)
+        specs = self._cache.get(key)
+        if specs is not None:
+            return specs
+
+        _, cities, _, sectors = result.key
+        codes = np.array([self.metrics.city_code[c] for c in cities], dtype=int)
+        years = np.arange(self.last_year, until + 1)
+        gdp = _layered(
+            _records(result.gdp, "Year", "City", "GDP (in billion $)"),
+            self._projection_rows("gdp", codes, years, lambda city: city),
+            "City", "GDP (in billion $)",
+        )
+        sector_spec = None
+        if sectors:
+            projected = []
+            for sector in sectors:
+                projected += self._projection_rows(
+                    SECTOR_COLUMNS[sector], codes, years, lambda city, s=sector: f"{city} - {s}")
+            sector_spec = _layered(
+                _records(result.sectors, "Year", "Series", "Share (%)"), projected, "Series", "Share (%)")
+
+        return self._cache.put(key, (gdp, sector_spec))
+
+    def _projection_rows(self, column, codes, years, series):
+        value, lower, upper = self.project(column, codes, years)
+        # The dashed line starts at the last actual point, with no band there
+        actual = self.metrics.grid[column][codes, -1]
+        value[:, 0] = lower[:, 0] = upper[:, 0] = actual
+        rows = []
+        for k, code in enumerate(codes):
+            name = series(self.metrics.cities[code])
+            rows.extend(
+                {"Year": int(year), "Series": name, "Value": round(float(v), 3),
+                 "Lower": round(float(lo), 3), "Upper": round(float(hi), 3)}
+                for year, v, lo, hi in zip(years, value[k], lower[k], upper[k]) if not np.isnan(v)
+            )
+        return rows
+
+    def stats(self):
+        fitted = int(np.count_nonzero(~np.isnan(self.fit.slope)))
+        return dict(self._cache.stats(), series=int(self.fit.slope.size), fitted=fitted,
+                    fit_ms=round(self.fit_seconds * 1000, 3))
+
+
+def _records(columns, x, series, y):
+    return [
+        {"Year": int(a), "Series": str(b), "Value": round(float(c), 3)}
+        for a, b, c in zip(columns[x], columns[series], columns[y])
+    ]
+
+
+def _layered(actual, projected, series_title, y_title):
+    x = {"field": "Year", "type": "quantitative", "axis": {"format": "d"}}
+    y = {"field": "Value", "type": "quantitative", "title": y_title}
+    color = {"field": "Series", "type": "nominal", "title": series_title}
+    return {
+        "layer": [
+            {"data": {"values": projected}, "mark": {"type": "area", "opacity": 0.15},
+             "encoding": {"x": x, "y": {"field": "Lower", "type": "quantitative", "title": y_title},
+                          "y2": {"field": "Upper"}, "color": color}},
+            {"data": {"values": actual}, "mark": {"type": "line", "point": True},
+             "encoding": {"x": x, "y": y, "color": color}},
+            {"data": {"values": projected}, "mark": {"type": "line", "strokeDash": [6, 4]},
+             "encoding": {"x": x, "y": y, "color": color,
+                          "tooltip": [{"field": "Series"}, {"field": "Year"}, {"field": "Value", "title": "Trend"},
+                                      {"field": "Lower"}, {"field": "Upper"}]}},
+        ],
+    }
+
+
+# --- Process-wide Instance ---
+_forecasters = VersionedCache(lambda dataset: Forecaster(get_metrics(dataset)))
+
+
+def get_forecaster(dataset=None):
+    """Return the fitted trends for a dataset snapshot, fitting them once."""
+    return _forecasters.get(dataset)
@@ -0,0 +1,274 @@
+"""Answers for chatbot questions that are really lookups in the dataset.
+
+``route`` recognizes four question shapes about a known metric (ranking,
+comparison, trend and single value), answers them from the city x year
+grids in ``Metrics`` and returns None for everything else, which then goes
+to the remote model. Open-ended questions ("why", "should", forecasts) are
+left to the model even when they name a metric.
+"""
+import re
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from dataset import CITY_ALIASES, VersionedCache
+from metrics import get_metrics
+
+Answer = namedtuple("Answer", ["intent", "text"])
+# ``snapshot_year`` is the one year a per-city (not per-year) figure is for, if any
+Metric = namedtuple("Metric", ["column", "label", "unit", "per_year", "snapshot_year"], defaults=(None,))
+
+# --- Vocabulary ---
+# Checked in order, so the more specific phrase must come first
+METRICS = [
+    (r"youth unemployment", Metric("youth_unemployment_pct", "youth unemployment rate", "%", True)),
+    (r"unemployment|jobless", Metric("unemployment_pct", "unemployment rate", "%", True)),
+    (r"per capita", Metric("gdp_per_capita", "GDP per capita", "$", True)),
+    (r"cagr|compound", Metric("cagr_pct", "GDP CAGR ({}-{})", "%", False)),
+    (r"growth|grow|grew|growing", Metric("gdp_yoy_pct", "GDP growth", "%", True)),
+    (r"patent", Metric("patents_per_100k", "patents per 100,000 inhabitants", "", True)),
+    (r"r ?& ?d|research", Metric("rnd_pct_gdp", "R&D expenditure", "% of GDP", True)),
+    (r"\bict\b", Metric("ict_employment_pct", "ICT sector employment", "%", True)),
+    (r"\bsme", Metric("sme_employment_pct", "SME employment", "%", True)),
+    (r"touris", Metric("tourism_employment_pct", "tourism sector employment", "%", True)),
+    (r"\btech", Metric("technology_pct", "technology sector share", "%", True)),
+    (r"agricultur|farming", Metric("agriculture_pct", "agriculture sector share", "%", True)),
+    (r"industr|manufactur", Metric("industry_pct", "industry sector share", "%", True)),
+    (r"services", Metric("services_pct", "services sector share", "%", True)),
+    (r"literacy|literate", Metric("literacy_rate", "literacy rate", "fraction", False)),
+    (r"land price|land cost|property price", Metric("land_price_inr_sqft", "average land price", "INR per sq.ft", False)),
+    (r"unicorn", Metric("unicorns", "number of unicorns", "", False)),
+    (r"funding|startup", Metric("startup_funding_musd", "startup funding in 2024", "million USD", False, 2024)),
+    (r"\bgdp\b|economy|economic output", Metric("gdp", "GDP", "billion $", True)),
+]
+METRICS = [(re.compile(pattern), metric) for pattern, metric in METRICS]
+
+OPEN_ENDED = re.compile(r"\b(why|should|explain|recommend|predict|forecast|future|impact|cause|reason|opinion|will)\b")
+TREND = re.compile(r"\b(trend|over time|over the years|changed?|evolv\w*|history|historical|from \d{4} to|between \d{4} and)\b")
+COMPARE = re.compile(r"\b(compare|comparison|versus|vs|difference)\b")
+RANK_DOWN = re.compile(r"\b(lowest|least|smallest|fewest|slowest|worst|bottom|poorest)\b")
+RANK = re.compile(r"\b(highest|most|largest|biggest|fastest|best|top|leading|rank\w*|lowest|least|smallest|"
+                  r"fewest|slowest|worst|bottom|poorest|which city|which cities|richest|leader|leads)\b")
+TOP_N = re.compile(r"\b(?:top|bottom) (\d+)\b|\b(\d+) (?:cities|metros)\b")
+YEAR = re.compile(r"\b(?:19|20)\d{2}\b")
+
+
+def _city_names(cities):
+    names = {c.lower(): c for c in cities}
+    names.update({alias.lower(): name for alias, name in CITY_ALIASES.items() if name in cities})
+    return names
+
+
+def _format(value, metric):
+    if metric.unit == "$":
+        return f"${value:,.0f}"
+    if metric.unit == "%":
+        return f"{value:.1f}%"
+    if metric.unit == "fraction":
+        # Sheet3 stores literacy as 0-1
+        return f"{value * 100:.1f}%"
+    if metric.column == "unicorns":
+        return f"{value:.0f}"
+    if metric.column == "patents_per_100k":
+        return f"{value:.2f}"
+    return f"{value:,.1f} {metric.unit}".rstrip()
+
+
+class Router:
+    """Parses questions against one Metrics snapshot and answers the lookups."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        # The CAGR window comes from the data, so its label is filled in per snapshot
+        self._metrics = [(pattern, m._replace(label=m.label.format(*metrics.cagr_window))) for pattern, m in METRICS]
+        self._names = _city_names(metrics.cities)
+        self._city_pattern = re.compile(r"\b(" + "|".join(sorted(map(re.escape, self._names), key=len, reverse=True)) + r")\b")
+        self.coverage = f"{metrics.years[0]}-{metrics.years[-1]}"
+
+    # --- Parsing ---
+    def parse(self, question):
+        """Return (intent, metric, cities, years, text) or None if not a lookup."""
+        text = " ".join(question.lower().replace("’", "'").split())
+        if OPEN_ENDED.search(text):
+            return None
+        metric = next((m for pattern, m in self._metrics if pattern.search(text)), None)
+        if metric is None:
+            return None
+        cities = list(dict.fromkeys(self._names[m] for m in self._city_pattern.findall(text)))
+        years = sorted({int(y) for y in YEAR.findall(text)})
+
+        if len(cities) >= 2 or (cities and COMPARE.search(text)):
+            intent = "comparison"
+        elif TREND.search(text) and metric.per_year and len(cities) <= 1 and len(years) != 1:
+            intent = "trend"
+        elif not cities and (RANK.search(text) or COMPARE.search(text)):
+            intent = "ranking"
+            top = TOP_N.search(text)
+            if top and int(top.group(1) or top.group(2)) < 1:
+                # "top 0 cities" is not a lookup we can answer sensibly
+                return None
+        elif len(cities) == 1:
+            intent = "value"
+        else:
+            return None
+        return intent, metric, cities, years, text
+
+    # --- Lookups ---
+    def _series(self, metric):
+        """city x year grid, or a one-column grid for per-city figures."""
+        m = self.metrics
+        if metric.per_year:
+            return m.grid[metric.column], m.years
+        values = m.cagr_pct if metric.column == "cagr_pct" else m.profile[metric.column]
+        return values[:, None], None
+
+    def _year_column(self, metric, grid, years, requested):
+        """Index of the requested year, or of the latest year with data."""
+        if years is None:
+            # A per-city snapshot only answers for no year or its own year
+            if requested and requested[-1] != metric.snapshot_year:
+                return None, requested[-1]
+            return 0, None
+        if requested:
+            year = requested[-1]
+            i = int(np.searchsorted(years, year))
+            if i == len(years) or years[i] != year or np.isnan(grid[:, i]).all():
+                return None, year
+            return i, year
+        has_data = np.flatnonzero(~np.isnan(grid).all(axis=0))
+        return int(has_data[-1]), int(years[has_data[-1]])
+
+    def _no_data(self, metric, year):
+        if not metric.per_year:
+            return (f"The dataset only has the {metric.label} as a single snapshot per city, "
+                    f"not year by year, so there is no figure for {year}.")
+        return f"The dataset has no {metric.label} figures for {year}; it covers {self.coverage} (with a 2014-2018 gap)."
+
+    def answer(self, question):
+        parsed = self.parse(question)
+        if parsed is None:
+            return None
+        intent, metric, cities, years, text = parsed
+        grid, grid_years = self._series(metric)
+        handler = getattr(self, f"_{intent}")
+        return Answer(intent, handler(metric, grid, grid_years, cities, years, text))
+
+    def _ranking(self, metric, grid, grid_years, cities, years, text):
+        i, year = self._year_column(metric, grid, grid_years, years)
+        if i is None:
+            return self._no_data(metric, year)
+        column = grid[:, i]
+        ascending = bool(RANK_DOWN.search(text))
+        known = np.flatnonzero(~np.isnan(column))
+        order = known[np.argsort(column[known] if ascending else -column[known], kind="stable")]
+        match = TOP_N.search(text)
+        n = int(match.group(1) or match.group(2)) if match else 1
+        when = f" in {year}" if year else ""
+        names = [f"{self.metrics.cities[c]} ({_format(column[c], metric)})" for c in order[:n]]
+        if n > 1:
+            return f"{'Bottom' if ascending else 'Top'} {len(names)} cities by {metric.label}{when}: {', '.join(names)}."
+        first = order[0]
+        rest = ", ".join(f"{self.metrics.cities[c]} ({_format(column[c], metric)})" for c in order[1:3])
+        return (
+            f"{self.metrics.cities[first]} had the {'lowest' if ascending else 'highest'} {metric.label}{when} "
+            f"at {_format(column[first], metric)}" + (f", followed by {rest}." if rest else ".")
+        )
+
+    def _value(self, metric, grid, grid_years, cities, years, text):
+        i, year = self._year_column(metric, grid, grid_years, years)
+        if i is None:
+            return self._no_data(metric, year)
+        c = self.metrics.city_code[cities[0]]
+        value = grid[c, i]
+        when = f" in {year}" if year else ""
+        if np.isnan(value):
+            return f"The dataset has no {metric.label} figure for {cities[0]}{when}."
+        rank = int((grid[:, i] > value).sum()) + 1
+        return (
+            f"{cities[0]}'s {metric.label} was {_format(value, metric)}{when}, "
+            f"ranked #{rank} of {int((~np.isnan(grid[:, i])).sum())} cities (highest first)."
+        )
+
+    def _comparison(self, metric, grid, grid_years, cities, years, text):
+        i, year = self._year_column(metric, grid, grid_years, years)
+        if i is None:
+            return self._no_data(metric, year)
+        codes = np.array([self.metrics.city_code[c] for c in cities])
+        values = grid[codes, i]
+        when = f"In {year}, " if year else ""
+        listed = ", ".join(
+            f"{city} {_format(v, metric) if not np.isnan(v) else 'n/a'}" for city, v in zip(cities, values)
+        )
+        if np.isnan(values).all():
+            return f"{when}no {metric.label} figures for {', '.join(cities)}."
+        leaders = [city for city, v in zip(cities, values) if _format(v, metric) == _format(np.nanmax(values), metric)]
+        if len(leaders) > 1:
+            line = f"{when}{metric.label}: {listed}. {' and '.join(leaders)} are level"
+        else:
+            line = f"{when}{metric.label}: {listed}. {leaders[0]} is highest"
+            if len(cities) == 2 and not np.isnan(values).any():
+                gap = abs(values[0] - values[1])
+                if metric.unit == "fraction":
+                    gap *= 100
+                line += f", ahead by {gap:.1f} pts" if metric.unit in ("%", "fraction") else f", ahead by {_format(gap, metric)}"
+        return line[0].upper() + line[1:] + "."
+
+    def _trend(self, metric, grid, grid_years, cities, years, text):
+        if cities:
+            series = grid[self.metrics.city_code[cities[0]]]
+            subject = f"{cities[0]}'s {metric.label}"
+        else:
+            counts = (~np.isnan(grid)).sum(axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                series = np.where(counts > 0, np.nansum(grid, axis=0) / counts, np.nan)
+            subject = f"Average {metric.label} across the {len(self.metrics.cities)} cities"
+        in_range = ~np.isnan(series)
+        if years:
+            in_range &= (grid_years >= years[0]) & (grid_years <= years[-1])
+        points = np.flatnonzero(in_range)
+        if len(points) < 2:
+            return f"Not enough {metric.label} data for a trend in that period; the dataset covers {self.coverage}."
+        first, last = points[0], points[-1]
+        peak = points[np.argmax(series[points])]
+        change = series[last] - series[first]
+        delta = f"{change:+.1f} pts" if metric.unit == "%" else f"{change / series[first] * 100:+.1f}%"
+        return (
+            f"{subject} went from {_format(series[first], metric)} in {grid_years[first]} to "
+            f"{_format(series[last], metric)} in {grid_years[last]} ({delta}), "
+            f"peaking at {_format(series[peak], metric)} in {grid_years[peak]}."
+        )
+
+
+# --- Routing ---
+_counters = {"local": 0, "remote": 0}
+_intent_counts = {}
+_counter_lock = threading.Lock()
+_routers = VersionedCache(lambda dataset: Router(get_metrics(dataset)))
+
+
+def get_router(dataset=None):
+    """Return the router for a dataset snapshot, building its tables once."""
+    return _routers.get(dataset)
+
+
+def route(question, dataset=None):
+    """Answer locally when possible, counting the routing decision either way."""
+    answer = get_router(dataset).answer(question)
+    with _counter_lock:
+        if answer is None:
+            _counters["remote"] += 1
+        else:
+            _counters["local"] += 1
+            _intent_counts[answer.intent] = _intent_counts.get(answer.intent, 0) + 1
+    return answer
+
+
+def stats():
+    with _counter_lock:
+        stats = dict(_counters)
+        stats.update({f"intent_{k}": v for k, v in _intent_counts.items()})
+    total = stats["local"] + stats["remote"]
+    stats["routing_rate"] = stats["local"] / total if total else None
+    return stats
+
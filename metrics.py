@@ -0,0 +1,201 @@
+"""Derived metrics materialized once per dataset load.
+
+Everything the Insights tab shows that is not a raw cell (year-over-year
+growth, CAGR, per-year ranks, sector-share deltas, patent leaders and the
+Key Takeaways cards) is computed here in one batch over city x year grids.
+The CAGR window is read off the data (the latest year with GDP figures and
+up to ``CAGR_YEARS`` consecutive years before it), so a reloaded workbook
+with other years still builds.
+The city profile sheet is pre-joined onto the same grids, so cross-sheet
+comparisons are array lookups rather than joins.
+"""
+import numpy as np
+
+from dataset import VersionedCache, canonical_city
+
+# Insights sector filter label -> panel column
+SECTOR_COLUMNS = {
+    "Agriculture": "agriculture_pct",
+    "Industry": "industry_pct",
+    "Services": "services_pct",
+    "Technology": "technology_pct",
+    "Tourism": "tourism_employment_pct",
+}
+CAGR_YEARS = 4
+
+
+class Metrics:
+    """Panel rows, city x year grids and derived metrics for one dataset."""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self._build_panel()
+        self._build_grids()
+        self._build_growth()
+        self._build_ranks()
+        self._build_sectors()
+        self._build_patents()
+        self._build_profile()
+        self.takeaways = self._build_takeaways()
+
+    # --- Panel ---
+    def _build_panel(self):
+        # Stack the 2007-2013 history under the 2019-2024 metro sheet
+        history = self.dataset.table("history")
+        metro = self.dataset.table("metro")
+        city = np.concatenate([history["city"], metro["city"]])
+        year = np.concatenate([history["year"], metro["year"]])
+        order = np.lexsort((year, city))
+
+        self.city = city[order]
+        self.year = year[order]
+        self.columns = {}
+        for column in metro:
+            if column in ("city", "year"):
+                continue
+            # Older sheets do not track every metric; missing years stay NaN
+            parts = [
+                np.asarray(table[column], dtype=float) if column in table
+                else np.full(len(table["year"]), np.nan)
+                for table in (history, metro)
+            ]
+            self.columns[column] = np.concatenate(parts)[order]
+
+        self.cities = tuple(np.unique(self.city).tolist())
+        self.city_code = {c: i for i, c in enumerate(self.cities)}
+        self.city_codes = np.searchsorted(np.array(self.cities), self.city)
+        self.years = np.unique(self.year)
+        self.year_codes = np.searchsorted(self.years, self.year)
+
+    def _build_grids(self):
+        shape = (len(self.cities), len(self.years))
+        self.grid = {}
+        for column, values in self.columns.items():
+            grid = np.full(shape, np.nan)
+            grid[self.city_codes, self.year_codes] = values
+            self.grid[column] = grid
+
+    def year_index(self, year):
+        i = int(np.searchsorted(self.years, year))
+        if i == len(self.years) or self.years[i] != year:
+            raise KeyError(year)
+        return i
+
+    def value(self, city, year, column):
+        return float(self.grid[column][self.city_code[canonical_city(city)], self.year_index(year)])
+
+    # --- Growth ---
+    def _build_growth(self):
+        gdp = self.grid["gdp"]
+        # Only consecutive calendar years count; the 2014-2018 gap stays NaN
+        consecutive = np.diff(self.years) == 1
+        yoy = np.full(gdp.shape, np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            yoy[:, 1:] = np.where(consecutive, (gdp[:, 1:] / gdp[:, :-1] - 1) * 100, np.nan)
+        self.grid["gdp_yoy_pct"] = yoy
+        self.columns["gdp_yoy_pct"] = yoy[self.city_codes, self.year_codes]
+
+        # The latest year with GDP, back through consecutive years only
+        end = int(np.flatnonzero(~np.isnan(gdp).all(axis=0))[-1])
+        start = end
+        while start > 0 and end - start < CAGR_YEARS and consecutive[start - 1]:
+            start -= 1
+        self.cagr_index = (start, end)
+        self.cagr_window = (int(self.years[start]), int(self.years[end]))
+        span = self.cagr_window[1] - self.cagr_window[0]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.cagr_pct = ((gdp[:, end] / gdp[:, start]) ** (1 / span) - 1) * 100 if span else np.full(len(gdp), np.nan)
+
+    # --- Ranks ---
+    def _build_ranks(self):
+        # Rank 1 is the largest GDP that year; cities without data get 0
+        gdp = self.grid["gdp"]
+        filled = np.where(np.isnan(gdp), -np.inf, gdp)
+        ranks = np.argsort(np.argsort(-filled, axis=0, kind="stable"), axis=0) + 1
+        self.gdp_rank = np.where(np.isnan(gdp), 0, ranks)
+
+    # --- Sector Shares ---
+    def _build_sectors(self):
+        start, end = self.cagr_index
+        self.sector_share_delta = {}
+        self.sector_mean_share = {}
+        for sector, column in SECTOR_COLUMNS.items():
+            grid = self.grid[column]
+            self.sector_share_delta[sector] = grid[:, end] - grid[:, start]
+            counts = (~np.isnan(grid)).sum(axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                self.sector_mean_share[sector] = np.where(counts > 0, np.nansum(grid, axis=0) / counts, np.nan)
+
+    # --- Patents ---
+    def _build_patents(self):
+        patents = self.grid["patents_per_100k"]
+        has_data = ~np.isnan(patents).all(axis=0)
+        leader = np.argmax(np.where(np.isnan(patents), -np.inf, patents), axis=0)
+        self.patent_leader = {
+            int(year): self.cities[leader[i]]
+            for i, year in enumerate(self.years) if has_data[i]
+        }
+
+    # --- City Profile (Sheet3) ---
+    def _build_profile(self):
+        profile = self.dataset.table("profile")
+        codes = np.array([self.city_code.get(c, -1) for c in profile["city"].tolist()])
+        known = codes >= 0
+        self.profile = {}
+        for column, values in profile.items():
+            if column == "city":
+                continue
+            by_city = np.full(len(self.cities), np.nan)
+            by_city[codes[known]] = np.asarray(values, dtype=float)[known]
+            self.profile[column] = by_city
+            # Broadcast onto every panel row so filters can read it directly
+            self.columns[column] = by_city[self.city_codes]
+
+    def profile_value(self, city, column):
+        return float(self.profile[column][self.city_code[canonical_city(city)]])
+
+    # --- Key Takeaways ---
+    def _build_takeaways(self):
+        # A card whose figures the workbook lacks for the window reads "n/a"
+        # rather than failing every page after a reload
+        start_year, end_year = self.cagr_window
+        end = self.cagr_index[1]
+        missing = ("n/a", f"No data for {end_year}")
+        takeaways = dict.fromkeys(("growth", "innovation", "sector", "average_growth"), missing)
+
+        yoy = self.grid["gdp_yoy_pct"][:, end]
+        if not np.isnan(yoy).all():
+            fastest = int(np.nanargmax(yoy))
+            takeaways["growth"] = (self.cities[fastest], f"{yoy[fastest]:.1f}% in {end_year}")
+
+        if end_year in self.patent_leader:
+            innovator = self.cities.index(self.patent_leader[end_year])
+            patents = self.grid["patents_per_100k"][innovator, end]
+            takeaways["innovation"] = (self.cities[innovator], f"{patents:.1f} patents per 100k")
+
+        shares = {s: float(m[end]) for s, m in self.sector_mean_share.items() if not np.isnan(m[end])}
+        if shares:
+            top_sector = max(shares, key=shares.get)
+            with np.errstate(invalid="ignore"):
+                top_delta = float(np.nanmean(self.sector_share_delta[top_sector])) \
+                    if not np.isnan(self.sector_share_delta[top_sector]).all() else np.nan
+            takeaways["sector"] = (top_sector, f"{top_delta:+.1f} pts since {start_year}"
+                                   if not np.isnan(top_delta) else f"Largest share in {end_year}")
+
+        if not np.isnan(self.cagr_pct).all() and not np.isnan(yoy).all():
+            mean_cagr = float(np.nanmean(self.cagr_pct))
+            drift = float(np.nanmean(yoy)) - mean_cagr
+            takeaways["average_growth"] = (
+                f"{mean_cagr:.1f}%",
+                "Stable" if abs(drift) < 0.5 else f"{drift:+.1f} pts in {end_year}",
+            )
+        return takeaways
+
+
+# --- Process-wide Instance ---
+_metrics = VersionedCache(Metrics)
+
+
+def get_metrics(dataset=None):
+    """Return the metrics for a dataset snapshot, materializing them once."""
+    return _metrics.get(dataset)
@@ -0,0 +1,200 @@
+"""Ordered, run-once schema migrations for user_data.db.
+
+``migrate()`` is called from the app on every rerun but only touches the
+database the first time per process and database path; after that it is a
+set lookup. Applied versions are recorded in ``schema_migrations`` so
+restarts and other replicas skip what is already there.
+"""
+import threading
+
+from db import get_pool
+
+MIGRATIONS = [
+    (1, "create users and feedback", [
+        # IF NOT EXISTS adopts databases created before migrations existed.
+        # The UNIQUE constraints double as the indexes for the email and
+        # username lookups, so those need no separate CREATE INDEX.
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS feedback (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            feedback TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    (2, "user account timestamps", [
+        # Appended after password so SELECT * keeps user[3] as the hash
+        "ALTER TABLE users ADD COLUMN created_at DATETIME",
+        "ALTER TABLE users ADD COLUMN last_login DATETIME",
+        "UPDATE users SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL",
+    ]),
+    (3, "feedback rating and contact email", [
+        "ALTER TABLE feedback ADD COLUMN rating INTEGER",
+        "ALTER TABLE feedback ADD COLUMN email TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_feedback_timestamp ON feedback (timestamp)",
+    ]),
+    (4, "login sessions", [
+        """
+        CREATE TABLE sessions (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            revoked INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "CREATE INDEX idx_sessions_user ON sessions (user_id)",
+        "CREATE INDEX idx_sessions_expires ON sessions (expires_at)",
+        """
+        CREATE TABLE app_settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+        """,
+    ]),
+    (5, "feedback full-text index", [
+        # External-content FTS5 table: the text lives once, in feedback
+        """
+        CREATE VIRTUAL TABLE feedback_fts USING fts5(
+            feedback, username, email,
+            content='feedback', content_rowid='id'
+        )
+        """,
+        "INSERT INTO feedback_fts (feedback_fts) VALUES ('rebuild')",
+        """
+        CREATE TRIGGER feedback_fts_insert AFTER INSERT ON feedback BEGIN
+            INSERT INTO feedback_fts (rowid, feedback, username, email)
+            VALUES (new.id, new.feedback, new.username, new.email);
+        END
+        """,
+        """
+        CREATE TRIGGER feedback_fts_delete AFTER DELETE ON feedback BEGIN
+            INSERT INTO feedback_fts (feedback_fts, rowid, feedback, username, email)
+            VALUES ('delete', old.id, old.feedback, old.username, old.email);
+        END
+        """,
+        """
+        CREATE TRIGGER feedback_fts_update AFTER UPDATE ON feedback BEGIN
+            INSERT INTO feedback_fts (feedback_fts, rowid, feedback, username, email)
+            VALUES ('delete', old.id, old.feedback, old.username, old.email);
+            INSERT INTO feedback_fts (rowid, feedback, username, email)
+            VALUES (new.id, new.feedback, new.username, new.email);
+        END
+        """,
+        "CREATE INDEX idx_feedback_rating ON feedback (rating)",
+    ]),
+    (6, "chatbot conversation history", [
+        """
+        CREATE TABLE chat_turns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX idx_chat_turns_user ON chat_turns (user_id, id)",
+        """
+        CREATE TABLE chat_summaries (
+            user_id INTEGER PRIMARY KEY REFERENCES users (id) ON DELETE CASCADE,
+            summary TEXT NOT NULL,
+            through_turn_id INTEGER NOT NULL
+        )
+        """,
+    ]),
+    (7, "chatbot response cache", [
+        """
+        CREATE TABLE response_cache (
+            key TEXT PRIMARY KEY,
+            query TEXT NOT NULL,
+            response TEXT NOT NULL,
+            dataset_version TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "CREATE INDEX idx_response_cache_last_used ON response_cache (last_used)",
+    ]),
+    (8, "spilled session state", [
+        # One row per (user, session) so two tabs do not overwrite each other;
+        # a new session starts from the user's most recent row
+        """
+        CREATE TABLE session_spill (
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            session_id TEXT NOT NULL,
+            state TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (user_id, session_id)
+        )
+        """,
+        "CREATE INDEX idx_session_spill_recent ON session_spill (user_id, updated_at)",
+    ]),
+    (9, "user profiles", [
+        """
+        CREATE TABLE profiles (
+            user_id INTEGER PRIMARY KEY REFERENCES users (id),
+            first_name TEXT NOT NULL DEFAULT '',
+            last_name TEXT NOT NULL DEFAULT '',
+            phone TEXT NOT NULL DEFAULT '',
+            email TEXT NOT NULL DEFAULT '',
+            address1 TEXT NOT NULL DEFAULT '',
+            address2 TEXT NOT NULL DEFAULT '',
+            city TEXT NOT NULL DEFAULT '',
+            state TEXT NOT NULL DEFAULT '',
+            country TEXT NOT NULL DEFAULT '',
+            avatar TEXT,
+            updated_at REAL NOT NULL
+        )
+        """,
+    ]),
+]
+
+_migrated = set()
+_lock = threading.Lock()
+
+
+def _apply(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    applied = {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+    for version, name, statements in MIGRATIONS:
+        if version in applied:
+            continue
+        for sql in statements:
+            conn.execute(sql)
+        conn.execute("INSERT INTO schema_migrations (version, name) VALUES (?, ?)", (version, name))
+
+
+def schema_version(pool=None):
+    pool = pool or get_pool()
+    row = pool.fetchone("SELECT MAX(version) FROM schema_migrations")
+    return row[0] if row else None
+
+
+def migrate(pool=None):
+    """Bring the database up to date once per process and database path."""
+    pool = pool or get_pool()
+    if pool.path in _migrated:
+        return
+    with _lock:
+        if pool.path in _migrated:
+            return
+        # One IMMEDIATE transaction: a replica migrating at the same time
+        # waits, then sees the versions this one recorded.
+        pool.run(_apply, write=True)
+        _migrated.add(pool.path)
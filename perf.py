@@ -0,0 +1,396 @@
+"""Script time and payload size for every rerun, plus hot-path metrics.
+
+``measure(label)`` times a block of the script and counts the bytes of the
+delta messages the script produces while it runs (before Streamlit swaps
+repeats the browser has cached for short references). Whole-page
+runs and fragment reruns are recorded separately, so the Admin tab can show
+what one interaction costs with and without fragments (``LAZY_TABS=0``
+renders every tab on every rerun, as the app used to).
+
+``section(name)``/``timed(name)`` feed per-section latency histograms,
+``count(name)`` keeps event counters, and ``register(source, fn)`` adds a
+module's own ``stats()`` to the output. ``prometheus_text()`` renders all of
+it in the Prometheus text format; ``start_exporter()`` serves it on
+``PERF_METRICS_PORT`` and/or rewrites ``PERF_METRICS_FILE`` (for the node
+exporter's textfile collector). With ``PERF_METRICS=0`` measures, sections,
+timers and counters are no-ops and Streamlit is left unwrapped.
+"""
+import bisect
+import functools
+import logging
+import os
+import tempfile
+import threading
+import time
+import weakref
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from streamlit.runtime.scriptrunner import ScriptRunContext, get_script_run_ctx
+
+RECENT_RUNS = 20
+ENABLED = os.getenv("PERF_METRICS", "1") != "0"
+METRICS_FILE = os.getenv("PERF_METRICS_FILE")
+METRICS_PORT = os.getenv("PERF_METRICS_PORT")
+EXPORT_INTERVAL = float(os.getenv("PERF_METRICS_INTERVAL", "15"))
+
+logger = logging.getLogger(__name__)
+
+
+class _Payload:
+    """Running totals of one session's delta messages."""
+
+    __slots__ = ("bytes", "messages", "__weakref__")
+
+    def __init__(self):
+        self.bytes = 0
+        self.messages = 0
+
+
+# session id -> its totals, for as long as a measure of that session holds them
+_payloads = weakref.WeakValueDictionary()
+_payloads_lock = threading.Lock()
+
+
+def _payload(ctx):
+    with _payloads_lock:
+        payload = _payloads.get(ctx.session_id)
+        if payload is None:
+            payload = _payloads[ctx.session_id] = _Payload()
+        return payload
+
+
+def _counting(enqueue):
+    @functools.wraps(enqueue)
+    def wrapper(ctx, msg):
+        payload = _payloads.get(ctx.session_id)
+        if payload is not None:
+            payload.bytes += msg.ByteSize()
+            payload.messages += 1
+        return enqueue(ctx, msg)
+
+    wrapper.counts_payload = True
+    return wrapper
+
+
+# Every element and delta a script emits goes through ScriptRunContext.enqueue
+if ENABLED and not getattr(ScriptRunContext.enqueue, "counts_payload", False):
+    ScriptRunContext.enqueue = _counting(ScriptRunContext.enqueue)
+
+
+# --- Aggregates ---
+class RenderStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {}
+
+    def record(self, label, scope, seconds, nbytes, messages):
+        with self._lock:
+            runs, total_s, max_s, total_bytes, total_messages = self._totals.get((label, scope), (0, 0.0, 0.0, 0, 0))
+            self._totals[(label, scope)] = (
+                runs + 1, total_s + seconds, max(max_s, seconds), total_bytes + nbytes, total_messages + messages,
+            )
+
+    def snapshot(self):
+        with self._lock:
+            totals = dict(self._totals)
+        return [
+            {
+                "Section": label,
+                "Rerun": scope,
+                "Runs": runs,
+                "Mean ms": round(total_s / runs * 1000, 1),
+                "Max ms": round(max_s * 1000, 1),
+                "Mean KB": round(total_bytes / runs / 1024, 1),
+                "Mean deltas": round(total_messages / runs, 1),
+            }
+            for (label, scope), (runs, total_s, max_s, total_bytes, total_messages) in sorted(totals.items())
+        ]
+
+
+stats = RenderStats()
+
+
+class _Measure:
+    def __init__(self, label):
+        self.label = label
+        self.ctx = get_script_run_ctx()
+        self.counter = _payload(self.ctx) if self.ctx is not None else None
+        self.start_bytes = self.counter.bytes if self.counter else 0
+        self.start_messages = self.counter.messages if self.counter else 0
+        self.started = time.perf_counter()
+
+    def finish(self):
+        seconds = time.perf_counter() - self.started
+        if self.counter is None:
+            return None
+        scope = "fragment" if self.ctx.fragment_ids_this_run else "full page"
+        nbytes = self.counter.bytes - self.start_bytes
+        messages = self.counter.messages - self.start_messages
+        stats.record(self.label, scope, seconds, nbytes, messages)
+        observe(f"{self.label} ({scope})", seconds)
+        _recent(self.ctx).append({
+            "Section": self.label, "Rerun": scope,
+            "ms": round(seconds * 1000, 1), "KB": round(nbytes / 1024, 1), "Deltas": messages,
+        })
+        return seconds, nbytes
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.finish()
+
+
+def measure(label):
+    """Time a section and count its payload; use as ``with`` or call ``finish``.
+
+    Runs cut short by ``st.rerun``/``st.stop`` or an error are not recorded.
+    """
+    return _Measure(label) if ENABLED else _NO_SECTION
+
+
+def _recent(ctx):
+    state = ctx.session_state
+    if "perf_recent" not in state:
+        state["perf_recent"] = deque(maxlen=RECENT_RUNS)
+    return state["perf_recent"]
+
+
+def recent():
+    """This session's latest measured sections, newest last."""
+    ctx = get_script_run_ctx()
+    return list(_recent(ctx)) if ctx is not None else []
+
+
+# --- Histograms ---
+# Upper bounds in seconds, 0.5 ms to about 90 s in steps of sqrt(2)
+BUCKETS = tuple(round(0.0005 * 2 ** (i / 2), 6) for i in range(36))
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; quantiles interpolate within a bucket."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+_histograms = {}
+_counters = {}
+_collectors = {}
+_metrics_lock = threading.Lock()
+
+
+def observe(name, seconds):
+    if not ENABLED:
+        return
+    with _metrics_lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+
+def count(name, n=1):
+    if not ENABLED:
+        return
+    with _metrics_lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def register(source, collect):
+    """Include ``collect()``'s numeric values in the exported metrics."""
+    _collectors[source] = collect
+
+
+class _Section:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.started)
+        # st.rerun/st.stop unwind as BaseException; only real errors count
+        if exc_type is not None and issubclass(exc_type, Exception):
+            count(f"{self.name} errors")
+
+
+class _NoSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def finish(self):
+        return None
+
+
+_NO_SECTION = _NoSection()
+
+
+def section(name):
+    """Time a block into the ``name`` histogram."""
+    return _Section(name) if ENABLED else _NO_SECTION
+
+
+def timed(name):
+    """Decorator form of ``section``; returns the function as is when disabled."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Section(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# --- Snapshots ---
+def section_snapshot():
+    """One row per section with its call count and latency quantiles."""
+    with _metrics_lock:
+        histograms = {name: (h.count, h.sum, h.quantile(0.5), h.quantile(0.95), h.quantile(0.99))
+                      for name, h in _histograms.items()}
+    return [
+        {
+            "Section": name, "Calls": n, "Mean ms": round(total / n * 1000, 2),
+            "p50 ms": round(p50 * 1000, 2), "p95 ms": round(p95 * 1000, 2), "p99 ms": round(p99 * 1000, 2),
+        }
+        for name, (n, total, p50, p95, p99) in sorted(histograms.items())
+    ]
+
+
+def counter_snapshot():
+    with _metrics_lock:
+        return dict(sorted(_counters.items()))
+
+
+def collected():
+    """{source: {stat: number}} from every registered collector."""
+    values = {}
+    for source, collect in list(_collectors.items()):
+        try:
+            stats = collect()
+        except Exception:
+            logger.debug("metrics collector %s failed", source, exc_info=True)
+            continue
+        values[source] = {k: v for k, v in stats.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+    return values
+
+
+# --- Prometheus Text ---
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text():
+    lines = ["# HELP app_section_seconds Time spent in instrumented sections of the app.",
+             "# TYPE app_section_seconds histogram"]
+    with _metrics_lock:
+        histograms = {name: (list(h.counts), h.count, h.sum) for name, h in _histograms.items()}
+        counters = dict(_counters)
+    for name, (counts, n, total) in sorted(histograms.items()):
+        section_label = f'section="{_label(name)}"'
+        cumulative = 0
+        for bound, c in zip(BUCKETS, counts):
+            cumulative += c
+            lines.append(f'app_section_seconds_bucket{{{section_label},le="{bound}"}} {cumulative}')
+        lines.append(f'app_section_seconds_bucket{{{section_label},le="+Inf"}} {n}')
+        lines.append(f"app_section_seconds_sum{{{section_label}}} {total}")
+        lines.append(f"app_section_seconds_count{{{section_label}}} {n}")
+
+    lines += ["# HELP app_events_total Events counted by the app.", "# TYPE app_events_total counter"]
+    lines += [f'app_events_total{{event="{_label(name)}"}} {value}' for name, value in sorted(counters.items())]
+
+    lines += ["# HELP app_stat Values reported by each component's stats().", "# TYPE app_stat gauge"]
+    for source, values in sorted(collected().items()):
+        lines += [f'app_stat{{source="{_label(source)}",name="{_label(k)}"}} {v}' for k, v in sorted(values.items())]
+    return "\n".join(lines) + "\n"
+
+
+# --- Exporter ---
+def _write_file(path):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def _file_loop(path, interval):
+    while True:
+        try:
+            _write_file(path)
+        except OSError:
+            logger.warning("could not write metrics to %s", path, exc_info=True)
+        time.sleep(interval)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+
+def start_exporter(path=METRICS_FILE, port=METRICS_PORT, interval=EXPORT_INTERVAL):
+    """Start the file writer and/or /metrics server once per process."""
+    global _exporter_started
+    if _exporter_started or not ENABLED or not (path or port):
+        return
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+        if path:
+            threading.Thread(target=_file_loop, args=(path, interval), name="metrics-file", daemon=True).start()
+        if port:
+            try:
+                server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+            except OSError:
+                # Another server process on this host already serves the port
+                logger.warning("metrics port %s is taken; not serving /metrics", port)
+                return
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
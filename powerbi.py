@@ -0,0 +1,257 @@
+"""Power BI embedding: cached embed tokens and per-view pages in one iframe.
+
+With ``POWERBI_TOKEN_URL`` set, embed tokens come from that endpoint (a
+service that calls Power BI's GenerateToken for the report, or the mock in
+``benchmarks/mock_powerbi_token_server.py``). The token is shared by every
+session, reused until shortly before it expires and refreshed ahead of
+time on a background thread, so no page view waits for one. The embed
+component (``components/powerbi_embed``) boots the report once per session
+and then moves between views with ``setPage``/bookmarks inside the same
+iframe instead of reloading the report.
+
+Without a token endpoint the report is embedded with ``autoAuth`` as
+before, deep-linked to each view's page when one is mapped and opening on
+the report's own first page when not.
+
+Page names are the report's own and are not guessed: ``POWERBI_PAGES``
+(a JSON object, or ``POWERBI_PAGES_FILE`` naming a JSON file) maps
+navigation options to pages. It is read on first use, so a malformed
+mapping surfaces as ``EmbedConfigError`` on the Dashboard only. Token mode
+navigates with ``setPage``, so there a view without a page raises
+``EmbedConfigError``. Token mode also needs the powerbi-client library at
+``components/powerbi_embed/powerbi.min.js``, served from this origin rather
+than a CDN; until it is vendored, views fall back to the autoAuth iframe.
+To vendor or upgrade it (npm checks the tarball's integrity)::
+
+    npm pack powerbi-client@2.23.1
+    tar -xzf powerbi-client-2.23.1.tgz -O package/dist/powerbi.min.js > components/powerbi_embed/powerbi.min.js
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+import streamlit.components.v1 as components
+
+logger = logging.getLogger(__name__)
+
+REPORT_ID = os.getenv("POWERBI_REPORT_ID", "efc2043a-944b-4b0a-97c1-b6e88688aabb")
+TENANT_ID = os.getenv("POWERBI_TENANT_ID", "b8593818-1c51-461d-ac9a-c1192e67c2dd")
+TOKEN_URL = os.getenv("POWERBI_TOKEN_URL")
+# Refresh this long before expiry so a token handed out is good for a while
+REFRESH_MARGIN = float(os.getenv("POWERBI_REFRESH_MARGIN_SECONDS", "300"))
+RETRY_INTERVAL = 30
+FETCH_TIMEOUT = 10
+HEIGHT = 600
+COMPONENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "powerbi_embed")
+CLIENT_JS = os.path.join(COMPONENT_DIR, "powerbi.min.js")
+
+
+class EmbedConfigError(RuntimeError):
+    pass
+
+
+def _load_pages():
+    path = os.getenv("POWERBI_PAGES_FILE")
+    try:
+        if path:
+            with open(path, encoding="utf-8") as f:
+                pages = json.load(f)
+        else:
+            pages = json.loads(os.getenv("POWERBI_PAGES", "{}"))
+    except (OSError, ValueError) as e:
+        raise EmbedConfigError(f"Could not read the Power BI page names: {e}") from e
+    if not isinstance(pages, dict):
+        raise EmbedConfigError("POWERBI_PAGES must be a JSON object of navigation option -> page name")
+    return pages
+
+
+# Navigation option -> report page name (the ReportSection... part of a
+# page URL) or "bookmark:<name>", e.g.
+# POWERBI_PAGES='{"Homepage": "ReportSection8f3c...", "GDP": "bookmark:GDP", ...}'
+_pages = None
+
+
+def pages():
+    """The page mapping, read on first use; raises EmbedConfigError if malformed."""
+    global _pages
+    if _pages is None:
+        _pages = _load_pages()
+    return _pages
+
+
+def page_for(view, required=False):
+    """The page mapped to ``view``, or None; ``required`` raises instead."""
+    page = pages().get(view)
+    if not page and required:
+        raise EmbedConfigError(
+            f"No Power BI page is configured for {view!r}. Set POWERBI_PAGES (or POWERBI_PAGES_FILE) "
+            "to map it to the report's page name or to \"bookmark:<name>\"."
+        )
+    return page or None
+
+
+def client_available():
+    return os.path.exists(CLIENT_JS)
+
+
+def report_url(page=None):
+    """The autoAuth embed URL, deep-linked to ``page`` when it is a page."""
+    params = {"reportId": REPORT_ID, "autoAuth": "true", "ctid": TENANT_ID}
+    if page and not page.startswith("bookmark:"):
+        params["pageName"] = page
+    return "https://app.powerbi.com/reportEmbed?" + urlencode(params)
+
+
+# --- Embed Tokens ---
+def _parse_expiry(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    # GenerateToken answers with ISO 8601 in UTC, e.g. 2025-01-01T12:00:00Z
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def fetch_token(url=None, report_id=REPORT_ID):
+    """POST to the token endpoint; returns {"token", "embedUrl", "expires"}."""
+    body = json.dumps({"reportId": report_id}).encode("utf-8")
+    request = Request(url or TOKEN_URL, data=body, headers={"Content-Type": "application/json"})
+    with urlopen(request, timeout=FETCH_TIMEOUT) as response:
+        payload = json.load(response)
+    return {
+        "token": payload["token"],
+        "embedUrl": payload.get("embedUrl") or f"https://app.powerbi.com/reportEmbed?reportId={report_id}",
+        "expires": _parse_expiry(payload["expiration"]),
+    }
+
+
+class EmbedTokenCache:
+    """One embed token, fetched once and refreshed before it expires."""
+
+    def __init__(self, fetch=fetch_token, margin=REFRESH_MARGIN):
+        self.fetch = fetch
+        self.margin = margin
+        self._current = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._closed = False
+        self._counters = {"hits": 0, "fetches": 0, "background_refreshes": 0, "failures": 0}
+
+    def _refresh_at(self, token):
+        # Never more than half the lifetime early, or short-lived tokens would
+        # be refreshed back to back
+        return token["expires"] - min(self.margin, (token["expires"] - token["fetched"]) / 2)
+
+    def _fresh(self, token):
+        return token is not None and time.time() < self._refresh_at(token)
+
+    def get(self):
+        token = self._current
+        if self._fresh(token):
+            self._count("hits")
+            return token
+        with self._lock:
+            # Another session may have refreshed it while this one waited
+            token = self._current
+            if self._fresh(token):
+                self._count("hits")
+                return token
+            token = self._refresh()
+        self._ensure_refresher()
+        return token
+
+    def _refresh(self, background=False):
+        try:
+            token = dict(self.fetch(), fetched=time.time())
+        except Exception:
+            self._count("failures")
+            raise
+        self._current = token
+        self._count("background_refreshes" if background else "fetches")
+        return token
+
+    # --- Background Refresh ---
+    def _ensure_refresher(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="powerbi-token-refresh", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            token = self._current
+            wait = self._refresh_at(token) - time.time() if token else RETRY_INTERVAL
+            if wait > 0:
+                self._wake.wait(wait)
+                self._wake.clear()
+                continue
+            try:
+                with self._lock:
+                    if not self._fresh(self._current):
+                        self._refresh(background=True)
+            except Exception:
+                logger.warning("Power BI embed token refresh failed; retrying in %ss", RETRY_INTERVAL, exc_info=True)
+                self._wake.wait(RETRY_INTERVAL)
+                self._wake.clear()
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+
+    # --- Stats ---
+    def _count(self, name):
+        with self._stats_lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        stats = dict(self._counters)
+        token = self._current
+        stats["expires_in_s"] = round(token["expires"] - time.time()) if token else None
+        return stats
+
+
+tokens = EmbedTokenCache()
+_warned_no_client = False
+
+
+def token_mode():
+    """Whether views are embedded with tokens and ``setPage`` navigation."""
+    global _warned_no_client
+    if not TOKEN_URL:
+        return False
+    if client_available():
+        return True
+    if not _warned_no_client:
+        _warned_no_client = True
+        logger.warning("POWERBI_TOKEN_URL is set but %s is missing; embedding with autoAuth", CLIENT_JS)
+    return False
+
+
+def embed_config(view):
+    """Everything the embed component needs to show ``view``."""
+    if token_mode():
+        page = page_for(view, required=True)
+        token = tokens.get()
+        return {"reportId": REPORT_ID, "view": view, "page": page, "mode": "token",
+                "accessToken": token["token"], "embedUrl": token["embedUrl"]}
+    page = page_for(view)
+    return {"reportId": REPORT_ID, "view": view, "page": page, "mode": "autoAuth", "embedUrl": report_url(page)}
+
+
+# --- Component ---
+_component = components.declare_component("powerbi_embed", path=COMPONENT_DIR)
+
+
+def embed(view, height=HEIGHT, key="powerbi"):
+    """Show ``view`` in the session's report iframe, mounting it on first use.
+
+    The fixed ``key`` is what keeps one iframe alive across reruns; only the
+    arguments change, and the component turns those into in-place navigation.
+    """
+    _component(**embed_config(view), height=height, key=key, default=None)
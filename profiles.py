@@ -0,0 +1,161 @@
+"""User profiles: a read-through cache over ``profiles`` with batched upserts.
+
+``get`` answers from a process-wide LRU keyed by user id and only reads
+the table on a miss (or once an entry is older than
+``PROFILE_CACHE_TTL_SECONDS``, so a save made on another replica shows up).
+``save`` replaces the cached entry at once and queues the upsert on a
+``BatchWriter``, so the form returns without waiting on SQLite.
+
+Avatars are resized to square thumbnails when uploaded and kept under
+``.cache/avatars``; users without one get a generated initials badge. Both
+are served from an in-memory LRU of encoded images, so once warm the
+Profile tab makes no database query and no network request.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps, UnidentifiedImageError
+
+from dataset import BASE_DIR, LRUCache
+from db import BatchWriter, get_pool
+
+CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "300"))
+AVATAR_DIR = os.path.join(BASE_DIR, ".cache", "avatars")
+# Shown at 120 px; twice that stays sharp on high-density screens
+THUMBNAIL_SIZE = 240
+MAX_AVATAR_BYTES = 5 * 1024 * 1024
+THUMBNAIL_CACHE_SIZE = 256
+
+FIELDS = ["first_name", "last_name", "phone", "email", "address1", "address2", "city", "state", "country", "avatar"]
+Profile = namedtuple("Profile", FIELDS)
+EMPTY = Profile(*[""] * (len(FIELDS) - 1), None)
+
+UPSERT_SQL = (
+    f"INSERT INTO profiles (user_id, {', '.join(FIELDS)}, updated_at) VALUES ({', '.join('?' * (len(FIELDS) + 2))}) "
+    f"ON CONFLICT (user_id) DO UPDATE SET {', '.join(f'{f} = excluded.{f}' for f in FIELDS)}, updated_at = excluded.updated_at"
+)
+
+
+class InvalidAvatar(Exception):
+    """Raised for uploads that are too large or not an image."""
+
+
+# --- Profiles ---
+class ProfileStore:
+    def __init__(self, pool=None, cache_size=CACHE_SIZE, ttl=CACHE_TTL):
+        self._pool = pool
+        self.ttl = ttl
+        # user id -> (profile, monotonic time it was read or saved)
+        self._cache = LRUCache(cache_size)
+        self._writer = BatchWriter(UPSERT_SQL, pool=pool, batch_size=100, interval=0.5, name="profile-writer")
+        self._saves = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        cached = self._cache.get(user_id, fresh=lambda entry: now - entry[1] < self.ttl)
+        if cached is not None:
+            return cached[0]
+        row = (self._pool or get_pool()).fetchone(
+            f"SELECT {', '.join(FIELDS)} FROM profiles WHERE user_id = ?", (user_id,)
+        )
+        profile = Profile(*row) if row else EMPTY
+        # A save that landed while this read ran is newer than the row
+        return self._cache.put(user_id, (profile, now), replace=lambda entry: entry[1] <= now)[0]
+
+    def save(self, user_id, profile):
+        self._cache.put(user_id, (profile, time.monotonic()))
+        with self._lock:
+            self._saves += 1
+        self._writer.put((user_id, *profile, time.time()))
+
+    def invalidate(self, user_id):
+        self._cache.pop(user_id)
+
+    def flush(self, timeout=10):
+        return self._writer.flush(timeout)
+
+    def stats(self):
+        cache = self._cache.stats()
+        with self._lock:
+            saves = self._saves
+        return {"hits": cache["hits"], "misses": cache["misses"], "saves": saves, "entries": cache["size"],
+                "pending_writes": self._writer.stats()["pending"]}
+
+
+store = ProfileStore()
+
+
+# --- Avatars ---
+_thumbnails = LRUCache(THUMBNAIL_CACHE_SIZE)
+
+
+def _remember(name, data):
+    return _thumbnails.put(name, data)
+
+
+def _cached(name):
+    return _thumbnails.get(name)
+
+
+def store_avatar(data, avatar_dir=AVATAR_DIR):
+    """Resize an upload to a square JPEG thumbnail; returns its file name."""
+    if len(data) > MAX_AVATAR_BYTES:
+        raise InvalidAvatar(f"Profile pictures can be at most {MAX_AVATAR_BYTES // (1024 * 1024)} MB.")
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            thumbnail = ImageOps.fit(image, (THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.LANCZOS)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise InvalidAvatar("That file is not an image we can read.") from None
+    out = io.BytesIO()
+    thumbnail.save(out, "JPEG", quality=85, optimize=True)
+    encoded = out.getvalue()
+    name = hashlib.sha256(encoded).hexdigest()[:16] + ".jpg"
+    path = os.path.join(avatar_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(avatar_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=avatar_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(encoded)
+        os.replace(tmp, path)
+    _remember(name, encoded)
+    return name
+
+
+def initials_avatar(name):
+    """A teal badge with up to two initials, as PNG bytes."""
+    initials = "".join(part[0] for part in name.split()[:2]).upper() or "?"
+    key = f"initials:{initials}"
+    data = _cached(key)
+    if data is not None:
+        return data
+    image = Image.new("RGB", (THUMBNAIL_SIZE, THUMBNAIL_SIZE), "#ffffff")
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((0, 0, THUMBNAIL_SIZE - 1, THUMBNAIL_SIZE - 1), fill="#00a1a1")
+    font = ImageFont.load_default(size=THUMBNAIL_SIZE * 2 // 5)
+    draw.text((THUMBNAIL_SIZE / 2, THUMBNAIL_SIZE / 2), initials, fill="#ffffff", font=font, anchor="mm")
+    out = io.BytesIO()
+    image.save(out, "PNG", optimize=True)
+    return _remember(key, out.getvalue())
+
+
+def avatar(profile, username, avatar_dir=AVATAR_DIR):
+    """Thumbnail bytes for a profile: its upload, else the user's initials."""
+    name = profile.avatar
+    if name:
+        data = _cached(name)
+        if data is not None:
+            return data
+        try:
+            with open(os.path.join(avatar_dir, name), "rb") as f:
+                return _remember(name, f.read())
+        except OSError:
+            pass  # uploaded on a replica that does not share .cache
+    return initials_avatar(" ".join(filter(None, (profile.first_name, profile.last_name))) or username)
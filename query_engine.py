@@ -0,0 +1,145 @@
+"""Indexed, memoized filter queries behind the Insights tab.
+
+The engine reads the city/year panel materialized by ``metrics``,
+precomputes a boolean row mask per city and a sorted year index, and answers
+(cities, year range, sectors) filters with vectorized masks. Results are
+memoized per normalized filter key with LRU eviction.
+"""
+import numpy as np
+
+from dataset import LRUCache, VersionedCache, canonical_city
+from metrics import SECTOR_COLUMNS, get_metrics
+
+CACHE_SIZE = 256
+
+
+class QueryResult:
+    """Long-form columns ready for ``st.line_chart(..., x=, y=, color=)``."""
+
+    def __init__(self, key, gdp, sectors):
+        self.key = key
+        self.gdp = gdp
+        self.sectors = sectors
+
+    @property
+    def empty(self):
+        return len(self.gdp["Year"]) == 0
+
+
+def _frozen(values):
+    values = np.asarray(values)
+    values.setflags(write=False)
+    return values
+
+
+class QueryEngine:
+    def __init__(self, metrics, cache_size=CACHE_SIZE):
+        self.metrics = metrics
+        self.dataset = metrics.dataset
+        self._cache = LRUCache(cache_size)
+        self._build_indexes()
+
+    # --- Indexes ---
+    def _build_indexes(self):
+        metrics = self.metrics
+        self.city = metrics.city
+        self.year = metrics.year
+        self.columns = metrics.columns
+        self.cities = metrics.cities
+        self.city_code = metrics.city_code
+        self.city_masks = metrics.city_codes[None, :] == np.arange(len(self.cities))[:, None]
+        self.years = metrics.years
+        self.year_order = np.argsort(self.year, kind="stable")
+        self.sorted_years = self.year[self.year_order]
+
+    def _city_mask(self, cities):
+        codes = [self.city_code[c] for c in cities]
+        if not codes:
+            return np.zeros(len(self.city), dtype=bool)
+        return self.city_masks[codes].any(axis=0)
+
+    def _year_mask(self, year_range):
+        lo, hi = year_range
+        start = np.searchsorted(self.sorted_years, lo, side="left")
+        stop = np.searchsorted(self.sorted_years, hi, side="right")
+        mask = np.zeros(len(self.year), dtype=bool)
+        mask[self.year_order[start:stop]] = True
+        return mask
+
+    # --- Queries ---
+    def normalize(self, cities, year_range, sectors):
+        """Reduce a filter to its canonical cache key.
+
+        Unknown cities and sectors are dropped, order and duplicates are
+        ignored, and the year range is snapped to years that actually have
+        rows, so slider positions that select the same rows share one entry.
+        The dataset version leads the key so results never outlive a reload.
+        """
+        cities = tuple(sorted({canonical_city(c) for c in cities} & set(self.cities)))
+        sectors = tuple(sorted(set(sectors) & set(SECTOR_COLUMNS)))
+        lo, hi = int(min(year_range)), int(max(year_range))
+        lo_i = np.searchsorted(self.years, lo, side="left")
+        hi_i = np.searchsorted(self.years, hi, side="right") - 1
+        if lo_i > hi_i:
+            years = None
+        else:
+            years = (int(self.years[lo_i]), int(self.years[hi_i]))
+        return self.dataset.version, cities, years, sectors
+
+    def query(self, cities, year_range, sectors):
+        key = self.normalize(cities, year_range, sectors)
+        result = self._cache.get(key)
+        if result is None:
+            result = self._cache.put(key, self._run(key))
+        return result
+
+    def _rows(self, key):
+        _, cities, years, _ = key
+        if years is None:
+            return np.zeros(0, dtype=np.intp)
+        return np.flatnonzero(self._city_mask(cities) & self._year_mask(years))
+
+    def _run(self, key):
+        sectors = key[3]
+        rows = self._rows(key)
+        year = self.year[rows]
+        city = self.city[rows]
+        gdp = {
+            "Year": _frozen(year),
+            "City": _frozen(city),
+            "GDP (in billion $)": _frozen(self.columns["gdp"][rows]),
+            "GDP Growth (%)": _frozen(self.columns["gdp_yoy_pct"][rows]),
+        }
+
+        # One block of rows per sector, then drop years the sheet lacks
+        n = len(rows)
+        share = np.concatenate([self.columns[SECTOR_COLUMNS[s]][rows] for s in sectors]) if sectors else np.zeros(0)
+        label = np.repeat(np.array(sectors, dtype=str), n) if sectors else np.zeros(0, dtype=str)
+        keep = ~np.isnan(share)
+        sector_city = np.tile(city, len(sectors))[keep]
+        label = label[keep]
+        sector_rows = {
+            "Year": _frozen(np.tile(year, len(sectors))[keep]),
+            "Series": _frozen(np.char.add(np.char.add(sector_city, " - "), label)),
+            "Share (%)": _frozen(share[keep]),
+        }
+        return QueryResult(key, gdp, sector_rows)
+
+    def extract(self, key):
+        """Every panel column for a normalized filter's rows, for bulk export."""
+        rows = self._rows(key)
+        columns = {"city": self.city[rows], "year": self.year[rows]}
+        columns.update((name, values[rows]) for name, values in self.columns.items())
+        return columns
+
+    def stats(self):
+        return self._cache.stats()
+
+
+# --- Process-wide Instance ---
+_engines = VersionedCache(lambda dataset: QueryEngine(get_metrics(dataset)))
+
+
+def get_query_engine(dataset=None):
+    """Return the engine for a dataset snapshot, building its indexes once."""
+    return _engines.get(dataset)
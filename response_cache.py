@@ -0,0 +1,183 @@
+"""Shared cache of chatbot answers in SQLite, with a TTL and LRU eviction.
+
+Entries are keyed on the normalized question, the backend and model, and
+the dataset version, so every session and every replica pointed at the
+same database shares them, and a dataset reload makes old answers
+unreachable at once (they are then deleted by ``invalidate``). A hit is one
+primary-key read; recording its use is queued on a ``BatchWriter`` so the
+reader never waits on the write lock.
+
+Follow-up questions ("what about Pune?") only make sense with the turn
+before them, so for those the previous exchange becomes part of the key.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import chatbot
+from dataset import CITY_ALIASES, on_reload
+from db import BatchWriter, get_pool
+
+CACHE_TTL = float(os.getenv("CHATBOT_CACHE_TTL_SECONDS", str(24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("CHATBOT_CACHE_MAX_ENTRIES", "5000"))
+# Expired and surplus rows are swept after this many stores, so the table
+# holds at most CACHE_MAX_ENTRIES + SWEEP_EVERY rows
+SWEEP_EVERY = 50
+
+TOUCH_SQL = "UPDATE response_cache SET last_used = ?, hits = hits + 1 WHERE key = ?"
+
+_ALIASES = {alias.lower(): name.lower() for alias, name in CITY_ALIASES.items()}
+_ALIAS_PATTERN = re.compile(r"\b(" + "|".join(map(re.escape, _ALIASES)) + r")\b")
+_PUNCTUATION = re.compile(r"[^\w%.\s]|(?<!\d)\.|\.(?!\d)")
+_FILLER = re.compile(r"^(please |can you |could you |tell me )+|( please)$")
+_FOLLOW_UP = re.compile(
+    r"\b(it|its|they|them|their|this|these|those|he|she|same|also|else|above|previous|"
+    r"what about|how about)\b"
+)
+
+
+def normalize(query):
+    """Case, punctuation, whitespace and city spellings folded away."""
+    text = query.lower().replace("’", "'").replace("'s ", " ")
+    text = _ALIAS_PATTERN.sub(lambda m: _ALIASES[m.group(1)], text)
+    text = " ".join(_PUNCTUATION.sub(" ", text).split())
+    return _FILLER.sub("", text).strip()
+
+
+def is_follow_up(query):
+    return bool(_FOLLOW_UP.search(normalize(query)))
+
+
+def context_for(query, recent_lines):
+    """The part of the conversation an answer depends on: empty unless a follow-up."""
+    if not recent_lines or not is_follow_up(query):
+        return ""
+    return "\n".join(recent_lines[-2:])
+
+
+class ResponseCache:
+    def __init__(self, pool=None, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES,
+                 backend=chatbot.CHATBOT_BACKEND, model=chatbot.CHATBOT_MODEL):
+        self._pool = pool
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.backend = backend
+        self.model = model
+        self._touches = BatchWriter(TOUCH_SQL, pool=pool, batch_size=200, interval=1.0, name="response-cache-touch")
+        self._lock = threading.Lock()
+        self._stores = 0
+        # Rows in the table, kept here so a stats scrape doesn't count them;
+        # seeded on first use and re-synced by every sweep
+        self._entries = None
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evicted": 0, "invalidated": 0}
+
+    @property
+    def pool(self):
+        return self._pool or get_pool()
+
+    def key(self, query, context, version):
+        raw = json.dumps([self.backend, self.model, version, normalize(query), context])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # --- Lookups ---
+    def get(self, query, version, context=""):
+        """The cached answer, or None on a miss or an expired entry."""
+        key = self.key(query, context, version)
+        row = self.pool.fetchone("SELECT response, created_at FROM response_cache WHERE key = ?", (key,))
+        now = time.time()
+        if row is None or now - row[1] > self.ttl:
+            if row is not None:
+                # Left in place for the next sweep; a fresh answer overwrites it
+                self._count("expired")
+            self._count("misses")
+            return None
+        self._touches.put((now, key))
+        self._count("hits")
+        return row[0]
+
+    def put(self, query, response, version, context=""):
+        now = time.time()
+        self.pool.execute(
+            """
+            INSERT INTO response_cache (key, query, response, dataset_version, created_at, last_used)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET response = excluded.response,
+                created_at = excluded.created_at, last_used = excluded.last_used
+            """,
+            (self.key(query, context, version), query, response, version, now, now),
+        )
+        with self._lock:
+            self._counters["stores"] += 1
+            self._stores += 1
+            if self._entries is not None:
+                # An overwrite counts too; the next sweep corrects it
+                self._entries += 1
+            sweep = self._stores % SWEEP_EVERY == 0
+        if sweep:
+            self.evict()
+
+    # --- Eviction ---
+    def evict(self):
+        """Drop expired entries, then the least recently used beyond the cap."""
+        def sweep(conn):
+            expired = conn.execute(
+                "DELETE FROM response_cache WHERE created_at < ?", (time.time() - self.ttl,)
+            ).rowcount
+            surplus = conn.execute(
+                """
+                DELETE FROM response_cache WHERE key IN (
+                    SELECT key FROM response_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            ).rowcount
+            # Counted in the same transaction, so rows written by other
+            # replicas and overwritten keys are accounted for
+            return expired + surplus, conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+        evicted, entries = self.pool.run(sweep, write=True)
+        with self._lock:
+            self._counters["evicted"] += evicted
+            self._entries = entries
+        return evicted
+
+    def invalidate(self, keep_version):
+        """Delete answers computed against any other dataset version."""
+        removed = self.pool.run(
+            lambda conn: conn.execute(
+                "DELETE FROM response_cache WHERE dataset_version != ?", (keep_version,)
+            ).rowcount,
+            write=True,
+        )
+        with self._lock:
+            self._counters["invalidated"] += removed
+            if self._entries is not None:
+                self._entries = max(self._entries - removed, 0)
+        return removed
+
+    # --- Stats ---
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            entries = self._entries
+        if entries is None:
+            entries = self.pool.fetchone("SELECT COUNT(*) FROM response_cache")[0]
+            with self._lock:
+                if self._entries is None:
+                    self._entries = entries
+                entries = self._entries
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else None
+        stats["entries"] = entries
+        return stats
+
+
+cache = ResponseCache()
+on_reload(lambda old, new: cache.invalidate(new.version))
@@ -0,0 +1,36 @@
+"""Run the app with its caches pre-warmed at server boot.
+
+    python serve.py [streamlit run options, e.g. --server.port 8501]
+
+Imports Streamlit, starts ``startup``'s warm-up thread (and ``/ready`` on
+``STARTUP_READY_PORT``), then hands over to ``streamlit run
+streamlit_app.py`` in the same process, so the sessions it serves share the
+warmed module-level caches while the server is still coming up.
+"""
+import logging
+import os
+import sys
+import time
+
+import startup
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app.py")
+
+
+def main():
+    logging.basicConfig(format="%(asctime)s %(name)s: %(message)s")
+    logging.getLogger("startup").setLevel(logging.INFO)
+
+    # Before the warm-up thread: the app's modules import streamlit too, and
+    # two threads importing its package at once can deadlock on its cycles
+    started = time.perf_counter()
+    from streamlit.web import cli
+
+    startup.record("streamlit import", time.perf_counter() - started)
+    startup.start()
+    sys.argv = ["streamlit", "run", APP, *sys.argv[1:]]
+    sys.exit(cli.main())
+
+
+if __name__ == "__main__":
+    main()
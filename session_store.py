@@ -0,0 +1,302 @@
+"""Per-session state with a memory budget, idle spill and eviction.
+
+Heavy per-session objects (the chat ``Conversation``, the last chat
+request, export jobs) live here rather than in ``st.session_state``, keyed
+by the Streamlit session id, next to a small dict of remembered widget
+values (the Insights filters and dashboard view). That makes them
+measurable and releasable from outside the session's own script runs:
+
+- After every run the session's footprint is estimated, here and in
+  ``st.session_state``; over ``SESSION_MEMORY_BUDGET_KB`` the objects that
+  can be rebuilt are dropped straight away.
+- A sweeper thread spills sessions idle for ``SESSION_SPILL_AFTER_SECONDS``:
+  the widget values go to ``session_spill`` and every object is released.
+  Chat history is already in ``chat_turns``, so the conversation is simply
+  rebuilt on the next access; the filters are read back on the next touch.
+  Rows are per (user, session), so each tab gets its own filters back; a
+  new session (a reload, or another replica) starts from the user's most
+  recently spilled tab.
+- Sessions idle for ``SESSION_IDLE_TTL_SECONDS`` are spilled and dropped
+  from this store. Closing the Streamlit session itself is left to
+  Streamlit (``Runtime.close_session`` may only run on its event loop); if
+  the tab is still open, its next run simply starts a fresh entry.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import types
+from collections import deque
+from concurrent.futures import Executor, Future
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from db import ConnectionPool, get_pool
+
+SPILL_AFTER = float(os.getenv("SESSION_SPILL_AFTER_SECONDS", "600"))
+IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL_SECONDS", str(8 * 3600)))
+MEMORY_BUDGET = int(os.getenv("SESSION_MEMORY_BUDGET_KB", "256")) * 1024
+SWEEP_INTERVAL = 30
+
+logger = logging.getLogger(__name__)
+
+
+# --- Size Estimates ---
+# Shared by every session, so never charged to one
+_SHARED = (types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType, type,
+           threading.Thread, type(threading.Lock()), type(threading.RLock()), threading.Event,
+           ConnectionPool, Executor, Future)
+MAX_DEPTH = 6
+
+
+def deep_size(obj, seen=None, depth=0):
+    """Approximate bytes held by ``obj`` and what it references."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen or depth > MAX_DEPTH or isinstance(obj, _SHARED):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen, depth + 1) + deep_size(v, seen, depth + 1) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_size(item, seen, depth + 1) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen, depth + 1)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_size(getattr(obj, name), seen, depth + 1)
+                    for name in obj.__slots__ if hasattr(obj, name))
+    return size
+
+
+# --- Store ---
+class SessionEntry:
+    __slots__ = ("user_id", "last_seen", "objects", "rebuildable", "widgets", "bytes", "spilled")
+
+    def __init__(self, user_id, widgets):
+        self.user_id = user_id
+        self.last_seen = time.time()
+        self.objects = {}
+        self.rebuildable = set()
+        self.widgets = widgets
+        self.bytes = 0
+        self.spilled = False
+
+
+class SessionStore:
+    def __init__(self, pool=None, spill_after=SPILL_AFTER, idle_ttl=IDLE_TTL, budget=MEMORY_BUDGET):
+        self._pool = pool
+        self.spill_after = spill_after
+        self.idle_ttl = idle_ttl
+        self.budget = budget
+        self._entries = {}
+        self._lock = threading.RLock()
+        self._sweeper = None
+        self._counters = {"spills": 0, "restores": 0, "evictions": 0, "budget_trims": 0}
+
+    @property
+    def pool(self):
+        return self._pool or get_pool()
+
+    def touch(self, session_id, user_id):
+        """Mark a session active, restoring its state if it was spilled."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry.user_id != user_id:
+                entry = None  # signed out and in as someone else
+            fresh = entry is None
+            restore = fresh or entry.spilled
+        if restore:
+            widgets = self._load(user_id, session_id)
+            with self._lock:
+                if fresh:
+                    entry = self._entries[session_id] = SessionEntry(user_id, widgets)
+                else:
+                    entry.widgets = {**widgets, **entry.widgets}
+                    entry.spilled = False
+                    self._counters["restores"] += 1
+        entry.last_seen = time.time()
+        self._ensure_sweeper()
+        return entry
+
+    def forget(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    # --- Objects ---
+    def get(self, entry, name, factory):
+        """The session's ``name`` object, built by ``factory`` when missing."""
+        value = entry.objects.get(name)
+        if value is None:
+            value = factory()
+            with self._lock:
+                entry.objects[name] = value
+                entry.rebuildable.add(name)
+        return value
+
+    def put(self, entry, name, value):
+        with self._lock:
+            entry.objects[name] = value
+            entry.rebuildable.discard(name)
+
+    # --- Spill and Restore ---
+    def _load(self, user_id, session_id):
+        # This session's own row if it has one, else the user's latest
+        row = self.pool.fetchone(
+            "SELECT state FROM session_spill WHERE user_id = ? "
+            "ORDER BY session_id = ? DESC, updated_at DESC LIMIT 1",
+            (user_id, session_id),
+        )
+        return json.loads(row[0]) if row else {}
+
+    def _save(self, session_id, entry):
+        if not entry.widgets:
+            return
+        now = time.time()
+
+        def save(conn):
+            conn.execute(
+                "INSERT INTO session_spill (user_id, session_id, state, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (user_id, session_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                (entry.user_id, session_id, json.dumps(entry.widgets), now),
+            )
+            # Rows of long-gone sessions are only a fallback; keep them as long as a session could live
+            conn.execute("DELETE FROM session_spill WHERE user_id = ? AND updated_at < ?",
+                         (entry.user_id, now - self.idle_ttl))
+
+        self.pool.run(save, write=True)
+
+    def spill(self, session_id, entry):
+        self._save(session_id, entry)
+        with self._lock:
+            entry.objects.clear()
+            entry.rebuildable.clear()
+            entry.widgets = {}
+            entry.bytes = 0
+            entry.spilled = True
+            self._counters["spills"] += 1
+
+    def measure(self, entry, session_state=()):
+        """Record the session's footprint and trim it if over budget."""
+        seen = set()
+        entry.bytes = deep_size(entry.objects, seen) + deep_size(entry.widgets, seen) + \
+            sum(deep_size(value, seen) for _, value in session_state)
+        if entry.bytes > self.budget and entry.rebuildable:
+            with self._lock:
+                for name in entry.rebuildable:
+                    entry.objects.pop(name, None)
+                entry.rebuildable.clear()
+                self._counters["budget_trims"] += 1
+        return entry.bytes
+
+    # --- Sweeping ---
+    def sweep(self, now=None):
+        now = now or time.time()
+        with self._lock:
+            entries = list(self._entries.items())
+        for session_id, entry in entries:
+            idle = now - entry.last_seen
+            try:
+                if idle > self.idle_ttl:
+                    self.evict(session_id, entry)
+                elif idle > self.spill_after and not entry.spilled:
+                    self.spill(session_id, entry)
+            except Exception:
+                logger.warning("could not spill session %s", session_id, exc_info=True)
+
+    def evict(self, session_id, entry):
+        if not entry.spilled:
+            self._save(session_id, entry)
+        with self._lock:
+            self._entries.pop(session_id, None)
+            self._counters["evictions"] += 1
+
+    def _ensure_sweeper(self):
+        if self._sweeper is None:
+            with self._lock:
+                if self._sweeper is None:
+                    self._sweeper = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+                    self._sweeper.start()
+
+    def _run(self):
+        while True:
+            time.sleep(SWEEP_INTERVAL)
+            self.sweep()
+
+    # --- Stats ---
+    def stats(self):
+        with self._lock:
+            entries = list(self._entries.values())
+            stats = dict(self._counters)
+        sizes = [e.bytes for e in entries if not e.spilled]
+        stats.update({
+            "sessions": len(entries),
+            "spilled": len(entries) - len(sizes),
+            "bytes_total": sum(sizes),
+            "bytes_per_session": sum(sizes) // len(sizes) if sizes else 0,
+            "bytes_max": max(sizes, default=0),
+        })
+        return stats
+
+    def snapshot(self):
+        now = time.time()
+        with self._lock:
+            entries = list(self._entries.items())
+        return [
+            {"Session": session_id[:8], "User": e.user_id, "Idle s": round(now - e.last_seen),
+             "KB": round(e.bytes / 1024, 1), "Objects": ", ".join(sorted(e.objects)), "Spilled": e.spilled}
+            for session_id, e in sorted(entries, key=lambda item: -item[1].bytes)
+        ]
+
+
+store = SessionStore()
+
+
+# --- Current Session ---
+# The script-side API: each call works on the session running this script
+def _session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "bare"
+
+
+def touch(user):
+    return store.touch(_session_id(), user.id)
+
+
+def _entry():
+    return store.touch(_session_id(), st.session_state.user.id)
+
+
+def get(name, factory):
+    return store.get(_entry(), name, factory)
+
+
+def peek(name, default=None):
+    return _entry().objects.get(name, default)
+
+
+def put(name, value):
+    store.put(_entry(), name, value)
+
+
+def seed(key, default):
+    """Give a keyed widget its remembered value, or ``default`` the first time."""
+    if key not in st.session_state:
+        st.session_state[key] = _entry().widgets.get(key, default)
+
+
+def remember(key):
+    value = st.session_state[key]
+    _entry().widgets[key] = list(value) if isinstance(value, tuple) else value
+
+
+def finish_run():
+    """Measure this session after its run; call at the end of the page."""
+    if st.session_state.get("user"):
+        store.measure(_entry(), st.session_state.items())
+
+
+def forget():
+    store.forget(_session_id())
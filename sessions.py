@@ -0,0 +1,143 @@
+"""Signed, expiring session tokens backed by the shared sessions table.
+
+A token is ``<session id>.<expiry>.<signature>``. Resuming a session checks
+the HMAC and expiry in-process and then does one primary-key lookup, so a
+reconnecting user skips bcrypt entirely. Because the table lives in the
+shared database and the signing key is shared too, any replica can resume
+any session; no sticky load balancing is needed.
+
+The token rides in the ``?session=`` URL parameter, where browser history
+and copied links can leak it, so it is short-lived and single-use: every
+resume rotates it, and the old token only keeps working for
+``ROTATION_GRACE_SECONDS`` (long enough for a second tab reloading the
+same URL). An active user is never signed out; a leaked link goes stale
+as soon as its owner comes back, or after ``SESSION_TTL_SECONDS`` at most.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import namedtuple
+
+from db import get_pool
+
+SESSION_TTL = int(os.getenv("SESSION_TTL_SECONDS", str(8 * 3600)))
+ROTATION_GRACE = int(os.getenv("SESSION_ROTATION_GRACE_SECONDS", "60"))
+QUERY_PARAM = "session"
+
+# Only what the UI needs; the password hash never leaves auth.py
+SessionUser = namedtuple("SessionUser", ["id", "username", "email"])
+
+_secrets = {}
+_secret_lock = threading.Lock()
+_purged = set()
+
+
+def _signing_key(pool):
+    """SESSION_SECRET if set, else a key generated once and kept in the DB."""
+    key = _secrets.get(pool.path)
+    if key is None:
+        with _secret_lock:
+            key = _secrets.get(pool.path)
+            if key is None:
+                configured = os.getenv("SESSION_SECRET")
+                if configured:
+                    key = configured.encode("utf-8")
+                else:
+                    def load_or_create(conn):
+                        conn.execute(
+                            "INSERT OR IGNORE INTO app_settings (key, value) VALUES ('session_secret', ?)",
+                            (secrets.token_urlsafe(32),),
+                        )
+                        return conn.execute("SELECT value FROM app_settings WHERE key = 'session_secret'").fetchone()[0]
+                    key = pool.run(load_or_create, write=True).encode("utf-8")
+                _secrets[pool.path] = key
+    return key
+
+
+def _sign(key, payload):
+    digest = hmac.new(key, payload.encode("ascii"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def issue(user, pool=None, ttl=SESSION_TTL):
+    """Create a session for ``user`` (id, username, email, ...) and return its token."""
+    pool = pool or get_pool()
+    if pool.path not in _purged:
+        # Once per process is plenty to keep dead rows from piling up
+        _purged.add(pool.path)
+        purge_expired(pool)
+    session_id = secrets.token_urlsafe(18)
+    now = time.time()
+    expires = int(now + ttl)
+    pool.execute(
+        "INSERT INTO sessions (id, user_id, created_at, expires_at) VALUES (?, ?, ?, ?)",
+        (session_id, user[0], now, expires),
+    )
+    payload = f"{session_id}.{expires}"
+    return f"{payload}.{_sign(_signing_key(pool), payload)}"
+
+
+def _parse(token, key):
+    try:
+        session_id, expires, signature = token.split(".")
+        expires = int(expires)
+        expected = _sign(key, f"{session_id}.{expires}")
+        # Bytes on both sides: compare_digest rejects non-ASCII str
+        valid = hmac.compare_digest(signature.encode("utf-8"), expected.encode("ascii"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if not valid:
+        return None
+    if expires < time.time():
+        return None
+    return session_id
+
+
+def resume(token, pool=None):
+    """Return the SessionUser for a valid, unrevoked token, else None."""
+    pool = pool or get_pool()
+    session_id = _parse(token, _signing_key(pool))
+    if session_id is None:
+        return None
+    row = pool.fetchone(
+        """
+        SELECT users.id, users.username, users.email
+        FROM sessions JOIN users ON users.id = sessions.user_id
+        WHERE sessions.id = ? AND sessions.revoked = 0 AND sessions.expires_at > ?
+        """,
+        (session_id, time.time()),
+    )
+    return SessionUser(*row) if row else None
+
+
+def rotate(token, pool=None, ttl=SESSION_TTL, grace=ROTATION_GRACE):
+    """Resume ``token`` and swap it for a fresh one: (SessionUser, new token).
+
+    The old token keeps working for ``grace`` seconds, then expires. Returns
+    (None, None) when ``token`` is not valid.
+    """
+    pool = pool or get_pool()
+    user = resume(token, pool)
+    if user is None:
+        return None, None
+    session_id = _parse(token, _signing_key(pool))
+    pool.execute(
+        "UPDATE sessions SET expires_at = MIN(expires_at, ?) WHERE id = ?", (int(time.time() + grace), session_id),
+    )
+    return user, issue(user, pool, ttl)
+
+
+def revoke(token, pool=None):
+    pool = pool or get_pool()
+    session_id = _parse(token, _signing_key(pool))
+    if session_id is not None:
+        pool.execute("UPDATE sessions SET revoked = 1 WHERE id = ?", (session_id,))
+
+
+def purge_expired(pool=None):
+    pool = pool or get_pool()
+    pool.execute("DELETE FROM sessions WHERE expires_at < ? OR revoked = 1", (time.time(),))
@@ -0,0 +1,193 @@
+"""Server boot: background pre-warming, a readiness probe and startup timing.
+
+``python serve.py`` (same options as ``streamlit run``) calls ``start``
+before the Streamlit server starts, so the app's modules, the DB pool and
+migrations, the dataset and everything derived from it (metrics, query
+indexes, dashboard specs, trend fits, intent router, static assets) are
+built on a background thread while the server comes up. The first user of
+a replica then renders from warm caches. Under a plain ``streamlit run``
+the first page run calls ``start`` instead and races the same caches, so
+nothing is built twice either way.
+
+With ``STARTUP_READY_PORT`` set, ``GET /ready`` answers 503 until the warm-up
+has finished and 200 after, for a load balancer's readiness probe. Import
+time, each warm-up step and the time to first render are logged and
+exposed through ``stats`` (the "startup" source on the metrics exporter).
+"""
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BOOT = time.perf_counter()
+PREWARM = os.getenv("STARTUP_PREWARM", "1") != "0"
+READY_PORT = os.getenv("STARTUP_READY_PORT")
+
+# What the app imports, minus what is deferred to first use (bcrypt, openai)
+APP_MODULES = [
+    "perf", "db", "migrations", "dataset", "metrics", "query_engine", "dashboards", "forecast", "intents",
+    "response_cache", "chatbot", "conversation", "auth", "sessions", "session_store", "feedback",
+    "exports", "powerbi", "profiles", "static_assets",
+]
+
+logger = logging.getLogger(__name__)
+
+_timings = {}
+_failed = []
+_lock = threading.Lock()
+_ready = threading.Event()
+_started = False
+
+
+def record(name, seconds):
+    """Keep the first measurement of ``name``; later ones are reruns."""
+    with _lock:
+        if name in _timings:
+            return False
+        _timings[name] = seconds
+    return True
+
+
+# --- Warm-up ---
+def _import_modules():
+    for name in APP_MODULES:
+        importlib.import_module(name)
+
+
+def _warm_db():
+    from db import get_pool
+    from migrations import migrate
+
+    pool = get_pool()
+    migrate(pool)
+    pool.warm()
+
+
+def _call(module, name):
+    # Imported when the step runs, so a module that fails to import fails
+    # its own step only (after "imports", this is a dictionary lookup)
+    return lambda: getattr(importlib.import_module(module), name)()
+
+
+STEPS = [
+    ("imports", _import_modules),
+    ("db", _warm_db),
+    ("dataset", _call("dataset", "get_dataset")),
+    ("metrics", _call("metrics", "get_metrics")),
+    ("query engine", _call("query_engine", "get_query_engine")),
+    ("dashboards", _call("dashboards", "get_dashboard")),
+    ("forecasts", _call("forecast", "get_forecaster")),
+    ("intents", _call("intents", "get_router")),
+    ("static assets", _call("static_assets", "manifest")),
+]
+
+
+def prewarm(steps=STEPS):
+    """Build every process-wide cache once; safe to call from any thread.
+
+    Failed steps are logged and skipped, since the app builds whatever is
+    missing lazily; the replica is then ready but ``degraded`` in ``stats``.
+    """
+    started = time.perf_counter()
+    try:
+        for name, step in steps:
+            step_started = time.perf_counter()
+            try:
+                step()
+            except Exception:
+                logger.warning("warming %s failed", name, exc_info=True)
+                with _lock:
+                    _failed.append(name)
+                continue
+            record(f"warm {name}", time.perf_counter() - step_started)
+    finally:
+        # Never leave /ready answering 503 for good
+        now = time.perf_counter()
+        record("warm total", now - started)
+        record("boot to ready", now - BOOT)
+        _ready.set()
+        with _lock:
+            failed = list(_failed)
+        if failed:
+            logger.warning("ready %.0f ms after boot, degraded: %s did not warm", (now - BOOT) * 1000, ", ".join(failed))
+        else:
+            logger.info("ready %.0f ms after boot (%s)", (now - BOOT) * 1000, _summary("warm "))
+
+
+def _summary(prefix):
+    with _lock:
+        return ", ".join(f"{k[len(prefix):]} {v * 1000:.0f} ms" for k, v in _timings.items() if k.startswith(prefix))
+
+
+def start(prewarm_caches=PREWARM, ready_port=READY_PORT):
+    """Start the warm-up thread and readiness server once per process."""
+    global _started
+    if _started:
+        return
+    with _lock:
+        if _started:
+            return
+        _started = True
+    if ready_port:
+        _serve_ready(int(ready_port))
+    if prewarm_caches:
+        threading.Thread(target=prewarm, name="startup-prewarm", daemon=True).start()
+    else:
+        _ready.set()
+
+
+def ready():
+    return _ready.is_set()
+
+
+def wait(timeout=None):
+    return _ready.wait(timeout)
+
+
+def rendered(run_started):
+    """Record the first completed page run; call at the end of the page."""
+    now = time.perf_counter()
+    if record("first render", now - run_started):
+        record("boot to first render", now - BOOT)
+        logger.info("first page rendered in %.0f ms, %.0f ms after boot",
+                    (now - run_started) * 1000, (now - BOOT) * 1000)
+
+
+# --- Readiness Probe ---
+class _ReadyHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/ready":
+            self.send_error(404)
+            return
+        body = json.dumps(stats()).encode("utf-8")
+        self.send_response(200 if ready() else 503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve_ready(port):
+    try:
+        server = ThreadingHTTPServer(("0.0.0.0", port), _ReadyHandler)
+    except OSError:
+        logger.warning("readiness port %s is taken; not serving /ready", port)
+        return
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="startup-ready", daemon=True).start()
+
+
+# --- Stats ---
+def stats():
+    with _lock:
+        timings = dict(_timings)
+        failed = len(_failed)
+    out = {"ready": int(ready()), "degraded": int(failed > 0), "failed_steps": failed}
+    out.update((f"{name.replace(' ', '_')}_ms", round(seconds * 1000, 1)) for name, seconds in timings.items())
+    return out
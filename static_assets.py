@@ -0,0 +1,174 @@
+"""Build step for the app's stylesheet and static HTML fragments.
+
+Sources live in ``web/``. ``build()`` minifies them and writes each one to
+``static/`` under a name that carries its content hash
+(``theme.3f9c2a1b.css``), plus ``static/manifest.json`` mapping source names
+to built files. Streamlit serves ``static/`` at ``app/static/`` when
+``server.enableStaticServing`` is on (see ``.streamlit/config.toml``).
+
+The page then only sends a one-line ``@import`` of the stylesheet per run,
+and the browser fetches the file once. A new build gets a new name, so the
+file can be cached forever: Streamlit itself only sends ETag/Last-Modified
+for app static files, so put ``Cache-Control: public, max-age=31536000,
+immutable`` on ``/app/static/`` at the reverse proxy.
+
+Run ``python static_assets.py`` in the deploy step; the app also rebuilds on
+startup when the sources are newer than the manifest. Where ``static/``
+cannot be written (a read-only image without a build step), the app logs a
+warning and inlines the minified sources into the page instead.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(BASE_DIR, "web")
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+MANIFEST = os.path.join(STATIC_DIR, "manifest.json")
+# Path the browser resolves against the app's URL
+STATIC_URL = "app/static"
+
+logger = logging.getLogger(__name__)
+
+
+# --- Minifiers ---
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_SPACE = re.compile(r"\s*([{};:,>])\s*")
+_HTML_COMMENT = re.compile(r"<!--.*?-->", re.S)
+_HTML_BETWEEN_TAGS = re.compile(r">\s+<")
+
+
+def minify_css(css):
+    css = _CSS_COMMENT.sub("", css)
+    css = " ".join(css.split())
+    css = _CSS_SPACE.sub(r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_html(html):
+    html = _HTML_COMMENT.sub("", html)
+    html = " ".join(html.split())
+    return _HTML_BETWEEN_TAGS.sub("><", html).strip()
+
+
+MINIFIERS = {".css": minify_css, ".html": minify_html}
+
+
+# --- Build ---
+def _sources(source_dir=SOURCE_DIR):
+    return sorted(
+        name for name in os.listdir(source_dir)
+        if os.path.splitext(name)[1] in MINIFIERS
+    )
+
+
+def build(source_dir=SOURCE_DIR, static_dir=STATIC_DIR):
+    """Minify every source into a content-hashed file; returns the manifest."""
+    os.makedirs(static_dir, exist_ok=True)
+    manifest = {}
+    for name in _sources(source_dir):
+        stem, ext = os.path.splitext(name)
+        with open(os.path.join(source_dir, name), encoding="utf-8") as f:
+            built = MINIFIERS[ext](f.read())
+        digest = hashlib.sha256(built.encode("utf-8")).hexdigest()[:8]
+        filename = f"{stem}.{digest}{ext}"
+        path = os.path.join(static_dir, filename)
+        if not os.path.exists(path):
+            _write_atomic(path, built)
+        manifest[name] = filename
+
+    # Files from older builds go once nothing refers to them
+    for stale in set(os.listdir(static_dir)) - set(manifest.values()) - {"manifest.json"}:
+        if os.path.splitext(stale)[1] in MINIFIERS:
+            os.remove(os.path.join(static_dir, stale))
+    _write_atomic(os.path.join(static_dir, "manifest.json"), json.dumps(manifest, indent=2, sort_keys=True))
+    return manifest
+
+
+def _write_atomic(path, text):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    # mkstemp creates 0600; a proxy serving static/ directly needs to read it
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+# --- Runtime ---
+_manifest = None
+_contents = {}
+_lock = threading.Lock()
+
+
+def _is_stale():
+    if not os.path.exists(MANIFEST):
+        return True
+    built = os.path.getmtime(MANIFEST)
+    return any(os.path.getmtime(os.path.join(SOURCE_DIR, name)) > built for name in _sources())
+
+
+def manifest():
+    """The built files, building them first if the sources changed.
+
+    Empty when ``static/`` cannot be built or read; every asset is then
+    served inline from its source.
+    """
+    global _manifest
+    if _manifest is None:
+        with _lock:
+            if _manifest is None:
+                try:
+                    if _is_stale():
+                        _manifest = build()
+                    else:
+                        with open(MANIFEST, encoding="utf-8") as f:
+                            _manifest = json.load(f)
+                except OSError:
+                    logger.warning("could not build %s; serving the assets inline", STATIC_DIR, exc_info=True)
+                    _manifest = {}
+    return _manifest
+
+
+def url(name):
+    return f"{STATIC_URL}/{manifest()[name]}"
+
+
+def _inline(name):
+    """The minified source of ``name``, for when there is no built file."""
+    content = _contents.get(name)
+    if content is None:
+        with open(os.path.join(SOURCE_DIR, name), encoding="utf-8") as f:
+            content = _contents[name] = MINIFIERS[os.path.splitext(name)[1]](f.read())
+    return content
+
+
+def stylesheet_tag(name="theme.css"):
+    # st.html sends a style-only body to the event container, so this takes no space
+    if name not in manifest():
+        return f"<style>{_inline(name)}</style>"
+    return f'<style>@import url("{url(name)}");</style>'
+
+
+def html(name):
+    """A minified HTML fragment, read from its built file once per process."""
+    filename = manifest().get(name)
+    if filename is None:
+        return _inline(name)
+    content = _contents.get(filename)
+    if content is None:
+        try:
+            with open(os.path.join(STATIC_DIR, filename), encoding="utf-8") as f:
+                content = _contents[filename] = f.read()
+        except OSError:
+            logger.warning("could not read %s; serving %s inline", filename, name, exc_info=True)
+            return _inline(name)
+    return content
+
+
+if __name__ == "__main__":
+    for source, built in build().items():
+        print(f"{source} -> static/{built}")
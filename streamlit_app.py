@@ -1,248 +1,606 @@
 import streamlit as st
-import sqlite3
-import bcrypt
-import openai
+import functools
 import os
+import time
+
+import auth
+import chatbot
+import dashboards
+import exports
+import feedback as feedback_store
+import forecast
+import intents
+import perf
+import powerbi
+import profiles
+import response_cache
+import session_store
+import sessions
+import startup
+import static_assets
+from conversation import Conversation
+from dataset import get_dataset, start_watcher
+from db import get_pool
+from migrations import migrate
+from query_engine import SECTOR_COLUMNS, get_query_engine
 
 # --- Secure API Key Management ---
 #openai.api_key = os.getenv("YOUR-API-KEY")  # Ensure to set this in your environment variables
 
 #Set Page Configuration
 
+# --- Startup ---
+# A no-op when serve.py already started the warm-up at boot; under a plain
+# `streamlit run` the first page run starts it alongside its own work
+startup.start()
+
 # --- Database Setup ---
+@perf.timed("init_db")
 def init_db():
-    conn = sqlite3.connect("user_data.db")
-    c = conn.cursor()
-    # Users table
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL
-        )
-    """)
-    # Feedback table
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS feedback (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL,
-            feedback TEXT NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    conn.commit()
-    conn.close()
+    # Runs the schema migrations on the first call per process; reruns are free
+    migrate(get_pool())
 
 init_db()
 
 # --- Authentication Functions ---
-def hash_password(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-
-def verify_password(password, hashed):
-    return bcrypt.checkpw(password.encode('utf-8'), hashed)
-
+@perf.timed("signup")
 def add_user(username, email, password):
-    try:
-        conn = sqlite3.connect("user_data.db")
-        c = conn.cursor()
-        hashed_pw = hash_password(password)
-        c.execute("INSERT INTO users (username, email, password) VALUES (?, ?, ?)", 
-                  (username, email, hashed_pw))
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.IntegrityError:
-        return False
+    return auth.register(username, email, password, client_ip=st.context.ip_address)
 
+@perf.timed("authenticate")
 def authenticate_user(email, password):
-    conn = sqlite3.connect("user_data.db")
-    c = conn.cursor()
-    c.execute("SELECT * FROM users WHERE email = ?", (email,))
-    user = c.fetchone()
-    conn.close()
-    if user and verify_password(password, user[3]):
-        return user
-    return None
+    return auth.authenticate(email, password, client_ip=st.context.ip_address)
 
 # --- Feedback Submission ---
-def submit_feedback(username, feedback):
-    conn = sqlite3.connect("user_data.db")
-    c = conn.cursor()
-    c.execute("INSERT INTO feedback (username, feedback) VALUES (?, ?)", 
-              (username, feedback))
-    conn.commit()
-    conn.close()
+@perf.timed("feedback submit")
+def submit_feedback(username, feedback, rating=None, email=None):
+    feedback_store.submit(username, feedback, rating, email)
 
 # --- Chatbot Functionality ---
-def get_chatbot_response(query, history):
-    prompt = "\n".join(history + [query])
-    try:
-        response = openai.Completion.create(
-            engine="text-davinci-003",
-            prompt=prompt,
-            max_tokens=150
-        )
-        reply = response.choices[0].text.strip()
-        return reply
-    except Exception as e:
-        return f"Error: {e}"
+def stream_chatbot_response(query, history):
+    # history is the user's Conversation: summary + recent turns within budget
+    return chatbot.ChatRequest(history.prompt_for(query))
+
+@perf.timed("chat cache lookup")
+def cached_chatbot_response(query, history, version):
+    """Return (cached answer or None, cache context) for this question."""
+    context = response_cache.context_for(query, history.lines())
+    return response_cache.cache.get(query, version, context), context
+
+def route_chatbot_query(query, history, dataset):
+    """Return (source, answer, request, cache context) for a question.
+
+    Workbook lookups are answered from the dataset and repeat questions from
+    the response cache; both come back as text with no request. Anything
+    else goes to the model: answer is None and the request streams it.
+    """
+    with perf.section("chat intent routing"):
+        local = intents.route(query, dataset)
+    if local is not None:
+        return "the dataset", local.text, None, None
+    cached, context = cached_chatbot_response(query, history, dataset.version)
+    if cached is not None:
+        return "cache", cached, None, context
+    perf.count("llm calls")
+    return "the model", None, stream_chatbot_response(query, history), context
 
 # --- Power BI Embed ---
-def embed_power_bi_report():
-    
+POWER_BI_DEFAULT = os.getenv("DASHBOARD_MODE", "native") == "powerbi"
+
+@perf.timed("powerbi embed")
+def embed_power_bi_report(navigation_option):
+    # One report iframe per session; switching views moves it to the view's
+    # page or bookmark instead of loading the report again
+    try:
+        powerbi.embed(navigation_option)
+    except powerbi.EmbedConfigError as e:
+        st.error(str(e))
+    except OSError as e:
+        st.error(f"Could not get a Power BI embed token: {e}")
+
+# --- Native Dashboard ---
+@perf.timed("dashboard charts")
+def render_native_dashboard(renderer, navigation_option, cities):
+    for figure in renderer.figures(navigation_option, cities):
+        st.markdown(f"#### {figure.title}")
+        if figure.kind == "metrics":
+            for col, (label, value, delta) in zip(st.columns(len(figure.spec)), figure.spec):
+                col.metric(label, value, delta)
+        else:
+            st.vega_lite_chart(figure.spec)
+
+# --- Feedback Explorer ---
+def feedback_explorer():
+    st.subheader("Feedback Explorer")
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        search_text = st.text_input("Search feedback", key="fx_search")
+    with col2:
+        rating_choice = st.selectbox("Rating", ["All", 5, 4, 3, 2, 1], key="fx_rating")
+    rating = None if rating_choice == "All" else rating_choice
+
+    # Keyset pagination: remember the cursor of every page we have seen
+    filters = (search_text, rating)
+    if st.session_state.get("fx_filters") != filters:
+        st.session_state.fx_filters = filters
+        st.session_state.fx_cursors = [None]
+    cursors = st.session_state.fx_cursors
+
+    rows, next_cursor = feedback_store.search(search_text, rating, before_id=cursors[-1])
+    st.dataframe(
+        [dict(zip(["ID", "Submitted", "User", "Rating", "Email", "Feedback"], row)) for row in rows],
+        hide_index=True,
+    )
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        if st.button("Previous page", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun(scope=RERUN_SCOPE)
+    with page_col:
+        st.caption(f"Page {len(cursors)}")
+    with next_col:
+        if st.button("Next page", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun(scope=RERUN_SCOPE)
+
+    chart_col1, chart_col2 = st.columns(2)
+    with chart_col1:
+        st.markdown("#### Ratings")
+        histogram = feedback_store.rating_histogram()
+        st.bar_chart({"Rating": [str(r) for r in histogram], "Count": list(histogram.values())}, x="Rating", y="Count")
+    with chart_col2:
+        st.markdown("#### Submissions per Day (last 30 days)")
+        daily = feedback_store.daily_counts(30)
+        st.bar_chart({"Day": [d for d, _ in daily], "Count": [c for _, c in daily]}, x="Day", y="Count")
+
+def chatbot_panel():
+    st.subheader("Chatbot Routing and Cache")
+    routing = intents.stats()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Answered from Dataset", "–" if routing["routing_rate"] is None else f"{routing['routing_rate']:.0%}")
+    col2.metric("Local / Remote", f"{routing['local']} / {routing['remote']}")
+    intent_counts = {k[len("intent_"):]: v for k, v in routing.items() if k.startswith("intent_")}
+    col3.metric("Top Intent", max(intent_counts, key=intent_counts.get) if intent_counts else "–")
+    stats = response_cache.cache.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Cache Hit Rate", "–" if stats["hit_rate"] is None else f"{stats['hit_rate']:.0%}")
+    col2.metric("Hits / Misses", f"{stats['hits']} / {stats['misses']}")
+    col3.metric("Entries", stats["entries"])
+    col4.metric("Evicted", stats["evicted"] + stats["invalidated"])
+    st.caption("Counts are for this server process; cache entries are shared by all of them.")
+
+# --- Exports ---
+# Exports render in worker processes; the tab only submits and checks on them
+def start_export(fmt, engine, key):
+    jobs = dict(session_store.peek("exports", {}))
+    jobs[fmt] = exports.queue.submit(fmt, engine, key)
+    session_store.put("exports", jobs)
+
+def export_downloads():
+    jobs = session_store.peek("exports", {})
+    for fmt, job in jobs.items():
+        if not job.done:
+            continue
+        if job.error:
+            st.error(f"The {fmt.upper()} export failed: {job.error}")
+        else:
+            # The file is read only when the button is clicked, not on every rerun
+            st.download_button(
+                f"Download {fmt.upper()} ({job.label})", data=job.open, file_name=job.file_name,
+                mime=job.mime, key=f"export_{fmt}", on_click="ignore",
+            )
+    if any(not job.done for job in jobs.values()):
+        export_progress()
+
+@st.fragment(run_every=1)
+def export_progress():
+    pending = [fmt.upper() for fmt, job in session_store.peek("exports", {}).items() if not job.done]
+    if pending:
+        st.caption(f"Preparing {', '.join(pending)} export… you can keep using the page.")
+    else:
+        # Show the download buttons, which live outside this poller
+        st.rerun()
+
+# --- Tabs ---
+# Each tab is a fragment: a widget change inside it reruns only that tab's
+# function instead of the whole page. Tabs take their own dataset snapshot
+# because a fragment rerun does not re-run the page code above it.
+LAZY_TABS = os.getenv("LAZY_TABS", "1") != "0"
+RERUN_SCOPE = "fragment" if LAZY_TABS else "app"
+
+def tab_fragment(label):
+    def decorate(render):
+        @functools.wraps(render)
+        def measured():
+            with perf.measure(label):
+                render()
+        return st.fragment(measured) if LAZY_TABS else measured
+    return decorate
+
+@tab_fragment("about")
+def about_tab():
+    st.markdown('<div class="chat-container">', unsafe_allow_html=True)
+
+    st.markdown('<div class="chat-header" style="color: #00a1a1; font-size: 36px; font-weight: bold;">About</div>', unsafe_allow_html=True)
+
+    st.markdown(static_assets.html("about.html"), unsafe_allow_html=True)
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+@tab_fragment("dashboard")
+def dashboard_tab():
+    st.subheader("Dashboard")
     # Create an interactive dropdown for navigation
-    navigation_option = st.selectbox(
-        "Choose a Dashboard View:",
-        [
-            "Homepage",
-            "GDP",
-            "Sectoral Contributions",
-            "City-wise Patents",
-            "City-wise Expenditure",
-            "City-wise Employment Rates"
-        ]
+    session_store.seed("dashboard_view", dashboards.VIEWS[0])
+    navigation_option = st.selectbox("Choose a Dashboard View:", dashboards.VIEWS, key="dashboard_view")
+    session_store.remember("dashboard_view")
+    # Display the description for the selected dashboard view
+    st.markdown(f"**Description:** {dashboards.DESCRIPTIONS.get(navigation_option, 'Explore detailed insights for the selected dashboard view.')}")
+
+    # Native charts switch instantly and work offline; the published
+    # Power BI report is opt-in as it needs network access and a sign-in
+    use_power_bi = st.toggle("Open in Power BI", value=POWER_BI_DEFAULT)
+    if use_power_bi:
+        embed_power_bi_report(navigation_option)
+    else:
+        renderer = dashboards.get_dashboard(get_dataset())
+        cities = st.multiselect("Cities:", options=list(renderer.cities), default=list(renderer.cities))
+        if cities:
+            render_native_dashboard(renderer, navigation_option, cities)
+        else:
+            st.warning("Select at least one city.")
+
+@tab_fragment("insights")
+def insights_tab():
+    dataset = get_dataset()
+    st.subheader("Insights")
+
+# Introduction and Navigation
+    st.markdown("""
+    ### Key Insights
+    - **City-Level GDP Data:** Compare the GDP contributions of major metro cities.
+    - **Growth Trends:** Observe economic trends over time using the interactive dashboard.
+    - **Sector Contributions:** Deep dive into the sectors contributing most to urban economies.
+    - **Actionable Metrics:** Use data for policy-making, business expansion, or academic research.
+""")
+    st.info("Use the filters below to explore tailored insights.")
+
+# Filters Section
+    engine = get_query_engine(dataset)
+    forecaster = forecast.get_forecaster(dataset)
+    st.markdown("#### Filter Data for Specific Insights:")
+    col1, col2, col3 = st.columns([1, 1, 1])
+    # Filters come back after the session store spills an idle session
+    session_store.seed("insights_cities", ["Mumbai", "Delhi"])
+    session_store.seed("insights_years", (2018, 2024))
+    session_store.seed("insights_sectors", ["Services", "Technology"])
+
+# City Filter
+    with col1:
+        city_filter = st.multiselect(
+        "Select Cities:",
+        options=list(engine.cities),
+        key="insights_cities"
     )
 
-    # Dictionary of Power BI report embed URLs for each section
-    embed_urls = {
-        "Homepage": "https://app.powerbi.com/reportEmbed?reportId=efc2043a-944b-4b0a-97c1-b6e88688aabb&autoAuth=true&ctid=b8593818-1c51-461d-ac9a-c1192e67c2dd",
-        "GDP": "https://app.powerbi.com/reportEmbed?reportId=efc2043a-944b-4b0a-97c1-b6e88688aabb&autoAuth=true&ctid=b8593818-1c51-461d-ac9a-c1192e67c2dd",
-        "Sectoral Contributions": "https://app.powerbi.com/reportEmbed?reportId=efc2043a-944b-4b0a-97c1-b6e88688aabb&autoAuth=true&ctid=b8593818-1c51-461d-ac9a-c1192e67c2dd",
-        "City-wise Patents": "https://app.powerbi.com/reportEmbed?reportId=efc2043a-944b-4b0a-97c1-b6e88688aabb&autoAuth=true&ctid=b8593818-1c51-461d-ac9a-c1192e67c2dd",
-        "City-wise Expenditure": "https://app.powerbi.com/reportEmbed?reportId=efc2043a-944b-4b0a-97c1-b6e88688aabb&autoAuth=true&ctid=b8593818-1c51-461d-ac9a-c1192e67c2dd",
-        "City-wise Employment Rates": "https://app.powerbi.com/reportEmbed?reportId=efc2043a-944b-4b0a-97c1-b6e88688aabb&autoAuth=true&ctid=b8593818-1c51-461d-ac9a-c1192e67c2dd"
-    }
-
-    # Dictionary of descriptions for each section
-    descriptions = {
-        "Homepage": (
-        "Welcome to the interactive Power BI Dashboard! This dynamic platform offers an in-depth view of city-wise economic data in India. "
-        "Navigate through various sections to explore key insights, visualize trends, and gain a comprehensive understanding of India's evolving economy. "
-        "Discover how cities are performing across economic, innovation, and employment metrics through intuitive visualizations."
-    ),
-    "GDP": (
-        "This section presents a detailed comparative analysis of GDP trends across major Indian cities from 2020 to 2024. "
-        "Uncover how top-performing cities are driving India's economic growth, identify patterns in GDP fluctuations, and assess regional economic disparities. "
-        "Interactive graphs and year-on-year comparisons help you grasp each city's economic trajectory."
-    ),
-    "Sectoral Contributions": (
-        "Delve into the economic structure of Indian cities by analyzing the contributions of key sectors—Agriculture, Industry, Services, and Technology—to their GDP. "
-        "Understand the diversity in economic drivers for each city and see how sectoral strengths have evolved over time. "
-        "This view helps pinpoint emerging sectors and areas of growth potential."
-    ),
-    "City-wise Patents": (
-        "Explore the innovation landscape of India through city-wise patent metrics. "
-        "This section showcases the number of patents filed per 100,000 inhabitants, reflecting each city's focus on research, creativity, and technological advancements. "
-        "Gain insights into regional hubs of innovation and track their progress over time."
-    ),
-    "City-wise Expenditure": (
-        "Analyze the financial commitment of Indian cities towards Research and Development (R&D). "
-        "This section highlights the percentage of GDP allocated to R&D activities, showcasing the priority given to fostering innovation and technological breakthroughs. "
-        "Identify cities leading the way in building a knowledge-driven economy."
-    ),
-    "City-wise Employment Rates": (
-        "Understand the employment landscape across key sectors such as Information and Communication Technology (ICT), Small and Medium Enterprises (SMEs), and Tourism. "
-        "This section provides insights into employment trends, including overall unemployment rates and youth unemployment statistics, offering a clear picture of workforce dynamics in each city. "
-        "Interactive visualizations allow for sector-specific and city-wise analysis."
+# Year Filter
+    with col2:
+       year_filter = st.slider(
+        "Select Year Range:",
+        min_value=2010,
+        # Years past the data are trend projections
+        max_value=forecaster.until,
+        step=1,
+        key="insights_years"
     )
-    }
 
-    # Display the description for the selected dashboard view
-    st.markdown(f"**Description:** {descriptions.get(navigation_option, 'Explore detailed insights for the selected dashboard view.')}")
+# Sector Filter
+    with col3:
+        sector_filter = st.multiselect(
+        "Select Sectors:",
+        options=list(SECTOR_COLUMNS),
+        key="insights_sectors"
+    )
+    for key in ("insights_cities", "insights_years", "insights_sectors"):
+        session_store.remember(key)
+
+# Apply Filters and Display Insights
+    st.markdown("### Filtered Insights")
+    st.write(f"Showing data for **{', '.join(city_filter)}** from **{year_filter[0]} to {year_filter[1]}**, focusing on sectors: **{', '.join(sector_filter)}**.")
+
+    with perf.section("insights query"):
+        result = engine.query(city_filter, year_filter, sector_filter)
+
+# GDP trends for the selected cities and years
+    st.markdown("#### GDP Trends Over Time")
+    # A range wholly past the data still gets the trend, with no actual points
+    projected = year_filter[1] > forecaster.last_year and bool(result.key[1])
+    if projected:
+        with perf.section("insights forecast"):
+            gdp_spec, sector_spec = forecaster.charts(result, year_filter[1])
+        st.vega_lite_chart(gdp_spec)
+        st.caption(f"Dashed: {forecaster.window[0]}-{forecaster.window[1]} trend with its 95% prediction band.")
+    elif result.empty:
+        st.warning("No data for the selected cities and years.")
+    else:
+        st.line_chart(result.gdp, x="Year", y="GDP (in billion $)", color="City")
+
+# Sector shares for the selected sectors
+    if sector_filter and (projected or len(result.sectors["Year"])):
+        st.markdown("#### Sector Share Over Time")
+        if projected:
+            st.vega_lite_chart(sector_spec)
+        else:
+            st.line_chart(result.sectors, x="Year", y="Share (%)", color="Series")
 
-    # Embed the selected Power BI report view
-    selected_url = embed_urls.get(navigation_option, embed_urls["Homepage"])
-    st.markdown(f"""
-        <iframe title="Power BI Report - {navigation_option}" width="100%" height="600" src="{selected_url}" frameborder="0" allowFullScreen="true"></iframe>
+   
+# Dynamic Cards for Key Insights
+    st.markdown("### Key Takeaways")
+    col4, col5 = st.columns(2)
+
+    takeaways = engine.metrics.takeaways
+    with col4:
+        st.metric("Highest GDP Growth City", *takeaways["growth"])
+        st.metric("Most Innovative City", *takeaways["innovation"])
+
+    with col5:
+        st.metric("Top Contributing Sector", *takeaways["sector"])
+        st.metric("Average GDP Growth ({}-{})".format(*engine.metrics.cagr_window), *takeaways["average_growth"])
+
+# Interactive Call to Action
+    st.success("💡 Tip: Use these insights to make informed decisions for your research or business strategies.")
+    filter_key = engine.normalize(city_filter, year_filter, sector_filter)
+    col6, col7, col8 = st.columns([1, 1, 1])
+    if col6.button("Export Insights as PDF", disabled=not exports.PDF_AVAILABLE,
+                   help=None if exports.PDF_AVAILABLE else "PDF export needs the fpdf2 package."):
+        start_export("pdf", engine, filter_key)
+    data_format = col7.selectbox("Data format:", exports.DATA_FORMATS, label_visibility="collapsed")
+    if col8.button("Download Filtered Data"):
+        start_export(data_format.lower(), engine, filter_key)
+    export_downloads()
+
+@tab_fragment("chatbot")
+def chatbot_tab():
+    dataset = get_dataset()
+    st.subheader("Chatbot")
+    # Rebuilt from chat_turns whenever the session store has released it
+    conversation = session_store.get("conversation", lambda: Conversation(st.session_state.user.id))
+
+    user_query = st.text_input("Ask a question")
+    submitted = st.button("Submit Query") and user_query
+
+    # Older turns live in SQLite; only read them back when asked to
+    if conversation.summary and st.toggle("Show earlier messages"):
+        st.write("\n".join(conversation.transcript()[:-len(conversation.recent) or None]))
+    st.write("\n".join(conversation.lines()))
+    if submitted:
+        # A new query replaces whatever answer was still streaming
+        previous = session_store.peek("chat_request")
+        if previous is not None:
+            previous.cancel()
+        st.write(f"You: {user_query}")
+        started = time.perf_counter()
+        source, chatbot_response, request, context = route_chatbot_query(user_query, conversation, dataset)
+        if request is None:
+            st.write(chatbot_response)
+            st.caption(f"Answered from {source} in {(time.perf_counter() - started) * 1000:.1f} ms")
+        else:
+            session_store.put("chat_request", request)
+            with perf.section("llm response"):
+                chatbot_response = st.write_stream(request.tokens())
+            # Timeouts and backend errors are shown but never cached
+            if request.error is None:
+                response_cache.cache.put(user_query, chatbot_response, dataset.version, context)
+            if request.ttft is not None:
+                st.caption(f"First token after {request.ttft * 1000:.0f} ms")
+        conversation.append("You", user_query)
+        conversation.append("Bot", chatbot_response)
+
+@tab_fragment("feedback")
+def feedback_tab():
+    st.markdown('<div class="chat-container">', unsafe_allow_html=True)
+    st.markdown('<div class="chat-header" style="color: #00a1a1; font-size: 36px; font-weight: bold;">Feedback for IndiaCityGDP Dashboard</div>', unsafe_allow_html=True)
+    st.markdown('<div class="feedback-section">', unsafe_allow_html=True)
+    st.markdown("""
+<h2 style="color: #008080; font-weight: bold; font-size: 24px;">Rate Your Experience ⭐️</h2>
+<p style="font-size: 16px;">How would you rate your experience with IndiaCityGDP Dashboard? Please select a rating below:</p>
+""", unsafe_allow_html=True)
+    rating = st.slider("Rate your experience:", 1, 5)
+    st.markdown(f"<p style='font-size: 24px; color: #008080;'>Rating: {'⭐️' * rating}</p>", unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('<hr>', unsafe_allow_html=True)
+    st.markdown('<div class="feedback-section">', unsafe_allow_html=True)
+    st.markdown("""
+<h2 style="color: #008080; font-weight: bold; font-size: 24px;">Your Feedback 💬</h2>
+<p style="font-size: 16px;">Please share any comments, suggestions, or issues you encountered:</p>
+""", unsafe_allow_html=True)
+    user_feedback = st.text_area("", height=150)
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('<hr>', unsafe_allow_html=True)
+    st.markdown('<div class="feedback-section">', unsafe_allow_html=True)
+    st.markdown("""
+    <h2 style="color: #008080; font-weight: bold; font-size: 24px;">Contact Information📧</h2>
     """, unsafe_allow_html=True)
+    user_email = st.text_input("Enter your email")
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('<div class="button-container">', unsafe_allow_html=True)
+    submit_button = st.button("Submit Feedback")
+    if submit_button:
+        if user_feedback:
+            submit_feedback(st.session_state.user.username, user_feedback, rating, user_email)
+            st.success("Thank you for your feedback! 😊")
+        else:
+            st.warning("Please provide feedback before submitting. ⚠️")
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('<hr>', unsafe_allow_html=True)
+    st.markdown(static_assets.html("contact.html"), unsafe_allow_html=True)
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+@tab_fragment("profile")
+def profile_tab():
+    # Profile styles are part of the shared stylesheet (web/theme.css)
+# Layout with sidebar and details
+    st.markdown('<div class="profile-container">', unsafe_allow_html=True)
 
-# --- Main Application ---
-# Streamlit Page Configuration
-st.set_page_config(page_title="IndiaCityGDP Dashboard", layout="wide", page_icon=":bar_chart:")
+# Sidebar Section
+    user = st.session_state.user
+    profile = profiles.store.get(user.id)
+    st.markdown('<div class="profile-sidebar">', unsafe_allow_html=True)
+    # A slot, so a newly uploaded picture shows on the run that saves it
+    avatar_slot = st.empty()
+    st.markdown(f"<h3>{user.username}</h3>", unsafe_allow_html=True)
+    st.markdown(f"<p>{user.email}</p>", unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
 
-# Custom CSS Styling
-st.markdown(
-    """
-    <style>
-    /* General Background */
-    body {
-        background-color: #00000;  /* Soft pastel cream */
-    }
-    .sidebar .sidebar-content {
-    background: linear-gradient(to bottom, #6a11cb, #2575fc); /* Gradient background */
-    color: white;
-    border-radius: 10px;
-    padding: 15px;
-    box-shadow: 2px 2px 10px rgba(0, 0, 0, 0.3); /* Add a shadow */
-    }
-    .sidebar .sidebar-content a {
-    color: white; /* Links in white */
-    font-weight: bold;
-    text-decoration: none;
-    }
-    sidebar .sidebar-content a:hover {
-    color: #f0e130; /* Highlight links on hover */
-    }
-    
+# Details Section
+    st.markdown('<div class="profile-details">', unsafe_allow_html=True)
+    st.markdown('<h3>Profile Settings</h3>', unsafe_allow_html=True)
+
+    with st.form(key='profile_form'):
+# Input fields
+        first_name = st.text_input("First Name", value=profile.first_name, placeholder="Enter your first name")
+        last_name = st.text_input("Last Name", value=profile.last_name, placeholder="Enter your last name")
+        phone = st.text_input("Mobile Number", value=profile.phone, placeholder="Enter phone number")
+        email = st.text_input("Email ID", value=profile.email or user.email)
+        address1 = st.text_input("Address Line 1", value=profile.address1, placeholder="Enter address line 1")
+        address2 = st.text_input("Address Line 2", value=profile.address2, placeholder="Enter address line 2")
+        city = st.text_input("City", value=profile.city, placeholder="Enter city")
+        state = st.text_input("State", value=profile.state, placeholder="Enter state")
+        country = st.text_input("Country", value=profile.country, placeholder="Enter country")
+        picture = st.file_uploader("Profile Picture", type=["png", "jpg", "jpeg", "webp"])
+
+# Save button
+        submit_button = st.form_submit_button(label="Save Profile", type="primary")
+
+    if submit_button:
+        try:
+            avatar = profiles.store_avatar(picture.getvalue()) if picture is not None else profile.avatar
+        except profiles.InvalidAvatar as e:
+            st.error(str(e))
+        else:
+            profile = profiles.Profile(first_name, last_name, phone, email, address1, address2, city, state,
+                                       country, avatar)
+            profiles.store.save(user.id, profile)
+            st.success("Profile updated successfully!")
+    avatar_slot.image(profiles.avatar(profile, user.username), caption="Profile Picture", width=120)
 
-    /* Header (Navigation Bar) Styling */
-    .navbar {
-        background: linear-gradient(90deg, #a8d5e2, #fcbad3, #f8df81);
-        color: white;
-        padding: 15px;
-        text-align: center;
-        font-size: 20px; /* Increased font size */
-        font-weight: bold;
-        border-radius: 8px;
-    }
-
-    /* Content Styling */
-    .stMarkdown, .stTextInput, .stButton {
-        font-size: 20px;  /* Increased font size for content */
-    }
-
-    /* Buttons Styling */
-    .sign-in-btn, .save-btn {
-        background-color: #ffc4d6;
-        border: none;
-        color: #333;
-        padding: 10px 20px;
-        border-radius: 5px;
-        font-size: 24px; /* Increased font size */
-        font-weight: bold;
-        cursor: pointer;
-        margin-left: 10px;
-    }
-    .sign-in-btn:hover, .save-btn:hover {
-        background-color: #ffb3c1;
-    }
-
-    /* Chatbot Styling */
-    .chatbot-container {
-        background-color: #e4f9f5; /* Soft pastel mint */
-        padding: 15px;
-        border-radius: 8px;
-        margin-top: 20px;
-        color: #333;
-        font-size: 18px; /* Increased font size */
-    }
-    
-    /* Footer Styling */
-    footer {
-        background-color: #ffefd5; /* Light pastel peach */
-        color: #3a3b3c;
-        padding: 16px;  /* Increased padding */
-        text-align: center;
-        font-size: 18px; /* Increased font size */
-        border-radius: 5px;
-    }
-    </style>
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# Close main layout div
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# Footer Section
+    st.markdown(
+    """
+    <hr style="border:1px solid #ddd;">
+    <div style="text-align: center; color: #888; font-size: 14px;">
+    © 2025 User Dashboard - All rights reserved
+    </div>
     """,
-    unsafe_allow_html=True,
+    unsafe_allow_html=True
 )
 
+@tab_fragment("admin")
+def admin_tab():
+    feedback_explorer()
+    chatbot_panel()
+    if powerbi.TOKEN_URL:
+        powerbi_panel()
+    render_stats_panel()
+    metrics_panel()
+    sessions_panel()
+
+def powerbi_panel():
+    st.subheader("Power BI Embed Tokens")
+    stats = powerbi.tokens.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Served from Cache", stats["hits"])
+    col2.metric("Fetched on Demand", stats["fetches"])
+    col3.metric("Refreshed in Background", stats["background_refreshes"])
+    col4.metric("Token Expires In", "–" if stats["expires_in_s"] is None else f"{stats['expires_in_s'] // 60} min")
+    if stats["failures"]:
+        st.caption(f"{stats['failures']} token requests failed since the server started.")
+
+def render_stats_panel():
+    st.subheader("Render Cost per Interaction")
+    if not perf.ENABLED:
+        st.info("Instrumentation is off (PERF_METRICS=0).")
+        return
+    st.caption(
+        "Script time and payload sent to the browser per section. Full-page rows include every tab that rendered; "
+        f"fragment rows are reruns of one tab. Tabs are {'lazy fragments' if LAZY_TABS else 'all rendered on every rerun (LAZY_TABS=0)'}."
+    )
+    st.dataframe(perf.stats.snapshot(), hide_index=True)
+    st.markdown("#### This Session's Recent Reruns")
+    st.dataframe(perf.recent()[::-1], hide_index=True)
+
+def metrics_panel():
+    st.subheader("Hot-path Latency")
+    if not perf.ENABLED:
+        st.info("Instrumentation is off (PERF_METRICS=0).")
+        return
+    st.caption("Per-section latency in this server process since it started. Quantiles are estimated from histogram buckets.")
+    st.dataframe(perf.section_snapshot(), hide_index=True)
+    counters = perf.counter_snapshot()
+    if counters:
+        st.markdown("#### Events")
+        for col, (name, value) in zip(st.columns(len(counters)), counters.items()):
+            col.metric(name.capitalize(), value)
+    st.markdown("#### Component Counters")
+    st.dataframe(
+        [{"Source": source, "Stat": name, "Value": value}
+         for source, values in perf.collected().items() for name, value in values.items()],
+        hide_index=True,
+    )
+    st.download_button("Download Prometheus Metrics", data=perf.prometheus_text, file_name="metrics.prom",
+                       mime="text/plain", on_click="ignore")
+
+def sessions_panel():
+    st.subheader("Session Memory")
+    stats = session_store.store.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Live Sessions", stats["sessions"] - stats["spilled"])
+    col2.metric("Spilled", stats["spilled"])
+    col3.metric("Memory per Session", f"{stats['bytes_per_session'] / 1024:.1f} KB")
+    col4.metric("Largest Session", f"{stats['bytes_max'] / 1024:.1f} KB")
+    st.caption(
+        f"Budget {session_store.store.budget // 1024} KB per session; idle sessions spill after "
+        f"{session_store.store.spill_after / 60:.0f} min and are dropped after {session_store.store.idle_ttl / 3600:.1f} h. "
+        f"{stats['spills']} spills, {stats['restores']} restores, {stats['evictions']} evictions, "
+        f"{stats['budget_trims']} budget trims so far."
+    )
+    st.dataframe(session_store.store.snapshot(), hide_index=True)
+
+# --- Instrumentation ---
+# Each component keeps its own counters; these expose them with the latency
+# histograms on PERF_METRICS_PORT (/metrics) or in PERF_METRICS_FILE
+perf.register("db", lambda: get_pool().stats())
+perf.register("response_cache", lambda: response_cache.cache.stats())
+perf.register("chatbot", lambda: chatbot.stats.snapshot())
+perf.register("intents", intents.stats)
+perf.register("query_engine", lambda: get_query_engine(get_dataset()).stats())
+perf.register("dashboards", lambda: dashboards.get_dashboard(get_dataset()).stats())
+perf.register("forecasts", lambda: forecast.get_forecaster(get_dataset()).stats())
+perf.register("exports", lambda: exports.queue.stats())
+perf.register("powerbi_tokens", lambda: powerbi.tokens.stats())
+perf.register("profiles", profiles.store.stats)
+perf.register("auth", auth.limiter_stats)
+perf.register("sessions", session_store.store.stats)
+perf.register("startup", startup.stats)
+perf.start_exporter()
+
+# --- Main Application ---
+# Streamlit Page Configuration
+st.set_page_config(page_title="IndiaCityGDP Dashboard", layout="wide", page_icon=":bar_chart:")
+page_started = time.perf_counter()
+page_run = perf.measure("page")
+
+# Custom CSS Styling: built from web/theme.css into a content-hashed file
+# under static/, so each run sends only the @import and the browser caches it
+st.html(static_assets.stylesheet_tag())
+
 # Navigation Bar
 st.markdown('<div class="navbar">IndiaCityGDP Dashboard</div>', unsafe_allow_html=True)
 
@@ -251,6 +609,16 @@ st.markdown('<div class="navbar">IndiaCityGDP Dashboard</div>', unsafe_allow_htm
 if "user" not in st.session_state:
     st.session_state.user = None
 
+# A signed token in the URL re-establishes the session after a reconnect,
+# restart or hop to another replica without going through bcrypt again.
+# Each use swaps it for a new one, so a copied link goes stale quickly.
+if st.session_state.user is None and sessions.QUERY_PARAM in st.query_params:
+    st.session_state.user, token = sessions.rotate(st.query_params[sessions.QUERY_PARAM])
+    if token is None:
+        del st.query_params[sessions.QUERY_PARAM]
+    else:
+        st.query_params[sessions.QUERY_PARAM] = token
+
 if st.session_state.user is None:
     st.sidebar.header("Login or Signup")
 
@@ -262,373 +630,68 @@ if st.session_state.user is None:
         email = st.sidebar.text_input("Email")
         password = st.sidebar.text_input("Password", type="password")
         if st.sidebar.button("Signup"):
-            if add_user(username, email, password):
-                st.sidebar.success("Signup successful! Please login.")
-            else:
-                st.sidebar.error("Error: Username or email already exists.")
+            try:
+                if add_user(username, email, password):
+                    st.sidebar.success("Signup successful! Please login.")
+                else:
+                    st.sidebar.error("Error: Username or email already exists.")
+            except auth.LoginThrottled as e:
+                st.sidebar.error(str(e))
     
     elif auth_choice == "Login":
         st.sidebar.subheader("Login to your account")
         email = st.sidebar.text_input("Email")
         password = st.sidebar.text_input("Password", type="password")
         if st.sidebar.button("Login"):
-            user = authenticate_user(email, password)
+            try:
+                user = authenticate_user(email, password)
+            except auth.LoginThrottled as e:
+                user = False
+                st.sidebar.error(str(e))
             if user:
-                st.session_state.user = user
-                st.sidebar.success(f"Welcome, {user[1]}!")
-                #st.write(f"**Account Created On:** {st.session_state.user[3]}")  # Replace with actual date
-                #st.write(f"**Last Login:** {st.session_state.user[4]}")
-            else:
+                st.session_state.user = sessions.SessionUser(*user[:3])
+                st.query_params[sessions.QUERY_PARAM] = sessions.issue(user)
+                st.sidebar.success(f"Welcome, {st.session_state.user.username}!")
+            elif user is None:
                 st.sidebar.error("Invalid email or password.")
 
 else:
-    st.sidebar.success(f"Logged in as {st.session_state.user[1]}")
+    st.sidebar.success(f"Logged in as {st.session_state.user.username}")
     if st.sidebar.button("Logout"):
+        if sessions.QUERY_PARAM in st.query_params:
+            sessions.revoke(st.query_params[sessions.QUERY_PARAM])
+            del st.query_params[sessions.QUERY_PARAM]
         st.session_state.user = None
+        session_store.forget()
 
 # --- Main Content ---
-# --- Main Content ---
-if st.session_state.user:
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["About", "Dashboard", "Insights", "Chatbot", "Feedback", "Profile"])
-
-    with tab1:  # About Page
-        st.markdown('<div class="chat-container">', unsafe_allow_html=True)
-
-        st.markdown('<div class="chat-header" style="color: #00a1a1; font-size: 36px; font-weight: bold;">About</div>', unsafe_allow_html=True)
+start_watcher()
 
-        st.markdown("""
-    <div>
-        <p>IndiaCityGDP is a comprehensive platform that visualizes and analyzes the economic landscapes of Indian cities. 
-        Through insightful data representation and analytics, it enables a deeper understanding of urban economies, fostering strategic planning and sustainable development. 
-        Our mission is to empower policymakers, researchers, businesses, 
-        and citizens with actionable insights into the economic growth and potential of urban India.</p>
-    </div>
-    <hr style="border: 1px solid #ff69b4; margin: 20px 0;">
-
-    <div>
-        <h2 style="color: #008080; font-weight: bold;">Our Vision:</h2>
-        <p>To be the go-to platform for exploring, analyzing, and understanding urban economic metrics in India, driving informed decision-making and fostering inclusive growth across cities.
-        We envision a future where data empowers cities to thrive sustainably, with tailored strategies for economic resilience, innovation, and sectoral excellence.</p>
-    </div>
-    <hr style="border: 1px solid #ff69b4; margin: 20px 0;">
-
-    <div>
-    <h2 style="color: #008080; font-weight: bold;">Key Features:</h2>
-    <ul style="font-size: 16px; line-height: 1.6;">
-        <li><strong style="color: #004d40;">Interactive GDP Analysis:</strong> Visualize city-wise GDP trends from 2019 to 2024, identifying economic leaders and growth patterns across Indian cities.</li>
-        <li><strong style="color: #004d40;">Sectoral Contributions Insights:</strong> Explore the impact of key sectors like Agriculture, Industry, Services, and Technology on city GDPs, highlighting areas of strength and growth potential.</li>
-        <li><strong style="color: #004d40;">Innovation Metrics:</strong> Dive into the innovation ecosystem with data on patents filed per 100,000 inhabitants, showcasing creativity and technological progress in different cities.</li>
-        <li><strong style="color: #004d40;">R&D Expenditure Analysis:</strong> Discover how cities allocate their GDP towards Research and Development, reflecting their commitment to fostering innovation and knowledge-driven growth.</li>
-        <li><strong style="color: #004d40;">Employment Trends Visualization:</strong> Gain insights into employment rates across sectors such as ICT, SMEs, and Tourism, along with a focus on youth unemployment and overall workforce dynamics.</li>
-    </ul>
-    </div>
-    <hr style="border: 1px solid #ff69b4; margin: 20px 0;">
-
-
-    <div>
-        <h2 style="color: #008080; font-weight: bold;">How We Engage:</h2>
-        <ul style="font-size: 16px; line-height: 1.6;">
-            <li><strong style="color: #004d40;">Policy Makers:</strong> Leverage detailed economic data to formulate policies that foster sustainable growth and equitable resource distribution.</li>
-            <li><strong style="color: #004d40;">Business Leaders:</strong> Identify high-growth sectors and cities for expansion and investment opportunities.</li>
-            <li><strong style="color: #004d40;">Citizens & Students:</strong> Understand how your city performs economically and contribute to informed civic discussions.</li>
-            <li><strong style="color: #004d40;">Researchers & Analysts:</strong> Utilize accurate data for studies, reports, and presentations on urban development and economic dynamics..</li>
-        </ul>
-    </div>
-    <hr style="border: 1px solid #ff69b4; margin: 20px 0;">
-    """, unsafe_allow_html=True)
-
-        st.markdown('</div>', unsafe_allow_html=True)
-
-    
-    with tab2:  # Dashboard Page
-        st.subheader("Power BI Dashboard")
-        embed_power_bi_report()
-
-    with tab3:  # Insights Page
-        st.subheader("Insights")
-    
-    # Introduction and Navigation
-        st.markdown("""
-        ### Key Insights
-        - **City-Level GDP Data:** Compare the GDP contributions of major metro cities.
-        - **Growth Trends:** Observe economic trends over time using the interactive dashboard.
-        - **Sector Contributions:** Deep dive into the sectors contributing most to urban economies.
-        - **Actionable Metrics:** Use data for policy-making, business expansion, or academic research.
-    """)
-        st.info("Use the filters below to explore tailored insights.")
-
-    # Filters Section
-        st.markdown("#### Filter Data for Specific Insights:")
-        col1, col2, col3 = st.columns([1, 1, 1])
-
-    # City Filter
-        with col1:
-            city_filter = st.multiselect(
-            "Select Cities:",
-            options=["Mumbai", "Delhi", "Bangalore", "Hyderabad", "Chennai", "Kolkata"],
-            default=["Mumbai", "Delhi"]
-        )
-    
-    # Year Filter
-        with col2:
-           year_filter = st.slider(
-            "Select Year Range:",
-            min_value=2010,
-            max_value=2024,
-            value=(2018, 2024),
-            step=1
-        )
-    
-    # Sector Filter
-        with col3:
-            sector_filter = st.multiselect(
-            "Select Sectors:",
-            options=["Agriculture", "Industry", "Services", "Technology", "Tourism"],
-            default=["Services", "Technology"]
-        )
-    
-    # Apply Filters and Display Insights
-        st.markdown("### Filtered Insights")
-        st.write(f"Showing data for **{', '.join(city_filter)}** from **{year_filter[0]} to {year_filter[1]}**, focusing on sectors: **{', '.join(sector_filter)}**.")
-
-    # Example Visualization (replace with actual Power BI or plotly visualizations)
-        st.markdown("#### GDP Trends Over Time")
-        st.line_chart({
-        "Mumbai": [150, 160, 170, 180, 190],
-        "Delhi": [140, 155, 165, 175, 185],
-    })  # Replace this with actual filtered data.
-
-   
-    # Dynamic Cards for Key Insights
-        st.markdown("### Key Takeaways")
-        col4, col5 = st.columns(2)
-
-        with col4:
-            st.metric("Highest GDP Growth City", "Bangalore", delta="12.5%")
-            st.metric("Most Innovative City", "Hyderabad", delta="300 patents/year")
-    
-        with col5:
-            st.metric("Top Contributing Sector", "Technology", delta="5% Increase")
-            st.metric("Average GDP Growth (2020-2024)", "7.8%", delta="Stable")
-
-    # Interactive Call to Action
-        st.success("💡 Tip: Use these insights to make informed decisions for your research or business strategies.")
-        st.button("Export Insights as PDF")
-
-    
-    with tab4:  # Chatbot Page
-        st.subheader("Chatbot")
-        if "conversation_history" not in st.session_state:
-            st.session_state.conversation_history = []
-
-        user_query = st.text_input("Ask a question")
-        if st.button("Submit Query") and user_query:
-            chatbot_response = get_chatbot_response(user_query, st.session_state.conversation_history)
-            st.session_state.conversation_history.append(f"You: {user_query}")
-            st.session_state.conversation_history.append(f"Bot: {chatbot_response}")
-
-        st.write("\n".join(st.session_state.conversation_history))
-    
-    with tab5:  # Feedback Page
-        st.markdown('<div class="chat-container">', unsafe_allow_html=True)
-        st.markdown('<div class="chat-header" style="color: #00a1a1; font-size: 36px; font-weight: bold;">Feedback for IndiaCityGDP Dashboard</div>', unsafe_allow_html=True)
-        st.markdown('<div class="feedback-section">', unsafe_allow_html=True)
-        st.markdown("""
-    <h2 style="color: #008080; font-weight: bold; font-size: 24px;">Rate Your Experience ⭐️</h2>
-    <p style="font-size: 16px;">How would you rate your experience with IndiaCityGDP Dashboard? Please select a rating below:</p>
-    """, unsafe_allow_html=True)
-        rating = st.slider("Rate your experience:", 1, 5)
-        st.markdown(f"<p style='font-size: 24px; color: #008080;'>Rating: {'⭐️' * rating}</p>", unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-        st.markdown('<hr>', unsafe_allow_html=True)
-        st.markdown('<div class="feedback-section">', unsafe_allow_html=True)
-        st.markdown("""
-    <h2 style="color: #008080; font-weight: bold; font-size: 24px;">Your Feedback 💬</h2>
-    <p style="font-size: 16px;">Please share any comments, suggestions, or issues you encountered:</p>
-    """, unsafe_allow_html=True)
-        user_feedback = st.text_area("", height=150)
-        st.markdown('</div>', unsafe_allow_html=True)
-        st.markdown('<hr>', unsafe_allow_html=True)
-        st.markdown('<div class="feedback-section">', unsafe_allow_html=True)
-        st.markdown("""
-        <h2 style="color: #008080; font-weight: bold; font-size: 24px;">Contact Information📧</h2>
-        """, unsafe_allow_html=True)
-        user_email = st.text_input("Enter your email")
-        st.markdown('</div>', unsafe_allow_html=True)
-        st.markdown('<div class="button-container">', unsafe_allow_html=True)
-        submit_button = st.button("Submit Feedback")
-        if submit_button:
-            if user_feedback:
-                st.success("Thank you for your feedback! 😊")
-                with open("feedback.txt", "a") as file:
-                    file.write(f"Rating: {rating}\nFeedback: {user_feedback}\nEmail: {user_email if user_email else 'N/A'}\n\n")
-            else:
-                st.warning("Please provide feedback before submitting. ⚠️")
-        st.markdown('</div>', unsafe_allow_html=True)
-        st.markdown('<hr>', unsafe_allow_html=True)
-        st.markdown("""
-    <div class="response-box">
-        <h2 style="color: #008080; font-weight: bold; font-size: 24px;">Get in Touch 📱</h2>
-        <p>If you'd like to connect with me, feel free to reach out on LinkedIn or send an email!</p>
-        <ul>
-            <li><a href="https://www.linkedin.com/in/harshini-shivaratri" style="color: #008080;">LinkedIn</a>🔗</li>
-            <li><a href="mailto:harshinishivaratri586@gmail.com" style="color: #008080;">harshinishivaratri586@gmail.com</a> 📧</li>
-        </ul>
-    </div>
-    """, unsafe_allow_html=True)
-
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    with tab6:
-        st.markdown("""
-<style>
-    
-
-    .profile-sidebar {
-        width: 25%;
-        background-color: #fff;
-        border-radius: 10px;
-        text-align: center;
-        color: #333;
-        padding: 20px;
-    }
-
-    .profile-sidebar img {
-        width: 120px;
-        height: 120px;
-        border-radius: 50%;
-        margin-bottom: 15px;
-    }
-
-    .profile-sidebar h3 {
-        margin: 10px 0;
-        color: #5e2b82;
-    }
-
-    .profile-sidebar p {
-        color: #555;
-        font-size: 14px;
-    }
-
-    .profile-details {
-        width: 70%;
-        background-color: #fff;
-        padding: 20px;
-        border-radius: 10px;
-        color: #333;
-    }
-
-    .profile-details h3 {
-        color: #6a11cb;
-        margin-bottom: 15px;
-    }
-
-    .profile-details .form-field {
-        margin-bottom: 15px;
-    }
-
-    .profile-details label {
-        font-size: 14px;
-        font-weight: bold;
-    }
-
-    .profile-details input {
-        width: 100%;
-        padding: 8px;
-        margin-top: 5px;
-        border-radius: 5px;
-        border: 1px solid #ccc;
-    }
-
-    .save-btn {
-        margin-top: 15px;
-        background-color: #6a11cb;
-        color: white;
-        padding: 10px 20px;
-        border: none;
-        border-radius: 5px;
-        cursor: pointer;
-    }
-
-    .save-btn:hover {
-        background-color: #2575fc;
-    }
-    </style>
-        """, unsafe_allow_html=True)
-
-# Layout with sidebar and details
-        st.markdown('<div class="profile-container">', unsafe_allow_html=True)
-
-# Sidebar Section
-        st.markdown('<div class="profile-sidebar">', unsafe_allow_html=True)
-        st.image("https://via.placeholder.com/120", caption="Profile Picture")  # Replace with user's image path
-        st.markdown(f"<h3>{st.session_state.user[1]}</h3>", unsafe_allow_html=True)
-        st.markdown(f"<p>{st.session_state.user[2]}</p>", unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-
-# Details Section
-        st.markdown('<div class="profile-details">', unsafe_allow_html=True)
-        st.markdown('<h3>Profile Settings</h3>', unsafe_allow_html=True)
-
-        with st.form(key='profile_form'):
-    # Input fields
-            first_name = st.text_input("First Name", placeholder="Enter your first name")
-            last_name = st.text_input("Last Name", placeholder="Enter your last name")
-            phone = st.text_input("Mobile Number", placeholder="Enter phone number")
-            email = st.text_input("Email ID", value=st.session_state.user[2])
-            address1 = st.text_input("Address Line 1", placeholder="Enter address line 1")
-            address2 = st.text_input("Address Line 2", placeholder="Enter address line 2")
-            city = st.text_input("City", placeholder="Enter city")
-            state = st.text_input("State", placeholder="Enter state")
-            country = st.text_input("Country", placeholder="Enter country")
-
-    # Save button
-            submit_button = st.form_submit_button(label="Save Profile", type="primary")
-
-        if submit_button:
-            st.success("Profile updated successfully!")
-
-        st.markdown('</div>', unsafe_allow_html=True)
-
-# Close main layout div
-        st.markdown('</div>', unsafe_allow_html=True)
-
-    # Footer Section
-        st.markdown(
-        """
-        <hr style="border:1px solid #ddd;">
-        <div style="text-align: center; color: #888; font-size: 14px;">
-        © 2025 User Dashboard - All rights reserved
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+if st.session_state.user:
+    session_store.touch(st.session_state.user)
+    tab_names = ["About", "Dashboard", "Insights", "Chatbot", "Feedback", "Profile"]
+    renderers = [about_tab, dashboard_tab, insights_tab, chatbot_tab, feedback_tab, profile_tab]
+    if auth.is_admin(st.session_state.user):
+        tab_names.append("Admin")
+        renderers.append(admin_tab)
+    if LAZY_TABS:
+        # Switching tabs reruns the page, and only the open tab's body runs
+        tabs = st.tabs(tab_names, key="active_tab", on_change="rerun")
+    else:
+        tabs = st.tabs(tab_names)
+    for tab, render in zip(tabs, renderers):
+        # .open is None when tabs are not tracked, i.e. every tab renders
+        if tab.open is not False:
+            with tab:
+                render()
 
 else:
     st.info("Please log in to access the application.")
 
 
-# --- Custom CSS ---
-st.markdown("""
-    <style>
-    body { background-color: #f5f5f5; }
-    .stButton>button { background-color: #4CAF50; color: white; }
-    </style>
-""", unsafe_allow_html=True)
-
 # Footer
-st.markdown(
-    """
-    <footer>
-        <div style="background-color: #ffefd5; padding: 18px; border-radius: 5px;">
-            <strong>Contact Me:</strong>  
-            <br>
-            <strong>Email:</strong>  harshinishivaratri586@gmail.com | <strong>Phone:</strong>  +91234567890
-            <br>
-            © 2025 IndiaCityGDP Dashboard
-        </div>
-    </footer>
-    """,
-    unsafe_allow_html=True,
-)
+st.markdown(static_assets.html("footer.html"), unsafe_allow_html=True)
 
+session_store.finish_run()
+startup.rendered(page_started)
+page_run.finish()
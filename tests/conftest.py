@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import ConnectionPool  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "test.db"))
+    migrate(pool)
+    pool.execute("INSERT INTO users (id, username, email, password) VALUES (1, 'alice', 'alice@example.com', '')")
+    yield pool
+    pool.close()
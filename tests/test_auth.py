@@ -0,0 +1,46 @@
+import threading
+
+import pytest
+
+import auth
+
+
+@pytest.fixture
+def hasher(monkeypatch):
+    hasher = auth.PasswordHasher(rounds=4, workers=1, max_queued=4)
+    monkeypatch.setattr(auth, "_hasher", hasher)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_register_and_authenticate(pool, hasher):
+    assert auth.register("bob", "bob@example.com", "secret", client_ip="10.0.0.1", pool=pool)
+    assert not auth.register("bob", "bob@example.com", "secret", client_ip="10.0.0.1", pool=pool)
+    assert auth.authenticate("bob@example.com", "secret", client_ip="10.0.0.1", pool=pool)[1] == "bob"
+    assert auth.authenticate("bob@example.com", "wrong", client_ip="10.0.0.1", pool=pool) is None
+
+
+def test_signups_share_the_per_ip_limit(pool, hasher, monkeypatch):
+    monkeypatch.setattr(auth, "_ip_limiter", auth.ConcurrencyLimiter(1))
+    assert auth._ip_limiter.acquire("10.0.0.2")  # a login from this address in flight
+    with pytest.raises(auth.LoginThrottled):
+        auth.register("carol", "carol@example.com", "secret", client_ip="10.0.0.2", pool=pool)
+    assert auth.register("carol", "carol@example.com", "secret", client_ip="10.0.0.3", pool=pool)
+
+
+def test_signups_cannot_take_the_whole_pool(pool, hasher, monkeypatch):
+    monkeypatch.setattr(auth, "_signup_limiter", auth.ConcurrencyLimiter(1))
+    assert auth._signup_limiter.acquire(None)
+    with pytest.raises(auth.LoginThrottled):
+        auth.register("dave", "dave@example.com", "secret", client_ip="10.0.0.4", pool=pool)
+
+
+def test_a_hash_timeout_is_a_busy_answer(hasher, monkeypatch):
+    monkeypatch.setattr(auth, "HASH_TIMEOUT", 0.05)
+    release = threading.Event()
+    hasher._executor.submit(release.wait)  # occupies the only worker
+    try:
+        with pytest.raises(auth.LoginThrottled, match="busy"):
+            hasher.hash("secret")
+    finally:
+        release.set()
@@ -0,0 +1,19 @@
+from conversation import Conversation
+
+
+def test_old_turns_fold_into_a_saved_summary(pool):
+    chat = Conversation(1, pool=pool, budget=40, summary_budget=20)
+    for i in range(6):
+        chat.append("User" if i % 2 == 0 else "Assistant", f"Message number {i} with some words in it.")
+    assert chat.summary and chat.through_turn_id
+    assert Conversation(1, pool=pool, budget=40, summary_budget=20).summary == chat.summary
+
+
+def test_an_older_summary_never_overwrites_a_newer_one(pool):
+    chat = Conversation(1, pool=pool)
+    for turn_id in (1, 2, 3):
+        pool.execute("INSERT INTO chat_turns (id, user_id, role, content, created_at) VALUES (?, 1, 'User', 'hi', 0)",
+                     (turn_id,))
+    chat._save(("newer", 3))
+    chat._save(("older", 2))
+    assert pool.fetchone("SELECT summary FROM chat_summaries WHERE user_id = 1") == ("newer",)
@@ -0,0 +1,13 @@
+from forecast import get_forecaster
+from query_engine import get_query_engine
+
+
+def test_a_range_past_the_data_still_gets_a_trend():
+    forecaster = get_forecaster()
+    years = (forecaster.last_year + 1, forecaster.until)
+    result = get_query_engine().query(["Mumbai"], years, ["Services"])
+    assert result.empty
+    gdp, sectors = forecaster.charts(result, years[1])
+    actual, projected = gdp["layer"][1]["data"]["values"], gdp["layer"][2]["data"]["values"]
+    assert actual == [] and projected[-1]["Year"] == years[1]
+    assert sectors["layer"][2]["data"]["values"]
@@ -0,0 +1,23 @@
+import pytest
+
+import intents
+
+
+@pytest.fixture(scope="module")
+def router():
+    return intents.get_router()
+
+
+def test_snapshot_metrics_do_not_answer_for_other_years(router):
+    answer = router.answer("which city had the most unicorns in 2010")
+    assert "single snapshot" in answer.text and "2010" in answer.text
+    assert "snapshot" not in router.answer("which city has the most unicorns").text
+
+
+def test_a_snapshot_metric_answers_for_its_own_year(router):
+    assert "Bengaluru" in router.answer("which city had the most startup funding in 2024").text
+
+
+@pytest.mark.parametrize("question", ["top 0 cities by gdp", "bottom 0 cities by literacy"])
+def test_top_zero_goes_to_the_model(router, question):
+    assert router.answer(question) is None
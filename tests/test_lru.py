@@ -0,0 +1,26 @@
+from dataset import LRUCache
+
+
+def test_evicts_the_least_recently_used_key():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats() == {"hits": 3, "misses": 1, "size": 2}
+
+
+def test_stale_entries_are_misses():
+    cache = LRUCache(4)
+    cache.put("a", (1, 0.0))
+    assert cache.get("a", fresh=lambda entry: entry[1] > 0) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_put_keeps_a_newer_entry():
+    cache = LRUCache(4)
+    cache.put("a", ("saved", 2.0))
+    assert cache.put("a", ("read", 1.0), replace=lambda entry: entry[1] <= 1.0) == ("saved", 2.0)
+    assert cache.put("a", ("read", 3.0), replace=lambda entry: entry[1] <= 3.0) == ("read", 3.0)
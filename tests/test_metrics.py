@@ -0,0 +1,27 @@
+from dataset import Dataset, get_dataset
+from dashboards import DashboardRenderer, VIEWS
+from intents import Router
+from metrics import Metrics
+
+
+def _without_years(dataset, *years):
+    tables = {}
+    for name, columns in dataset.tables.items():
+        if "year" in columns:
+            keep = ~sum(columns["year"] == y for y in years).astype(bool)
+            columns = {c: v[keep] for c, v in columns.items()}
+        tables[name] = dict(columns)
+    return Dataset(tables, "0" * 64)
+
+
+def test_the_cagr_window_follows_the_bundled_years():
+    assert Metrics(get_dataset()).cagr_window == (2020, 2024)
+
+
+def test_a_workbook_without_the_old_cagr_years_still_builds():
+    metrics = Metrics(_without_years(get_dataset(), 2020, 2024))
+    assert metrics.cagr_window == (2021, 2023)
+    assert "2023" in metrics.takeaways["growth"][1]
+    for view in VIEWS:
+        assert DashboardRenderer(metrics, prebuild=False).figures(view, metrics.cities)
+    assert "2021-2023" in Router(metrics).answer("which city has the highest cagr").text
@@ -0,0 +1,15 @@
+import perf
+
+
+def test_measure_is_a_no_op_when_disabled(monkeypatch):
+    monkeypatch.setattr(perf, "ENABLED", False)
+    with perf.measure("page") as run:
+        pass
+    assert run.finish() is None
+    assert perf.stats.snapshot() == []
+
+
+def test_measure_outside_a_script_run_records_nothing():
+    run = perf.measure("page")
+    assert run.counter is None and run.finish() is None
+    assert perf.stats.snapshot() == []
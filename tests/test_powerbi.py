@@ -0,0 +1,52 @@
+import pytest
+
+import powerbi
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    monkeypatch.setattr(powerbi, "_pages", {"Homepage": "ReportSection8f3c", "GDP": "bookmark:GDP"})
+    monkeypatch.setattr(powerbi, "TOKEN_URL", None)
+
+
+@pytest.fixture
+def token_mode(pages, monkeypatch, tmp_path):
+    client = tmp_path / "powerbi.min.js"
+    client.write_text("")
+    monkeypatch.setattr(powerbi, "TOKEN_URL", "http://127.0.0.1:9/token")
+    monkeypatch.setattr(powerbi, "CLIENT_JS", str(client))
+    monkeypatch.setattr(powerbi.tokens, "get", lambda: {"token": "t", "embedUrl": "https://example.test/embed"})
+    return client
+
+
+def test_views_use_their_configured_page(pages):
+    assert powerbi.embed_config("Homepage")["embedUrl"].endswith("pageName=ReportSection8f3c")
+    assert powerbi.embed_config("GDP")["page"] == "bookmark:GDP"
+
+
+def test_autoauth_opens_the_report_for_unmapped_views(pages):
+    config = powerbi.embed_config("City-wise Patents")
+    assert config["page"] is None and config["embedUrl"] == powerbi.report_url(None)
+
+
+def test_token_navigation_needs_a_page(token_mode):
+    assert powerbi.embed_config("GDP")["mode"] == "token"
+    with pytest.raises(powerbi.EmbedConfigError, match="City-wise Patents"):
+        powerbi.embed_config("City-wise Patents")
+
+
+def test_token_mode_falls_back_to_autoauth_without_the_client(token_mode):
+    token_mode.unlink()
+    assert powerbi.embed_config("City-wise Patents")["mode"] == "autoAuth"
+
+
+def test_malformed_pages_fail_on_use_not_import(monkeypatch, tmp_path):
+    path = tmp_path / "pages.json"
+    path.write_text('{"GDP": "ReportSection1a2b"}')
+    monkeypatch.setenv("POWERBI_PAGES_FILE", str(path))
+    monkeypatch.setattr(powerbi, "_pages", None)
+    assert powerbi.page_for("GDP") == "ReportSection1a2b"
+    path.write_text("not json")
+    monkeypatch.setattr(powerbi, "_pages", None)
+    with pytest.raises(powerbi.EmbedConfigError):
+        powerbi.embed_config("GDP")
@@ -0,0 +1,30 @@
+import response_cache
+from response_cache import ResponseCache
+
+
+def test_entry_count_is_tracked_without_counting_the_table(pool, monkeypatch):
+    cache = ResponseCache(pool=pool, max_entries=2, backend="test", model="test")
+    assert cache.stats()["entries"] == 0
+    queries = []
+    monkeypatch.setattr(pool, "fetchone", lambda sql, *args: queries.append(sql))
+    for city in ("Pune", "Delhi", "Mumbai"):
+        cache.put(f"gdp of {city}", "answer", "v1")
+    assert cache.stats()["entries"] == 3
+    assert queries == []
+    monkeypatch.undo()
+
+    assert cache.evict() == 1
+    assert cache.stats()["entries"] == 2
+    assert cache.invalidate("v2") == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_a_sweep_corrects_overwritten_keys(pool, monkeypatch):
+    monkeypatch.setattr(response_cache, "SWEEP_EVERY", 3)
+    cache = ResponseCache(pool=pool, backend="test", model="test")
+    cache.stats()
+    cache.put("gdp of Pune", "old", "v1")
+    cache.put("gdp of Pune", "new", "v1")
+    assert cache.stats()["entries"] == 2
+    cache.put("gdp of Delhi", "answer", "v1")
+    assert cache.stats()["entries"] == 2
@@ -0,0 +1,26 @@
+from session_store import SessionStore
+
+
+def test_tabs_spill_and_restore_their_own_widgets(pool):
+    store = SessionStore(pool=pool)
+    store._sweeper = object()  # no background sweeps in tests
+    first, second = store.touch("tab-1", 1), store.touch("tab-2", 1)
+    first.widgets["insights_cities"] = ["Mumbai"]
+    second.widgets["insights_cities"] = ["Pune"]
+    store.spill("tab-1", first)
+    store.spill("tab-2", second)
+
+    assert store.touch("tab-1", 1).widgets == {"insights_cities": ["Mumbai"]}
+    assert store.touch("tab-2", 1).widgets == {"insights_cities": ["Pune"]}
+    # A new session starts from the most recently spilled tab
+    assert store.touch("tab-3", 1).widgets == {"insights_cities": ["Pune"]}
+
+
+def test_evict_drops_the_entry_and_keeps_its_widgets(pool):
+    store = SessionStore(pool=pool)
+    store._sweeper = object()
+    entry = store.touch("tab-1", 1)
+    entry.widgets["dashboard_view"] = "GDP"
+    store.evict("tab-1", entry)
+    assert store.stats()["sessions"] == 0
+    assert store.touch("tab-1", 1).widgets == {"dashboard_view": "GDP"}
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+import sessions
+
+USER = (1, "alice", "alice@example.com")
+
+
+def test_round_trip(pool):
+    token = sessions.issue(USER, pool)
+    assert sessions.resume(token, pool) == sessions.SessionUser(*USER)
+
+
+@pytest.mark.parametrize("token", [
+    None, "", "abc", "a.b", "a.b.c.d", "a.notanumber.sig", "a.99999999999.é", "é.99999999999.sig", "a.1.\x00",
+])
+def test_malformed_tokens_are_rejected(pool, token):
+    assert sessions.resume(token, pool) is None
+
+
+def test_tampered_tokens_are_rejected(pool):
+    session_id, expires, signature = sessions.issue(USER, pool).split(".")
+    assert sessions.resume(f"{session_id}.{int(expires) + 3600}.{signature}", pool) is None
+    assert sessions.resume(f"{session_id}x.{expires}.{signature}", pool) is None
+    flipped = ("A" if signature[0] != "A" else "B") + signature[1:]
+    assert sessions.resume(f"{session_id}.{expires}.{flipped}", pool) is None
+
+
+def test_expired_tokens_are_rejected(pool):
+    assert sessions.resume(sessions.issue(USER, pool, ttl=-1), pool) is None
+
+
+def test_revoked_tokens_are_rejected(pool):
+    token = sessions.issue(USER, pool)
+    sessions.revoke(token, pool)
+    assert sessions.resume(token, pool) is None
+
+
+def test_rotate_replaces_the_token(pool, monkeypatch):
+    old = sessions.issue(USER, pool)
+    user, new = sessions.rotate(old, pool, grace=60)
+    assert user == sessions.SessionUser(*USER) and new != old
+    # Still good within the grace period, dead after it
+    assert sessions.resume(old, pool) == user
+    monkeypatch.setattr(time, "time", lambda now=time.time(): now + 61)
+    assert sessions.resume(old, pool) is None
+    assert sessions.resume(new, pool) == user
+
+
+def test_rotate_rejects_invalid_tokens(pool):
+    assert sessions.rotate("a.99999999999.é", pool) == (None, None)
@@ -0,0 +1,32 @@
+import threading
+
+import pytest
+
+import startup
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(startup, "_ready", threading.Event())
+    monkeypatch.setattr(startup, "_failed", [])
+    monkeypatch.setattr(startup, "_timings", {})
+
+
+def test_failed_steps_leave_the_replica_ready_but_degraded():
+    def broken():
+        raise ImportError("no module named dashboards")
+
+    startup.prewarm([("ok", lambda: None), ("broken", broken), ("after", lambda: None)])
+    assert startup.ready()
+    stats = startup.stats()
+    assert stats["degraded"] == 1 and stats["failed_steps"] == 1
+    assert "warm_after_ms" in stats and "warm_broken_ms" not in stats
+
+
+def test_ready_is_set_even_when_the_warm_up_is_interrupted():
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        startup.prewarm([("interrupted", interrupted)])
+    assert startup.ready()
@@ -0,0 +1,30 @@
+import pytest
+
+import static_assets
+
+
+@pytest.fixture
+def unbuildable(monkeypatch):
+    def read_only(*args, **kwargs):
+        raise PermissionError(30, "Read-only file system", static_assets.STATIC_DIR)
+
+    monkeypatch.setattr(static_assets, "build", read_only)
+    monkeypatch.setattr(static_assets, "_is_stale", lambda: True)
+    monkeypatch.setattr(static_assets, "_manifest", None)
+    monkeypatch.setattr(static_assets, "_contents", {})
+
+
+def test_a_read_only_static_dir_serves_the_assets_inline(unbuildable):
+    assert static_assets.manifest() == {}
+    tag = static_assets.stylesheet_tag()
+    assert tag.startswith("<style>") and "@import" not in tag
+    assert static_assets.html("footer.html") == static_assets.minify_html(
+        open(static_assets.SOURCE_DIR + "/footer.html", encoding="utf-8").read())
+
+
+def test_build_hashes_names_by_content(tmp_path):
+    source, static = tmp_path / "web", tmp_path / "static"
+    source.mkdir()
+    (source / "theme.css").write_text("a {  color: red; }")
+    built = static_assets.build(str(source), str(static))["theme.css"]
+    assert built.startswith("theme.") and (static / built).read_text() == "a{color:red}"